@@ -7,6 +7,7 @@ from wagtail_modeladmin.options import ModelAdminGroup
 from geomanager.admin.boundary import urls as boundary_urls
 from geomanager.admin.category import CategoryModelAdmin
 from geomanager.admin.dataset import DatasetModelAdmin
+from geomanager.admin.ingest_job import IngestJobModelAdmin
 from geomanager.admin.mbt_source import MBTSourceModelAdmin
 from geomanager.admin.metadata import MetadataModelAdmin
 from geomanager.admin.raster_file import RasterFileLayerModelAdmin, RasterFileModelAdmin, urls as raster_file_urls
@@ -51,6 +52,7 @@ class GeoManagerAdminGroup(ModelAdminGroupWithHiddenItems):
         RasterTileLayerModelAdmin,
         VectorTileLayerModelAdmin,
         MBTSourceModelAdmin,
+        IngestJobModelAdmin,
         RasterFileModelAdmin,
         VectorTableModelAdmin
     )
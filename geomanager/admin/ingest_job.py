@@ -0,0 +1,54 @@
+from django.utils.translation import gettext_lazy as _
+
+from geomanager.admin.base import BaseModelAdmin, ModelAdminCanHide
+from geomanager.models import IngestJob
+from geomanager.utils.ingest_jobs import get_ingest_job_stats
+from geomanager.views.modeladmin import PatchedIndexView
+
+
+def format_duration(value):
+    if value is None:
+        return "-"
+    return f"{value.total_seconds():.1f}s"
+
+
+class IngestJobIndexView(PatchedIndexView):
+    def get_context_data(self, **kwargs):
+        context_data = super(IngestJobIndexView, self).get_context_data(**kwargs)
+        
+        stats = get_ingest_job_stats()
+        
+        context_data.update({
+            "ingest_stats": {
+                **stats,
+                "avg_wait_time": format_duration(stats.get("avg_wait_time")),
+                "avg_duration": format_duration(stats.get("avg_duration")),
+                "max_duration": format_duration(stats.get("max_duration")),
+            },
+        })
+        
+        return context_data
+
+
+class IngestJobModelAdmin(BaseModelAdmin, ModelAdminCanHide):
+    model = IngestJob
+    menu_label = _("Ingest Jobs")
+    menu_icon = "upload"
+    exclude_from_explorer = True
+    
+    list_display = ("__str__", "layer", "status", "attempts", "created", "wait", "run_time")
+    list_filter = ("status", "layer")
+    search_fields = ("file_path",)
+    inspect_view_enabled = True
+    index_template_name = "geomanager/modeladmin/ingest_job_index.html"
+    
+    index_view_class = IngestJobIndexView
+    
+    def wait(self, obj):
+        return format_duration(obj.wait_time)
+    
+    def run_time(self, obj):
+        return format_duration(obj.duration)
+    
+    wait.short_description = _("Wait")
+    run_time.short_description = _("Run time")
@@ -1,6 +1,9 @@
 from functools import wraps
 
 from django.utils.cache import patch_cache_control
+from wagtailcache.cache import cache_page
+
+from geomanager.utils.cache_namespace import CACHE_NAMESPACE_PARAM, get_cache_namespaces_token
 
 
 def revalidate_cache(view_func):
@@ -21,3 +24,43 @@ def revalidate_cache(view_func):
         return response
 
     return _wrapped_view_func
+
+
+def namespaced_cache_page(get_namespaces):
+    """
+    Decorator that caches a view like wagtailcache's cache_page, with the current version of the cache
+    namespaces returned by get_namespaces(request, *args, **kwargs) added to the cache key.
+
+    Bumping one of the namespaces with bump_cache_namespaces makes all the cached responses in it stale,
+    without clearing the rest of the cache.
+    """
+
+    def decorator(view_func):
+        cached_view_func = cache_page(view_func)
+
+        @wraps(view_func)
+        def _wrapped_view_func(request, *args, **kwargs):
+            namespaces = get_namespaces(request, *args, **kwargs)
+            if not namespaces:
+                return cached_view_func(request, *args, **kwargs)
+
+            # the cache key is computed from the full url, so add the namespaces token to the query string.
+            # wagtailcache may rebuild the query string from request.GET, so add it there too
+            query_string = request.META.get("QUERY_STRING", "")
+            query_params = request.GET
+
+            versioned_query_params = query_params.copy()
+            versioned_query_params[CACHE_NAMESPACE_PARAM] = get_cache_namespaces_token(namespaces)
+
+            request.GET = versioned_query_params
+            request.META["QUERY_STRING"] = versioned_query_params.urlencode()
+
+            try:
+                return cached_view_func(request, *args, **kwargs)
+            finally:
+                request.GET = query_params
+                request.META["QUERY_STRING"] = query_string
+
+        return _wrapped_view_func
+
+    return decorator
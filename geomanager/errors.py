@@ -68,6 +68,10 @@ class RasterFileNotFound(Error):
     pass
 
 
+class DataCubeGridMismatch(Error):
+    pass
+
+
 class GeostoreNotFound(Error):
     pass
 
@@ -76,6 +80,14 @@ class QueryParamRequired(Error):
     pass
 
 
+class InvalidPoints(Error):
+    pass
+
+
+class UnsupportedExportFormat(Error):
+    pass
+
+
 class InvalidGeomType(Error):
     pass
 
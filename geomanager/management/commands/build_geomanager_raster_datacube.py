@@ -0,0 +1,48 @@
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+from django_large_image.utilities import field_file_to_local_path
+
+from geomanager.models import RasterFileLayer
+from geomanager.utils.datacube import RasterDataCube
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Build the datacube of a raster file layer from its raster files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('layer_id', type=str, help="Layer ID")
+        parser.add_argument('--rebuild', action='store_true', default=False,
+                            help='Remove the existing datacube and build it again')
+
+    def handle(self, *args, **options):
+        layer = RasterFileLayer.objects.filter(pk=options['layer_id']).first()
+
+        if not layer:
+            raise CommandError(f"Raster file layer with id: {options['layer_id']} does not exist")
+
+        if layer.storage_mode != "datacube":
+            raise CommandError(f"Raster file layer: {layer} does not use the datacube storage mode")
+
+        cube = RasterDataCube.for_layer(layer.pk)
+
+        if options['rebuild']:
+            cube.remove()
+
+        raster_files = layer.raster_files.all().order_by("time")
+
+        logger.info(f"[GEOMANAGER_DATACUBE]: Writing {raster_files.count()} raster files to {cube.path}")
+
+        written = failed = 0
+
+        for raster_file in raster_files.iterator():
+            try:
+                cube.write_timestep(raster_file.time, field_file_to_local_path(raster_file.file))
+                written += 1
+            except Exception as e:
+                failed += 1
+                logger.error(f"[GEOMANAGER_DATACUBE]: Error writing {raster_file} to datacube: {e}")
+
+        logger.info(f"[GEOMANAGER_DATACUBE]: Done. Written: {written}, failed: {failed}")
@@ -0,0 +1,50 @@
+import logging
+
+from adminboundarymanager.models import AdminBoundary
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q
+
+from geomanager.models import LayerRasterFile
+from geomanager.settings import geomanager_settings
+from geomanager.utils.admin_stats import compute_raster_file_admin_stats
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Compute the admin boundary zonal statistics of raster files. By default, only the raster files ' \
+           'missing the stats of a configured level are computed, e.g. after a background computation was lost'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--layer', type=str, dest='layer_id', help='Only compute stats for this layer')
+        parser.add_argument('--all', action='store_true', default=False,
+                            help='Compute stats for all raster files, including those that already have them')
+
+    def handle(self, *args, **options):
+        raster_files = LayerRasterFile.objects.all()
+
+        if options['layer_id']:
+            raster_files = raster_files.filter(layer_id=options['layer_id'])
+
+        if not options['all']:
+            # files without stats, or with the stats of only some of the levels that have boundaries
+            levels = list(AdminBoundary.objects.filter(level__in=geomanager_settings.get("raster_admin_stats_levels"))
+                          .order_by().values_list("level", flat=True).distinct())
+            raster_files = raster_files.annotate(
+                stats_levels=Count("admin_boundary_stats__level", distinct=True,
+                                   filter=Q(admin_boundary_stats__level__in=levels))
+            ).filter(stats_levels__lt=len(levels))
+
+        computed = failed = 0
+
+        for raster_file in raster_files.distinct().iterator():
+            try:
+                compute_raster_file_admin_stats(raster_file)
+            except Exception as e:
+                failed += 1
+                logger.error(f"[GEOMANAGER_ADMIN_STATS]: Error computing admin stats for {raster_file}: {e}")
+                continue
+
+            computed += 1
+
+        logger.info(f"[GEOMANAGER_ADMIN_STATS]: Done. Computed: {computed}, failed: {failed}")
@@ -0,0 +1,58 @@
+import logging
+import signal
+
+from django.core.management.base import BaseCommand
+
+from geomanager.settings import geomanager_settings
+from geomanager.utils.ingest import IngestException
+from geomanager.utils.ingest_daemon import IngestDaemon
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Watch the auto ingest raster data directory and ingest new raster files, in one long running process'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, help='Number of files ingested at the same time. '
+                                                        'Defaults to GEOMANAGER_AUTO_INGEST_DAEMON_WORKERS')
+        parser.add_argument('--settle', type=float, dest='settle_seconds',
+                            help='Seconds a file must stay unchanged before it is ingested. '
+                                 'Defaults to GEOMANAGER_AUTO_INGEST_SETTLE_SECONDS')
+        parser.add_argument('--poll-interval', type=float, dest='poll_interval',
+                            help='Seconds between checks. Defaults to GEOMANAGER_AUTO_INGEST_POLL_INTERVAL')
+        parser.add_argument('--polling', action='store_true', default=False,
+                            help='Poll the directory instead of using file system events')
+        parser.add_argument('--scan-existing', action='store_true', default=False, dest='scan_existing',
+                            help='Also ingest the files already in the directory at startup')
+        parser.add_argument('--queue', action='store_true', default=False, dest='queue_jobs',
+                            help='Add files to the ingest job queue instead of ingesting them in this process')
+        parser.add_argument('--overwrite', action='store_true', default=False, help='Overwrite existing raster file')
+        parser.add_argument('--clip', action='store_true', default=False, help='Clip raster to county boundary')
+
+    def handle(self, *args, **options):
+        auto_ingest_raster_data_dir = geomanager_settings.get("auto_ingest_raster_data_dir", None)
+
+        if not auto_ingest_raster_data_dir:
+            logger.error("[GEOMANAGER_AUTO_INGEST]: Auto ingest raster data directory not configured.")
+            return
+
+        daemon = IngestDaemon(
+            auto_ingest_raster_data_dir,
+            workers=options['workers'],
+            settle_seconds=options['settle_seconds'],
+            poll_interval=options['poll_interval'],
+            overwrite=options['overwrite'],
+            clip=options['clip'],
+            polling=options['polling'],
+            scan_existing=options['scan_existing'],
+            queue_jobs=options['queue_jobs'],
+        )
+
+        signal.signal(signal.SIGTERM, daemon.stop)
+        signal.signal(signal.SIGINT, daemon.stop)
+
+        try:
+            daemon.run()
+        except IngestException as e:
+            logger.error(f'[GEOMANAGER_AUTO_INGEST]: {e.message}')
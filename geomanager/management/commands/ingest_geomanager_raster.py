@@ -3,6 +3,7 @@ import logging
 from django.core.management.base import BaseCommand
 
 from geomanager.utils.ingest import ingest_raster_file
+from geomanager.utils.ingest_jobs import enqueue_ingest_job
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +19,8 @@ class Command(BaseCommand):
         parser.add_argument('--dst', type=str, help='File destination path for moved events')
         parser.add_argument('--overwrite', action='store_true', default=False, help='Overwrite existing raster file')
         parser.add_argument('--clip', action='store_true', default=False, help='Clip raster to county boundary')
+        parser.add_argument('--queue', action='store_true', default=False,
+                            help='Add the file to the ingest job queue instead of ingesting it now')
 
     def handle(self, *args, **options):
         event_type = options['event_type']
@@ -39,6 +42,11 @@ class Command(BaseCommand):
         if event_type == "moved" and dst_path is not None:
             src_path = dst_path
 
+        if options['queue']:
+            job = enqueue_ingest_job(src_path, overwrite, clip)
+            logger.info(f'[GEOMANAGER_AUTO_INGEST]: {src_path} queued as job {job.pk}')
+            return
+
         ingest_raster_file(src_path, overwrite, clip)
 
         logger.info(f'[GEOMANAGER_AUTO_INGEST]: {src_path} done...')
@@ -1,11 +1,14 @@
 import glob
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 from django.core.management.base import BaseCommand
+from django.db import close_old_connections
 
 from geomanager.settings import geomanager_settings
-from geomanager.utils.ingest import is_valid_uuid, ingest_raster_file
+from geomanager.utils.ingest import is_valid_uuid, ingest_raster_file, get_raster_file_layer_for_path, IngestException
+from geomanager.utils.ingest_manifest import IngestManifest
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +17,33 @@ ALLOWED_FILE_EVENTS = ["created", "moved"]
 RASTER_FILE_EXTENSIONS = ['.tif', '.nc', ]
 
 
+def process_file(file, overwrite, clip):
+    """
+    Ingests a file, which is added to the manifest if all its timesteps were ingested.
+    Returns True if the file was ingested.
+    """
+    close_old_connections()
+    try:
+        logger.info(f'[GEOMANAGER_AUTO_INGEST]: Processing file: {file}')
+
+        failures = ingest_raster_file(file, overwrite, clip)
+
+        if failures:
+            logger.warning(f'[GEOMANAGER_AUTO_INGEST]: {file} not added to the manifest, '
+                           f'{len(failures)} timestep(s) failed')
+
+        logger.info(f'[GEOMANAGER_AUTO_INGEST]: {file} done...')
+        return True
+    except IngestException as e:
+        logger.error(f'[GEOMANAGER_AUTO_INGEST]: {e.message}')
+    except Exception as e:
+        logger.exception(f'[GEOMANAGER_AUTO_INGEST]: Error processing file: {file}: {e}')
+    finally:
+        close_old_connections()
+
+    return False
+
+
 class Command(BaseCommand):
     help = 'Process a raster file layer directory'
 
@@ -21,11 +51,15 @@ class Command(BaseCommand):
         parser.add_argument('layer_id', type=str, help="Layer ID")
         parser.add_argument('--overwrite', action='store_true', default=False, help='Overwrite existing raster file')
         parser.add_argument('--clip', action='store_true', default=False, help='Clip raster to county boundary')
+        parser.add_argument('--workers', type=int, default=1, help='Number of files processed at the same time')
+        parser.add_argument('--rescan', action='store_true', default=False,
+                            help='Process all files, including those already ingested according to the manifest')
 
     def handle(self, *args, **options):
         layer_id = options['layer_id']
         overwrite = options['overwrite']
         clip = options['clip']
+        workers = max(1, options['workers'])
 
         auto_ingest_raster_data_dir = geomanager_settings.get("auto_ingest_raster_data_dir", None)
 
@@ -41,14 +75,41 @@ class Command(BaseCommand):
             logger.error(f"[GEOMANAGER_AUTO_INGEST]: Directory: {directory} does not exist.")
             return
 
+        files = []
         for ext in RASTER_FILE_EXTENSIONS:
-            files = glob.glob(directory + f"/*{ext}")
+            ext_files = glob.glob(directory + f"/*{ext}")
 
-            if not files:
+            if not ext_files:
                 logger.warning(
                     f"[GEOMANAGER_AUTO_INGEST]: No files found in directory: {directory} with extension: {ext}")
 
-            for file in files:
-                logger.info(f'[GEOMANAGER_AUTO_INGEST]: Processing file: {file}')
-                ingest_raster_file(file, overwrite, clip)
-                logger.info(f'[GEOMANAGER_AUTO_INGEST]: {file} done...')
+            files.extend(sorted(ext_files))
+
+        if not files:
+            return
+
+        # all files of the directory belong to the same layer
+        try:
+            layer = get_raster_file_layer_for_path(files[0])
+        except IngestException as e:
+            logger.error(f'[GEOMANAGER_AUTO_INGEST]: {e.message}')
+            return
+
+        manifest = IngestManifest(layer)
+
+        # overwrite re-ingests every file, so the manifest is only used to skip files without it
+        if not overwrite and not options['rescan']:
+            pending = [file for file in files if not manifest.is_unchanged(file)]
+        else:
+            pending = files
+
+        logger.info(f'[GEOMANAGER_AUTO_INGEST]: {len(files) - len(pending)} of {len(files)} files already ingested, '
+                    f'processing {len(pending)} with {workers} worker(s)')
+
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(lambda file: process_file(file, overwrite, clip), pending))
+        else:
+            results = [process_file(file, overwrite, clip) for file in pending]
+
+        logger.info(f'[GEOMANAGER_AUTO_INGEST]: Done. {sum(results)} of {len(pending)} files processed')
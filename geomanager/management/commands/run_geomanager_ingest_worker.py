@@ -0,0 +1,44 @@
+import logging
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from geomanager.utils.ingest_jobs import run_ingest_worker
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Run queued raster ingest jobs. Several workers can run at the same time, on one or more nodes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help='Number of jobs run at the same time')
+        parser.add_argument('--poll-interval', type=float, default=5, dest='poll_interval',
+                            help='Seconds to wait before checking for jobs again when the queue is empty')
+        parser.add_argument('--once', action='store_true', default=False,
+                            help='Exit once there are no jobs left to run')
+
+    def handle(self, *args, **options):
+        stop_event = threading.Event()
+
+        def stop(*args):
+            logger.info('[GEOMANAGER_INGEST_JOBS]: Stopping, waiting for running jobs to finish...')
+            stop_event.set()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        threads = [threading.Thread(target=run_ingest_worker, name=f"geomanager-ingest-worker-{i}",
+                                    args=(stop_event, options['poll_interval'], options['once']))
+                   for i in range(max(1, options['workers']))]
+
+        logger.info(f'[GEOMANAGER_INGEST_JOBS]: Starting {len(threads)} ingest worker(s)')
+
+        for thread in threads:
+            thread.start()
+
+        # join with a timeout, so that the main thread keeps handling signals
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=1)
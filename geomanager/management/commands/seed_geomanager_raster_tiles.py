@@ -0,0 +1,144 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+import mercantile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django_large_image.utilities import field_file_to_local_path
+from large_image.exceptions import TileSourceXYZRangeError
+
+from geomanager.models import RasterFileLayer
+from geomanager.utils.raster_utils import (
+    render_raster_tile,
+    get_layer_style_json,
+    get_layer_style_key,
+    get_raster_file_wgs84_bounds,
+    raster_tile_has_data
+)
+from geomanager.utils.tile_store import raster_tile_store
+
+logger = logging.getLogger(__name__)
+
+# latitude limits of the web mercator projection
+MAX_LATITUDE = 85.0511287798066
+
+
+def seed_raster_tile(file_path, tag, layer_id, time, style_key, fmt, z, x, y, style=None, compiled_style=None,
+                     nodata=None, overwrite=False):
+    if not overwrite and raster_tile_store.exists(layer_id, time, style_key, fmt, z, x, y):
+        return False
+
+    try:
+        tile_binary, mime_type = render_raster_tile(file_path, x, y, z, tag=tag, fmt=fmt, projection="EPSG:3857",
+                                                    style=style, compiled_style=compiled_style, nodata=nodata)
+    except TileSourceXYZRangeError:
+        return False
+
+    raster_tile_store.put(layer_id, time, style_key, fmt, z, x, y, tile_binary)
+
+    return True
+
+
+class Command(BaseCommand):
+    help = 'Pre-render raster tiles for a raster file layer into the tile store'
+
+    def add_arguments(self, parser):
+        parser.add_argument('layer_id', type=str, help="Layer ID")
+        parser.add_argument('--minzoom', type=int, default=0, help='Minimum zoom level to render')
+        parser.add_argument('--maxzoom', type=int, default=6, help='Maximum zoom level to render')
+        parser.add_argument('--time', type=str, action='append', dest='times',
+                            help='Time of the raster file to render. Can be repeated. Defaults to all files')
+        parser.add_argument('--latest', action='store_true', default=False,
+                            help='Only render the latest raster file')
+        parser.add_argument('--format', type=str, default='png', help='Tile format')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Number of worker processes')
+        parser.add_argument('--overwrite', action='store_true', default=False, help='Re-render existing tiles')
+
+    def handle(self, *args, **options):
+        layer_id = options['layer_id']
+        minzoom = options['minzoom']
+        maxzoom = options['maxzoom']
+        times = options['times']
+        fmt = options['format']
+        workers = max(1, options['workers'])
+        overwrite = options['overwrite']
+
+        if minzoom > maxzoom:
+            raise CommandError("minzoom must be less than or equal to maxzoom")
+
+        layer = RasterFileLayer.objects.filter(pk=layer_id).first()
+
+        if not layer:
+            raise CommandError(f"Raster file layer with id: {layer_id} does not exist")
+
+        raster_files = layer.raster_files.all().order_by("-time")
+
+        if times:
+            raster_files = raster_files.filter(time__in=times)
+
+        if options['latest']:
+            raster_files = raster_files[:1]
+
+        style_key = get_layer_style_key(layer)
+        compiled_style = layer.style.get_compiled_style() if layer.style else None
+
+        jobs = []
+
+        for raster_file in raster_files:
+            file_path = str(field_file_to_local_path(raster_file.file))
+            style = get_layer_style_json(raster_file) if fmt != "png" else None
+            nodata = raster_file.grid.nodata
+
+            west, south, east, north = get_raster_file_wgs84_bounds(file_path)
+            south = max(south, -MAX_LATITUDE)
+            north = min(north, MAX_LATITUDE)
+
+            for tile in mercantile.tiles(west, south, east, north, zooms=range(minzoom, maxzoom + 1)):
+                # empty tiles are answered without rendering, no need to store them
+                if not raster_tile_has_data(raster_file, tile.z, tile.x, tile.y):
+                    continue
+
+                jobs.append({
+                    "file_path": file_path,
+                    "tag": raster_file.file.name,
+                    "layer_id": layer.pk,
+                    "time": raster_file.time,
+                    "style_key": style_key,
+                    "fmt": fmt,
+                    "z": tile.z,
+                    "x": tile.x,
+                    "y": tile.y,
+                    "style": style,
+                    "compiled_style": compiled_style,
+                    "nodata": nodata,
+                    "overwrite": overwrite,
+                })
+
+        if not jobs:
+            logger.warning(f"[GEOMANAGER_TILE_SEED]: No tiles to render for layer: {layer}")
+            return
+
+        logger.info(f"[GEOMANAGER_TILE_SEED]: Rendering {len(jobs)} tiles for layer: {layer} "
+                    f"using {workers} worker(s)...")
+
+        # do not share open database connections with the worker processes
+        connections.close_all()
+
+        rendered = skipped = failed = 0
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as executor:
+            futures = [executor.submit(seed_raster_tile, **job) for job in jobs]
+
+            for future in as_completed(futures):
+                try:
+                    if future.result():
+                        rendered += 1
+                    else:
+                        skipped += 1
+                except Exception as e:
+                    failed += 1
+                    logger.error(f"[GEOMANAGER_TILE_SEED]: Error rendering tile: {e}")
+
+        logger.info(f"[GEOMANAGER_TILE_SEED]: Done. Rendered: {rendered}, skipped: {skipped}, failed: {failed}")
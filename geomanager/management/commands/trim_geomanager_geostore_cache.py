@@ -0,0 +1,38 @@
+import logging
+
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+
+from geomanager.utils.geostore_cache import geostore_clip_cache
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Report the disk usage of raster files clipped to geostores, and trim it to the configured budget'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--report', action='store_true', default=False,
+                            help='Only report the usage, without removing any files')
+        parser.add_argument('--max-bytes', type=int, dest='max_bytes',
+                            help='Trim to this size instead of GEOMANAGER_GEOSTORE_CLIP_CACHE_MAX_BYTES')
+        parser.add_argument('--clear', action='store_true', default=False, help='Remove all clipped files')
+
+    def handle(self, *args, **options):
+        size, count = geostore_clip_cache.get_usage()
+        max_bytes = options['max_bytes'] if options['max_bytes'] is not None else geostore_clip_cache.max_bytes
+
+        logger.info(f"[GEOSTORE_CACHE]: {count} clipped files, {filesizeformat(size)} "
+                    f"of {filesizeformat(max_bytes)} in {geostore_clip_cache.root}")
+
+        if options['report']:
+            return
+
+        if options['clear']:
+            removed_bytes, removed_files = geostore_clip_cache.clear()
+        elif size > max_bytes:
+            removed_bytes, removed_files = geostore_clip_cache.trim(max_bytes=max_bytes)
+        else:
+            removed_bytes = removed_files = 0
+
+        logger.info(f"[GEOSTORE_CACHE]: Done. Removed {removed_files} files, {filesizeformat(removed_bytes)}")
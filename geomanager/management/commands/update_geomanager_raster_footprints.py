@@ -0,0 +1,43 @@
+import logging
+
+from django.core.management.base import BaseCommand
+from django_large_image.utilities import field_file_to_local_path
+
+from geomanager.models import LayerRasterFile
+from geomanager.utils.raster_utils import get_raster_footprint
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Compute the footprint and data mask of raster files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--layer', type=str, dest='layer_id', help='Only update raster files for this layer')
+        parser.add_argument('--all', action='store_true', default=False,
+                            help='Update all raster files, including those that already have a footprint')
+
+    def handle(self, *args, **options):
+        raster_files = LayerRasterFile.objects.all()
+
+        if options['layer_id']:
+            raster_files = raster_files.filter(layer_id=options['layer_id'])
+
+        if not options['all']:
+            raster_files = raster_files.filter(footprint__isnull=True)
+
+        updated = failed = 0
+
+        for raster_file in raster_files.iterator():
+            try:
+                footprint, data_mask = get_raster_footprint(field_file_to_local_path(raster_file.file))
+            except Exception as e:
+                failed += 1
+                logger.error(f"[GEOMANAGER_FOOTPRINT]: Error computing footprint for {raster_file}: {e}")
+                continue
+
+            # update directly, without triggering the post_save receivers that invalidate cached tiles
+            LayerRasterFile.objects.filter(pk=raster_file.pk).update(footprint=footprint, data_mask=data_mask)
+            updated += 1
+
+        logger.info(f"[GEOMANAGER_FOOTPRINT]: Done. Updated: {updated}, failed: {failed}")
@@ -0,0 +1,45 @@
+import logging
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django_large_image.utilities import field_file_to_local_path
+
+from geomanager.models import LayerRasterFile
+from geomanager.utils.raster_grid import RasterGrid, RASTER_GRID_METADATA_KEY, save_raster_file_grid
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Store the grid of raster files ingested before it was stored in their metadata'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--layer', type=str, dest='layer_id', help='Only update raster files for this layer')
+        parser.add_argument('--all', action='store_true', default=False,
+                            help='Update all raster files, including those that already have a grid')
+
+    def handle(self, *args, **options):
+        raster_files = LayerRasterFile.objects.all()
+
+        if options['layer_id']:
+            raster_files = raster_files.filter(layer_id=options['layer_id'])
+
+        if not options['all']:
+            raster_files = raster_files.filter(
+                Q(raster_metadata__isnull=True) | ~Q(raster_metadata__has_key=RASTER_GRID_METADATA_KEY))
+
+        updated = failed = 0
+
+        for raster_file in raster_files.iterator():
+            try:
+                grid = RasterGrid.from_file(field_file_to_local_path(raster_file.file))
+            except Exception as e:
+                failed += 1
+                logger.error(f"[GEOMANAGER_RASTER_GRID]: Error reading grid for {raster_file}: {e}")
+                continue
+
+            # updated directly, without triggering the post_save receivers that invalidate cached tiles
+            save_raster_file_grid(raster_file, grid)
+            updated += 1
+
+        logger.info(f"[GEOMANAGER_RASTER_GRID]: Done. Updated: {updated}, failed: {failed}")
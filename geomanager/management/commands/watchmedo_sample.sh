@@ -1,3 +1,5 @@
+# Runs a new manage.py process for every file event. For bursts of files, prefer the long running
+# `python manage.py geomanager_ingest_daemon` command, which debounces events and ingests with a bounded pool.
 watchmedo shell-command --patterns="*.nc;*.tif" --ignore-directories --recursive \
   --command='python manage.py ingest_geomanager_raster "${watch_event_type}" "${watch_src_path}" --dst "${watch_dest_path}" --overwrite' \
   /path/to/direcory/to/watch
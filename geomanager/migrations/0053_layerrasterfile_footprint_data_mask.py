@@ -0,0 +1,24 @@
+# Generated by Django 4.2.18 on 2026-10-17 09:12
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geomanager', '0052_remove_rasterstyle_rendering_engine'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='layerrasterfile',
+            name='footprint',
+            field=django.contrib.gis.db.models.fields.PolygonField(blank=True, help_text='Bounding box of the raster data, in EPSG:4326', null=True, srid=4326, verbose_name='footprint'),
+        ),
+        migrations.AddField(
+            model_name='layerrasterfile',
+            name='data_mask',
+            field=models.JSONField(blank=True, help_text='Coarse grid marking the areas of the raster that have data', null=True, verbose_name='data mask'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.18 on 2026-10-17 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geomanager', '0053_layerrasterfile_footprint_data_mask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rasterfilelayer',
+            name='storage_mode',
+            field=models.CharField(choices=[('files', 'Raster files'), ('datacube', 'Raster files and datacube')], default='files', help_text='Raster files and datacube also keeps all timesteps in one chunked file, for faster point and area timeseries', max_length=20, verbose_name='Storage mode'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.18 on 2026-10-17 12:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geomanager', '0054_rasterfilelayer_storage_mode'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RasterPixelTimeseries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grid', models.CharField(help_text='Hash of the transform and size of the raster grid', max_length=32, verbose_name='grid')),
+                ('row', models.IntegerField(verbose_name='row')),
+                ('col', models.IntegerField(verbose_name='col')),
+                ('values', models.JSONField(default=dict, verbose_name='values')),
+                ('last_accessed', models.DateTimeField(verbose_name='last accessed')),
+                ('layer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pixel_timeseries', to='geomanager.rasterfilelayer', verbose_name='layer')),
+            ],
+            options={
+                'verbose_name': 'Raster Pixel Timeseries',
+                'verbose_name_plural': 'Raster Pixel Timeseries',
+                'unique_together': {('layer', 'grid', 'row', 'col')},
+                'indexes': [models.Index(fields=['layer', 'last_accessed'], name='geomanager_pxts_accessed_idx')],
+            },
+        ),
+    ]
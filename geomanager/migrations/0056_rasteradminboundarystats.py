@@ -0,0 +1,37 @@
+# Generated by Django 4.2.18 on 2026-10-17 14:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geomanager', '0055_rasterpixeltimeseries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RasterAdminBoundaryStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('time', models.DateTimeField(verbose_name='time')),
+                ('level', models.PositiveSmallIntegerField(verbose_name='level')),
+                ('gid', models.CharField(max_length=100, verbose_name='gid')),
+                ('boundary_id', models.IntegerField(verbose_name='boundary id')),
+                ('count', models.IntegerField(default=0, verbose_name='count')),
+                ('mean', models.FloatField(blank=True, null=True, verbose_name='mean')),
+                ('min', models.FloatField(blank=True, null=True, verbose_name='min')),
+                ('max', models.FloatField(blank=True, null=True, verbose_name='max')),
+                ('sum', models.FloatField(blank=True, null=True, verbose_name='sum')),
+                ('layer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='admin_boundary_stats', to='geomanager.rasterfilelayer', verbose_name='layer')),
+                ('raster_file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='admin_boundary_stats', to='geomanager.layerrasterfile', verbose_name='raster file')),
+            ],
+            options={
+                'verbose_name': 'Raster Admin Boundary Stats',
+                'verbose_name_plural': 'Raster Admin Boundary Stats',
+                'unique_together': {('layer', 'time', 'level', 'gid')},
+                'indexes': [models.Index(fields=['raster_file', 'level'], name='geomanager_adminstats_file_idx')],
+            },
+        ),
+    ]
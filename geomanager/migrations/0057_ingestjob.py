@@ -0,0 +1,41 @@
+# Generated by Django 4.2.18 on 2026-10-17 16:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geomanager', '0056_rasteradminboundarystats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_path', models.CharField(max_length=1024, verbose_name='file path')),
+                ('overwrite', models.BooleanField(default=False, verbose_name='overwrite')),
+                ('clip', models.BooleanField(default=False, verbose_name='clip to boundary')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='pending', max_length=20, verbose_name='status')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='attempts')),
+                ('max_attempts', models.PositiveIntegerField(default=3, verbose_name='max attempts')),
+                ('error', models.TextField(blank=True, null=True, verbose_name='error')),
+                ('failed_timesteps', models.JSONField(blank=True, default=dict, help_text='Time to error message, for the timesteps that failed', verbose_name='failed timesteps')),
+                ('worker', models.CharField(blank=True, max_length=255, null=True, verbose_name='worker')),
+                ('created', models.DateTimeField(default=django.utils.timezone.now, verbose_name='created')),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, verbose_name='run after')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='started at')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='finished at')),
+                ('layer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ingest_jobs', to='geomanager.rasterfilelayer', verbose_name='layer')),
+            ],
+            options={
+                'verbose_name': 'Ingest Job',
+                'verbose_name_plural': 'Ingest Jobs',
+                'ordering': ['-created'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='geomanager_ingestjob_claim_idx'), models.Index(fields=['layer', 'status'], name='geomanager_ingestjob_layer_idx')],
+            },
+        ),
+    ]
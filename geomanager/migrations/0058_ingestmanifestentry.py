@@ -0,0 +1,31 @@
+# Generated by Django 4.2.18 on 2026-10-17 17:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geomanager', '0057_ingestjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestManifestEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=1024, verbose_name='path')),
+                ('size', models.BigIntegerField(verbose_name='size')),
+                ('mtime_ns', models.BigIntegerField(help_text='In nanoseconds', verbose_name='modified time')),
+                ('content_hash', models.CharField(help_text='SHA-256', max_length=64, verbose_name='content hash')),
+                ('ingested_at', models.DateTimeField(auto_now=True, verbose_name='ingested at')),
+                ('layer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ingest_manifest', to='geomanager.rasterfilelayer', verbose_name='layer')),
+            ],
+            options={
+                'verbose_name': 'Ingest Manifest Entry',
+                'verbose_name_plural': 'Ingest Manifest Entries',
+                'unique_together': {('layer', 'path')},
+            },
+        ),
+    ]
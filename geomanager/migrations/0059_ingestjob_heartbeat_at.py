@@ -0,0 +1,18 @@
+# Generated by Django 4.2.18 on 2026-10-17 19:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geomanager', '0058_ingestmanifestentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingestjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='Last time the worker running the job reported it as alive', null=True, verbose_name='heartbeat at'),
+        ),
+    ]
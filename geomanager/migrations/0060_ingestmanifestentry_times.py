@@ -0,0 +1,23 @@
+# Generated by Django 4.2.18 on 2026-10-17 19:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geomanager', '0059_ingestjob_heartbeat_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ingestmanifestentry',
+            name='content_hash',
+            field=models.CharField(blank=True, help_text='SHA-256', max_length=64, null=True, verbose_name='content hash'),
+        ),
+        migrations.AddField(
+            model_name='ingestmanifestentry',
+            name='times',
+            field=models.JSONField(blank=True, default=list, verbose_name='times'),
+        ),
+    ]
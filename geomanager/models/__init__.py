@@ -1,12 +1,26 @@
 import logging
 
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
 from wagtailcache.cache import clear_cache
 
+from geomanager.utils.cache_namespace import (
+    bump_cache_namespaces,
+    layer_cache_namespace,
+    table_cache_namespace,
+    mbt_source_cache_namespace
+)
+
+from .admin_stats import *
 from .aoi import *
 from .boundary import *
 from .core import *
 from .geomanager_settings import *
 from .geostore import *
+from .ingest_job import *
+from .ingest_manifest import *
+from .pixel_timeseries import *
 from .profile import *
 from .raster_file import *
 from .raster_tile import *
@@ -19,20 +33,61 @@ from .raster_style import *
 logger = logging.getLogger(__name__)
 
 
-# clear wagtail cache on saving the following models
+# clear wagtail cache on saving the following catalog models
 @receiver(post_save, sender=Category)
 @receiver(post_save, sender=SubCategory)
-@receiver(post_save, sender=Dataset)
 @receiver(post_save, sender=Metadata)
 @receiver(post_save, sender=GeomanagerSettings)
-@receiver(post_save, sender=RasterFileLayer)
-@receiver(post_save, sender=LayerRasterFile)
-@receiver(post_save, sender=RasterStyle)
 @receiver(post_save, sender=WmsLayer)
-@receiver(post_save, sender=MBTSource)
-@receiver(post_save, sender=VectorFileLayer)
-@receiver(post_save, sender=PgVectorTable)
 @receiver(post_save, sender=AdditionalMapBoundaryData)
 def handle_clear_wagtail_cache(sender, **kwargs):
     logging.info("[WAGTAIL_CACHE]: Clearing cache")
     clear_cache()
+
+
+# changes to datasets, layers and their data only invalidate the cached responses of the affected layers or tables
+@receiver(post_save, sender=Dataset)
+def bump_dataset_cache_namespaces(sender, instance, **kwargs):
+    namespaces = [layer_cache_namespace(layer_id) for layer_id in
+                  instance.raster_file_layers.values_list("pk", flat=True)]
+    namespaces += [table_cache_namespace(table_name) for table_name in
+                   PgVectorTable.objects.filter(layer__dataset=instance).values_list("table_name", flat=True)]
+    bump_cache_namespaces(*namespaces)
+
+
+@receiver(post_save, sender=RasterFileLayer)
+@receiver(post_delete, sender=RasterFileLayer)
+def bump_raster_layer_cache_namespace(sender, instance, **kwargs):
+    bump_cache_namespaces(layer_cache_namespace(instance.pk))
+
+
+@receiver(post_save, sender=LayerRasterFile)
+@receiver(post_delete, sender=LayerRasterFile)
+def bump_raster_file_cache_namespace(sender, instance, **kwargs):
+    namespace = layer_cache_namespace(instance.layer_id)
+    transaction.on_commit(lambda: bump_cache_namespaces(namespace))
+
+
+@receiver(post_save, sender=RasterStyle)
+@receiver(pre_delete, sender=RasterStyle)
+def bump_raster_style_cache_namespaces(sender, instance, **kwargs):
+    layer_ids = RasterFileLayer.objects.filter(style=instance).values_list("pk", flat=True)
+    bump_cache_namespaces(*[layer_cache_namespace(layer_id) for layer_id in layer_ids])
+
+
+@receiver(post_save, sender=VectorFileLayer)
+def bump_vector_layer_cache_namespaces(sender, instance, **kwargs):
+    table_names = instance.vector_tables.values_list("table_name", flat=True)
+    bump_cache_namespaces(*[table_cache_namespace(table_name) for table_name in table_names])
+
+
+@receiver(post_save, sender=PgVectorTable)
+@receiver(post_delete, sender=PgVectorTable)
+def bump_vector_table_cache_namespace(sender, instance, **kwargs):
+    bump_cache_namespaces(table_cache_namespace(instance.table_name))
+
+
+@receiver(post_save, sender=MBTSource)
+@receiver(post_delete, sender=MBTSource)
+def bump_mbt_source_cache_namespace(sender, instance, **kwargs):
+    bump_cache_namespaces(mbt_source_cache_namespace(instance.slug))
@@ -0,0 +1,40 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from geomanager.models.raster_file import RasterFileLayer, LayerRasterFile
+from geomanager.utils.zonal_stats import format_zonal_stats
+
+
+class RasterAdminBoundaryStats(models.Model):
+    """
+    Zonal statistics of a raster file for an admin boundary unit, computed in the background after ingest.
+    The unit is identified by its level and gid, e.g. (1, 'KEN.1_1'), and boundary_id is the id of the
+    AdminBoundary row, used to join the stats to the boundary geometries.
+    """
+    layer = models.ForeignKey(RasterFileLayer, on_delete=models.CASCADE, related_name="admin_boundary_stats",
+                              verbose_name=_("layer"))
+    raster_file = models.ForeignKey(LayerRasterFile, on_delete=models.CASCADE, related_name="admin_boundary_stats",
+                                    verbose_name=_("raster file"))
+    time = models.DateTimeField(verbose_name=_("time"))
+    level = models.PositiveSmallIntegerField(verbose_name=_("level"))
+    gid = models.CharField(max_length=100, verbose_name=_("gid"))
+    boundary_id = models.IntegerField(verbose_name=_("boundary id"))
+    count = models.IntegerField(default=0, verbose_name=_("count"))
+    mean = models.FloatField(blank=True, null=True, verbose_name=_("mean"))
+    min = models.FloatField(blank=True, null=True, verbose_name=_("min"))
+    max = models.FloatField(blank=True, null=True, verbose_name=_("max"))
+    sum = models.FloatField(blank=True, null=True, verbose_name=_("sum"))
+
+    class Meta:
+        verbose_name = _("Raster Admin Boundary Stats")
+        verbose_name_plural = _("Raster Admin Boundary Stats")
+        unique_together = ('layer', 'time', 'level', 'gid')
+        indexes = [
+            models.Index(fields=["raster_file", "level"], name="geomanager_adminstats_file_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.layer} - {self.time} - {self.gid}"
+
+    def as_dict(self, value_type=None):
+        return format_zonal_stats(value_type, self.count, self.sum, self.min, self.max)
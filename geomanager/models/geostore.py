@@ -1,8 +1,12 @@
 import uuid
 
 from django.contrib.gis.db import models
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django_extensions.db.models import TimeStampedModel
 
+from geomanager.utils.geostore_cache import geostore_clip_cache
+
 
 class Geostore(TimeStampedModel):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -46,3 +50,8 @@ class Geostore(TimeStampedModel):
             info.update({"id3": self.id3, "name": self.id3})
 
         return info
+
+
+@receiver(post_delete, sender=Geostore)
+def remove_geostore_clips(sender, instance, **kwargs):
+    geostore_clip_cache.remove_for_geostore(instance)
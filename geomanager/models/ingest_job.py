@@ -0,0 +1,74 @@
+import os
+
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from geomanager.models.raster_file import RasterFileLayer
+
+INGEST_JOB_STATUS_CHOICES = (
+    ("pending", _("Pending")),
+    ("running", _("Running")),
+    ("succeeded", _("Succeeded")),
+    ("failed", _("Failed")),
+)
+
+
+class IngestJob(models.Model):
+    """
+    A raster file to ingest, claimed and run by the ingest workers. Pending jobs are claimed once run_after
+    has passed, and failed attempts are retried with backoff until max_attempts is reached.
+    """
+    layer = models.ForeignKey(RasterFileLayer, on_delete=models.CASCADE, blank=True, null=True,
+                              related_name="ingest_jobs", verbose_name=_("layer"))
+    file_path = models.CharField(max_length=1024, verbose_name=_("file path"))
+    overwrite = models.BooleanField(default=False, verbose_name=_("overwrite"))
+    clip = models.BooleanField(default=False, verbose_name=_("clip to boundary"))
+    status = models.CharField(max_length=20, choices=INGEST_JOB_STATUS_CHOICES, default="pending",
+                              verbose_name=_("status"))
+    attempts = models.PositiveIntegerField(default=0, verbose_name=_("attempts"))
+    max_attempts = models.PositiveIntegerField(default=3, verbose_name=_("max attempts"))
+    error = models.TextField(blank=True, null=True, verbose_name=_("error"))
+    failed_timesteps = models.JSONField(default=dict, blank=True, verbose_name=_("failed timesteps"),
+                                        help_text=_("Time to error message, for the timesteps that failed"))
+    worker = models.CharField(max_length=255, blank=True, null=True, verbose_name=_("worker"))
+    created = models.DateTimeField(default=timezone.now, verbose_name=_("created"))
+    run_after = models.DateTimeField(default=timezone.now, verbose_name=_("run after"))
+    started_at = models.DateTimeField(blank=True, null=True, verbose_name=_("started at"))
+    heartbeat_at = models.DateTimeField(blank=True, null=True, verbose_name=_("heartbeat at"),
+                                        help_text=_("Last time the worker running the job reported it as alive"))
+    finished_at = models.DateTimeField(blank=True, null=True, verbose_name=_("finished at"))
+
+    class Meta:
+        verbose_name = _("Ingest Job")
+        verbose_name_plural = _("Ingest Jobs")
+        ordering = ["-created"]
+        indexes = [
+            models.Index(fields=["status", "run_after"], name="geomanager_ingestjob_claim_idx"),
+            models.Index(fields=["layer", "status"], name="geomanager_ingestjob_layer_idx"),
+        ]
+
+    def __str__(self):
+        return self.file_name
+
+    @property
+    def file_name(self):
+        return os.path.basename(self.file_path)
+
+    @property
+    def wait_time(self):
+        """
+        Time from the job creation to the start of its last attempt
+        """
+        if self.started_at:
+            return self.started_at - self.created
+        return None
+
+    @property
+    def duration(self):
+        """
+        Run time of the last attempt
+        """
+        if self.started_at and self.finished_at:
+            return self.finished_at - self.started_at
+        return None
@@ -0,0 +1,37 @@
+from django.db import models
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+
+from geomanager.models.raster_file import RasterFileLayer, LayerRasterFile
+
+
+class IngestManifestEntry(models.Model):
+    """
+    A file of a layer directory that has been ingested, with its size, modified time and content hash,
+    so that processing the directory again skips the files that have not changed. times are the raster file
+    times created from the file, so that the entry is removed when one of them is deleted.
+    """
+    layer = models.ForeignKey(RasterFileLayer, on_delete=models.CASCADE, related_name="ingest_manifest",
+                              verbose_name=_("layer"))
+    path = models.CharField(max_length=1024, verbose_name=_("path"))
+    size = models.BigIntegerField(verbose_name=_("size"))
+    mtime_ns = models.BigIntegerField(verbose_name=_("modified time"), help_text=_("In nanoseconds"))
+    content_hash = models.CharField(max_length=64, blank=True, null=True, verbose_name=_("content hash"),
+                                    help_text=_("SHA-256"))
+    times = models.JSONField(default=list, blank=True, verbose_name=_("times"))
+    ingested_at = models.DateTimeField(auto_now=True, verbose_name=_("ingested at"))
+
+    class Meta:
+        verbose_name = _("Ingest Manifest Entry")
+        verbose_name_plural = _("Ingest Manifest Entries")
+        unique_together = ('layer', 'path')
+
+    def __str__(self):
+        return f"{self.layer} - {self.path}"
+
+
+@receiver(post_delete, sender=LayerRasterFile)
+def remove_raster_file_manifest_entries(sender, instance, **kwargs):
+    # the file the deleted time was ingested from is ingested again on the next directory sync
+    IngestManifestEntry.objects.filter(layer_id=instance.layer_id, times__contains=[instance.time_str]).delete()
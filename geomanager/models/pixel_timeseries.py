@@ -0,0 +1,51 @@
+from django.db import models
+from django.db.models.functions import Cast
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+
+from geomanager.models.raster_file import RasterFileLayer, LayerRasterFile
+
+
+class RasterPixelTimeseries(models.Model):
+    """
+    Pixel values already extracted for a point of a raster file layer, keyed by the pixel row and col
+    in the layer grid. Values are stored as a mapping of raster file time to value.
+    """
+    layer = models.ForeignKey(RasterFileLayer, on_delete=models.CASCADE, related_name="pixel_timeseries",
+                              verbose_name=_("layer"))
+    grid = models.CharField(max_length=32, verbose_name=_("grid"),
+                            help_text=_("Hash of the transform and size of the raster grid"))
+    row = models.IntegerField(verbose_name=_("row"))
+    col = models.IntegerField(verbose_name=_("col"))
+    values = models.JSONField(default=dict, verbose_name=_("values"))
+    last_accessed = models.DateTimeField(verbose_name=_("last accessed"))
+
+    class Meta:
+        verbose_name = _("Raster Pixel Timeseries")
+        verbose_name_plural = _("Raster Pixel Timeseries")
+        unique_together = ('layer', 'grid', 'row', 'col')
+        indexes = [
+            models.Index(fields=["layer", "last_accessed"], name="geomanager_pxts_accessed_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.layer} - {self.row}/{self.col}"
+
+
+class JSONBDeleteKey(models.Func):
+    """
+    Removes a key from a jsonb object in SQL
+    """
+    template = "%(expressions)s"
+    arg_joiner = " - "
+    output_field = models.JSONField()
+
+
+@receiver(post_delete, sender=LayerRasterFile)
+def remove_pixel_timeseries_values(sender, instance, **kwargs):
+    # the values for this time are stale once the file is deleted or replaced. Removed in SQL, so that values
+    # merged by concurrent requests are kept
+    time_key = instance.time_str
+    RasterPixelTimeseries.objects.filter(layer_id=instance.layer_id, values__has_key=time_key).update(
+        values=JSONBDeleteKey(models.F("values"), Cast(models.Value(time_key), models.TextField())))
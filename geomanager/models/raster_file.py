@@ -1,8 +1,9 @@
 import os
 
 from django.core.exceptions import ValidationError
-from django.db import models
-from django.db.models.signals import post_save
+from django.contrib.gis.db import models
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
@@ -23,10 +24,22 @@ from geomanager.models.raster_style import RasterStyle
 from geomanager.models.core import Dataset, BaseLayer
 from geomanager.settings import geomanager_settings
 from geomanager.storage import OverwriteStorage
-from geomanager.utils import DATE_FORMAT_CHOICES
+from geomanager.utils import DATE_FORMAT_CHOICES, get_style_hash
+from geomanager.utils.datacube import RasterDataCube, remove_datacube_timestep
+from geomanager.utils.geostore_cache import geostore_clip_cache
+from geomanager.utils.raster_grid import get_raster_file_grid
+from geomanager.utils.tile_source_pool import tile_source_pool
+from geomanager.utils.tile_store import raster_tile_store
+from geomanager.utils.time_index import raster_time_index
 from geomanager.validators import validate_directory_name
 
 
+STORAGE_MODE_CHOICES = (
+    ("files", _("Raster files")),
+    ("datacube", _("Raster files and datacube")),
+)
+
+
 class RasterFileLayer(TimeStampedModel, BaseLayer):
     dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name="raster_file_layers",
                                 verbose_name=_("dataset"))
@@ -40,6 +53,11 @@ class RasterFileLayer(TimeStampedModel, BaseLayer):
         ('legend_image', ImageChooserBlock(label=_("Custom Image")),),
     ], use_json_field=True, null=True, blank=True, max_num=1, verbose_name=_("Legend"), )
 
+    storage_mode = models.CharField(max_length=20, choices=STORAGE_MODE_CHOICES, default="files",
+                                    verbose_name=_("Storage mode"),
+                                    help_text=_("Raster files and datacube also keeps all timesteps in one chunked "
+                                                "file, for faster point and area timeseries"))
+
     auto_ingest_from_directory = models.BooleanField(default=False, verbose_name=_("Auto ingest from directory"))
     auto_ingest_use_custom_directory_name = models.BooleanField(default=False,
                                                                 verbose_name=_("Use custom directory name"))
@@ -68,6 +86,7 @@ class RasterFileLayer(TimeStampedModel, BaseLayer):
         FieldPanel("default"),
         FieldPanel("date_format"),
         FieldPanel("style"),
+        FieldPanel("storage_mode"),
         FieldPanel("use_custom_legend"),
         FieldPanel("legend"),
         FieldPanel("auto_ingest_from_directory"),
@@ -315,6 +334,51 @@ def create_auto_ingest_directory(sender, instance, created, **kwargs):
                 os.makedirs(directory_path)
 
 
+@receiver(post_delete, sender=RasterFileLayer)
+def remove_layer_stored_raster_tiles(sender, instance, **kwargs):
+    raster_tile_store.remove_layer(instance.pk)
+
+
+def remove_stale_style_tiles(layer_ids, style_hash):
+    # tiles rendered with a previous style of a layer are never served again
+    layer_ids = list(layer_ids)
+
+    def remove_tiles():
+        for layer_id in layer_ids:
+            raster_tile_store.remove_other_styles(layer_id, style_hash)
+
+    transaction.on_commit(remove_tiles)
+
+
+@receiver(post_save, sender=RasterFileLayer)
+def remove_layer_stale_style_tiles(sender, instance, **kwargs):
+    remove_stale_style_tiles([instance.pk], get_style_hash(instance.style.version if instance.style else None))
+
+
+@receiver(post_save, sender=RasterStyle)
+def remove_raster_style_stale_tiles(sender, instance, **kwargs):
+    layer_ids = RasterFileLayer.objects.filter(style=instance).values_list("pk", flat=True)
+    remove_stale_style_tiles(layer_ids, get_style_hash(instance.version))
+
+
+@receiver(pre_delete, sender=RasterStyle)
+def remove_deleted_raster_style_tiles(sender, instance, **kwargs):
+    # the layers of the style are left without one
+    layer_ids = RasterFileLayer.objects.filter(style=instance).values_list("pk", flat=True)
+    remove_stale_style_tiles(layer_ids, get_style_hash(None))
+
+
+@receiver(post_delete, sender=RasterFileLayer)
+def remove_layer_datacube(sender, instance, **kwargs):
+    RasterDataCube.for_layer(instance.pk).remove()
+
+
+@receiver(post_save, sender=RasterFileLayer)
+@receiver(post_delete, sender=RasterFileLayer)
+def invalidate_layer_time_index(sender, instance, **kwargs):
+    raster_time_index.invalidate(instance.pk)
+
+
 def layer_raster_file_dir_path(instance, filename):
     file_dir = f"raster_files/{type(instance.layer).__name__}-{instance.layer.pk}/{filename}"
     return file_dir
@@ -328,6 +392,10 @@ class LayerRasterFile(TimeStampedModel):
                                 help_text=_("Time for the raster file. This can be the time the data was acquired, "
                                             "or the date and time for which the data applies", ))
     raster_metadata = models.JSONField(blank=True, null=True)
+    footprint = models.PolygonField(srid=4326, blank=True, null=True, verbose_name=_("footprint"),
+                                    help_text=_("Bounding box of the raster data, in EPSG:4326"))
+    data_mask = models.JSONField(blank=True, null=True, verbose_name=_("data mask"),
+                                 help_text=_("Coarse grid marking the areas of the raster that have data"))
 
     class Meta:
         verbose_name = _("Layer Raster File")
@@ -352,6 +420,58 @@ class LayerRasterFile(TimeStampedModel):
     def time_str(self):
         return self.time.strftime("%Y-%m-%dT%H:%M:%S.000Z")
 
+    @property
+    def grid(self):
+        return get_raster_file_grid(self)
+
+
+@receiver(post_save, sender=LayerRasterFile)
+@receiver(post_delete, sender=LayerRasterFile)
+def invalidate_pooled_tile_sources(sender, instance, **kwargs):
+    # drop any open tile sources for this file, so that a replaced or deleted file is not served from the pool
+    if instance.file:
+        file_name = instance.file.name
+        transaction.on_commit(lambda: tile_source_pool.invalidate(file_name))
+
+
+@receiver(post_save, sender=LayerRasterFile)
+@receiver(post_delete, sender=LayerRasterFile)
+def remove_stored_raster_tiles(sender, instance, **kwargs):
+    # pre-rendered tiles for this time are stale once the file is replaced or deleted
+    layer_id, time = instance.layer_id, instance.time
+    transaction.on_commit(lambda: raster_tile_store.remove_time(layer_id, time))
+
+
+@receiver(post_delete, sender=LayerRasterFile)
+def remove_raster_file_datacube_timestep(sender, instance, **kwargs):
+    # the datacube would keep serving the values of a deleted file
+    layer_id, time = instance.layer_id, instance.time
+    transaction.on_commit(lambda: remove_datacube_timestep(layer_id, time))
+
+
+@receiver(post_delete, sender=LayerRasterFile)
+def remove_raster_file_thumbnails(sender, instance, **kwargs):
+    # imported here to avoid a circular import, raster_utils depends on the models
+    from geomanager.utils.raster_utils import remove_raster_thumbnails
+
+    if instance.file:
+        remove_raster_thumbnails(instance)
+
+
+@receiver(post_save, sender=LayerRasterFile)
+@receiver(post_delete, sender=LayerRasterFile)
+def invalidate_raster_file_time_index(sender, instance, **kwargs):
+    # after commit, so that a reload does not miss the rows of the current transaction
+    layer_id = instance.layer_id
+    transaction.on_commit(lambda: raster_time_index.invalidate(layer_id))
+
+
+@receiver(post_save, sender=LayerRasterFile)
+@receiver(post_delete, sender=LayerRasterFile)
+def remove_raster_file_geostore_clips(sender, instance, **kwargs):
+    # files clipped to geostores are stale once the file is replaced or deleted
+    geostore_clip_cache.remove_for_instance(instance)
+
 
 class RasterUpload(TimeStampedModel):
     dataset = models.ForeignKey(Dataset, blank=True, null=True, on_delete=models.SET_NULL, verbose_name=_("dataset"))
@@ -1,5 +1,8 @@
+from django.core.cache import cache
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 from django_extensions.db.models import TimeStampedModel
 from modelcluster.fields import ParentalKey
@@ -11,8 +14,13 @@ from wagtail_color_panel.fields import ColorField
 
 from geomanager.forms import RasterStyleModelForm
 from geomanager.utils import significant_digits, round_to_precision
+from geomanager.utils.colormap import CompiledRasterStyle
+from geomanager.utils.time_index import raster_time_index
 from geomanager.widgets import RasterStyleWidget
 
+# compiled styles for this process, keyed by style id
+_compiled_styles = {}
+
 
 class RasterStyle(TimeStampedModel, ClusterableModel):
     LEGEND_TYPE_CHOICES = (
@@ -160,15 +168,19 @@ class RasterStyle(TimeStampedModel, ClusterableModel):
         return values
     
     def get_custom_palette(self):
+        # query the color values once, instead of once for every index
+        values = self.get_custom_color_values()
+        
         colors = []
         for i in range(256):
-            color = self.get_color_for_index(i)
+            color = self.get_color_for_index(i, values=values)
             colors.append(color)
         
         return colors
     
-    def get_color_for_index(self, index_value):
-        values = self.get_custom_color_values()
+    def get_color_for_index(self, index_value, values=None):
+        if values is None:
+            values = self.get_custom_color_values()
         
         for value in values:
             max_value = value["max_value"] + self.offset_value
@@ -216,6 +228,36 @@ class RasterStyle(TimeStampedModel, ClusterableModel):
         }
         return style
     
+    @property
+    def version(self):
+        if self.modified:
+            return f"{self.pk}-{self.modified.timestamp()}"
+        return f"{self.pk}"
+    
+    def get_compiled_style(self):
+        """
+        Returns the style compiled to a NumPy lookup table.
+        
+        The compiled style is built once per style version, and kept both in process memory and in the cache.
+        Saving the style updates its version, so stale compiled styles are never used.
+        """
+        version = self.version
+        
+        compiled = _compiled_styles.get(self.pk)
+        if compiled is not None and compiled.version == version:
+            return compiled
+        
+        key = f"raster-style-compiled:{version}"
+        compiled = cache.get(key)
+        
+        if compiled is None:
+            compiled = CompiledRasterStyle.from_palette(self.min, self.max, self.get_palette_list(), version=version)
+            cache.set(key, compiled, 60 * 60 * 24)  # cache for 24 hours
+        
+        _compiled_styles[self.pk] = compiled
+        
+        return compiled
+    
     def get_legend_config(self):
         items = []
         legend_type = self.legend_type
@@ -252,6 +294,19 @@ class RasterStyle(TimeStampedModel, ClusterableModel):
         return config
 
 
+@receiver(post_save, sender=RasterStyle)
+@receiver(post_delete, sender=RasterStyle)
+def invalidate_compiled_style(sender, instance, **kwargs):
+    _compiled_styles.pop(instance.pk, None)
+
+
+@receiver(post_save, sender=RasterStyle)
+@receiver(post_delete, sender=RasterStyle)
+def invalidate_raster_time_index(sender, instance, **kwargs):
+    # indexed raster files hold their layer's style, which is now stale
+    raster_time_index.clear()
+
+
 class ColorValue(TimeStampedModel, Orderable):
     layer = ParentalKey(RasterStyle, related_name='color_values')
     threshold = models.FloatField(verbose_name=_("Threshold value"), help_text=_(
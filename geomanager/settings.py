@@ -15,4 +15,38 @@ geomanager_settings = {
     "vector_db_schema": getattr(settings, "GEOMANAGER_VECTOR_DB_SCHEMA", "vectordata"),
     "auto_ingest_raster_data_dir": getattr(settings, "GEOMANAGER_AUTO_INGEST_RASTER_DATA_DIR", None),
     "nc_time_dimension_names": NC_TIME_DIMENSION_NAMES,
+    "raster_ingest_workers": getattr(settings, "GEOMANAGER_RASTER_INGEST_WORKERS", 4),
+    "auto_ingest_daemon_workers": getattr(settings, "GEOMANAGER_AUTO_INGEST_DAEMON_WORKERS", 2),
+    "auto_ingest_settle_seconds": getattr(settings, "GEOMANAGER_AUTO_INGEST_SETTLE_SECONDS", 5),
+    "auto_ingest_poll_interval": getattr(settings, "GEOMANAGER_AUTO_INGEST_POLL_INTERVAL", 2),
+    "ingest_job_max_attempts": getattr(settings, "GEOMANAGER_INGEST_JOB_MAX_ATTEMPTS", 3),
+    "ingest_job_retry_delay": getattr(settings, "GEOMANAGER_INGEST_JOB_RETRY_DELAY", 60),
+    "ingest_job_layer_concurrency": getattr(settings, "GEOMANAGER_INGEST_JOB_LAYER_CONCURRENCY", 1),
+    "ingest_job_timeout": getattr(settings, "GEOMANAGER_INGEST_JOB_TIMEOUT", 10 * 60),
+    "ingest_job_heartbeat_interval": getattr(settings, "GEOMANAGER_INGEST_JOB_HEARTBEAT_INTERVAL", 30),
+    "tile_source_pool_size": getattr(settings, "GEOMANAGER_TILE_SOURCE_POOL_SIZE", 64),
+    "raster_tile_store_dir": getattr(settings, "GEOMANAGER_RASTER_TILE_STORE_DIR", None),
+    "raster_data_mask_size": getattr(settings, "GEOMANAGER_RASTER_DATA_MASK_SIZE", 256),
+    "raster_time_index_ttl": getattr(settings, "GEOMANAGER_RASTER_TIME_INDEX_TTL", 60),
+    "raster_time_index_refresh_interval": getattr(settings, "GEOMANAGER_RASTER_TIME_INDEX_REFRESH_INTERVAL", 5),
+    "raster_tile_stack_max_steps": getattr(settings, "GEOMANAGER_RASTER_TILE_STACK_MAX_STEPS", 60),
+    "raster_tile_stack_workers": getattr(settings, "GEOMANAGER_RASTER_TILE_STACK_WORKERS", 4),
+    "raster_thumbnail_sizes": getattr(settings, "GEOMANAGER_RASTER_THUMBNAIL_SIZES", [(256, 256)]),
+    "raster_timeseries_workers": getattr(settings, "GEOMANAGER_RASTER_TIMESERIES_WORKERS", 8),
+    "raster_pixel_timeseries_max_points": getattr(settings, "GEOMANAGER_RASTER_PIXEL_TIMESERIES_MAX_POINTS", 1000),
+    "raster_batch_pixel_max_points": getattr(settings, "GEOMANAGER_RASTER_BATCH_PIXEL_MAX_POINTS", 10000),
+    "raster_zonal_stats_block_size": getattr(settings, "GEOMANAGER_RASTER_ZONAL_STATS_BLOCK_SIZE", 1024),
+    "raster_zonal_stats_mask_cache_blocks": getattr(settings, "GEOMANAGER_RASTER_ZONAL_STATS_MASK_CACHE_BLOCKS", 256),
+    "raster_zonal_stats_processes": getattr(settings, "GEOMANAGER_RASTER_ZONAL_STATS_PROCESSES", 4),
+    "raster_zonal_stats_request_workers": getattr(settings, "GEOMANAGER_RASTER_ZONAL_STATS_REQUEST_WORKERS", 4),
+    "raster_admin_stats_levels": getattr(settings, "GEOMANAGER_RASTER_ADMIN_STATS_LEVELS", [0, 1, 2]),
+    "raster_admin_stats_workers": getattr(settings, "GEOMANAGER_RASTER_ADMIN_STATS_WORKERS", 1),
+    "raster_datacube_dir": getattr(settings, "GEOMANAGER_RASTER_DATACUBE_DIR", None),
+    "raster_datacube_chunks": getattr(settings, "GEOMANAGER_RASTER_DATACUBE_CHUNKS", {"time": 32, "y": 64, "x": 64}),
+    "raster_datacube_max_read_cells": getattr(settings, "GEOMANAGER_RASTER_DATACUBE_MAX_READ_CELLS", 16 * 1024 * 1024),
+    "geostore_clip_cache_max_bytes": getattr(settings, "GEOMANAGER_GEOSTORE_CLIP_CACHE_MAX_BYTES",
+                                             5 * 1024 * 1024 * 1024),
+    "tile_cache_dir": getattr(settings, "GEOMANAGER_TILE_CACHE_DIR", None),
+    "tile_cache_memory_max_bytes": getattr(settings, "GEOMANAGER_TILE_CACHE_MEMORY_MAX_BYTES", 64 * 1024 * 1024),
+    "tile_cache_disk_max_bytes": getattr(settings, "GEOMANAGER_TILE_CACHE_DISK_MAX_BYTES", 1024 * 1024 * 1024),
 }
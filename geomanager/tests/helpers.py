@@ -0,0 +1,32 @@
+import numpy as np
+import rasterio as rio
+from rasterio.transform import from_bounds
+
+from geomanager.models import Category, SubCategory, Dataset, RasterFileLayer
+
+# bounds of the web mercator tile 0/0/0
+WEB_MERCATOR_BOUNDS = (-20037508.342789244, -20037508.342789244, 20037508.342789244, 20037508.342789244)
+
+
+def write_test_raster(path, data, bounds=WEB_MERCATOR_BOUNDS, crs="EPSG:3857", nodata=None):
+    """
+    Writes a single band GeoTIFF of a 2D array covering bounds
+    """
+    data = np.asarray(data)
+    height, width = data.shape
+
+    with rio.open(str(path), "w", driver="GTiff", width=width, height=height, count=1, dtype=data.dtype,
+                  crs=crs, transform=from_bounds(*bounds, width, height), nodata=nodata) as dst:
+        dst.write(data, 1)
+
+    return path
+
+
+def create_raster_file_layer(title="Layer"):
+    """
+    Creates a raster file layer, in a dataset of its own
+    """
+    category = Category.objects.create(title="Category")
+    sub_category = SubCategory.objects.create(category=category, title="Sub Category")
+    dataset = Dataset.objects.create(title="Dataset", category=category, sub_category=sub_category)
+    return RasterFileLayer.objects.create(dataset=dataset, title=title)
@@ -0,0 +1,72 @@
+import io
+import os
+import tempfile
+
+import numpy as np
+from django.test import SimpleTestCase
+from PIL import Image
+
+from geomanager.tests.helpers import write_test_raster
+from geomanager.utils.colormap import CompiledRasterStyle, LUT_MAX_INDEX
+from geomanager.utils.raster_utils import render_raster_tile
+
+RED = [255, 0, 0, 255]
+BLUE = [0, 0, 255, 255]
+
+
+class CompiledRasterStyleTest(SimpleTestCase):
+    def setUp(self):
+        self.style = CompiledRasterStyle.from_palette(100, 500, ["#ff0000", "#0000ff"])
+
+    def test_indexes_use_the_raster_style_scale(self):
+        indexes = self.style.get_indexes(np.array([100, 300, 500], dtype=np.float32))
+
+        # 254 / (max - min), as RasterStyle.scale_value
+        self.assertEqual(indexes.tolist(), [0, LUT_MAX_INDEX // 2, LUT_MAX_INDEX])
+
+    def test_values_outside_the_range_are_clipped(self):
+        indexes = self.style.get_indexes(np.array([-1000, 10000, np.inf, -np.inf], dtype=np.float64))
+
+        self.assertEqual(indexes.tolist(), [0, LUT_MAX_INDEX, LUT_MAX_INDEX, 0])
+
+    def test_palette_is_spread_from_min_to_max(self):
+        rgba = self.style.apply(np.array([[100, 299, 301, 500]], dtype=np.float32))
+
+        self.assertEqual(rgba[0].tolist(), [RED, RED, BLUE, BLUE])
+
+    def test_no_data_is_transparent(self):
+        values = np.array([[np.nan, 100, 500]], dtype=np.float32)
+        mask = np.array([[False, True, False]])
+
+        rgba = self.style.apply(values, mask=mask)
+
+        self.assertEqual(rgba[0, 0, 3], 0)
+        self.assertEqual(rgba[0, 1, 3], 0)
+        self.assertEqual(rgba[0, 2].tolist(), BLUE)
+
+
+class RenderCompiledTileTest(SimpleTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.style = CompiledRasterStyle.from_palette(100, 500, ["#ff0000", "#0000ff"])
+
+        # left half at the style min, right half at the style max, top quarter without data
+        data = np.full((256, 256), 100, dtype=np.float32)
+        data[:, 128:] = 500
+        data[:64, :] = -9999
+        self.file_path = write_test_raster(os.path.join(self.tmp_dir.name, "tile.tif"), data, nodata=-9999)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_tile_is_colorized_from_raw_values(self):
+        tile_binary, mime_type = render_raster_tile(self.file_path, 0, 0, 0, compiled_style=self.style,
+                                                    nodata=-9999)
+
+        self.assertEqual(mime_type, "image/png")
+
+        rgba = np.asarray(Image.open(io.BytesIO(tile_binary)).convert("RGBA"))
+
+        self.assertEqual(rgba[160, 64].tolist(), RED)
+        self.assertEqual(rgba[160, 192].tolist(), BLUE)
+        self.assertEqual(rgba[32, 64, 3], 0)
@@ -0,0 +1,109 @@
+import datetime
+import os
+import tempfile
+from unittest import mock
+
+import netCDF4
+import numpy as np
+from django.test import SimpleTestCase
+from shapely.geometry import box
+
+from geomanager.errors import DataCubeGridMismatch
+from geomanager.settings import geomanager_settings
+from geomanager.tests.helpers import write_test_raster
+from geomanager.utils.datacube import RasterDataCube
+
+BOUNDS = (0, 0, 10, 10)
+
+
+def get_time(day):
+    return datetime.datetime(2024, 1, day, tzinfo=datetime.timezone.utc)
+
+
+class RasterDataCubeTest(SimpleTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cube = RasterDataCube(os.path.join(self.tmp_dir.name, "cube.nc"))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_raster(self, name, data, bounds=BOUNDS):
+        path = os.path.join(self.tmp_dir.name, f"{name}.tif")
+        return write_test_raster(path, np.asarray(data, dtype=np.float32), bounds=bounds, crs="EPSG:4326",
+                                 nodata=-9999)
+
+    def write_timestep(self, day, value):
+        data = np.full((10, 10), value, dtype=np.float32)
+        # a gradient along the columns, and one pixel without data
+        data += np.arange(10, dtype=np.float32)
+        data[0, 0] = -9999
+        self.cube.write_timestep(get_time(day), self.write_raster(f"day-{day}", data))
+
+    def get_time_count(self):
+        with netCDF4.Dataset(self.cube.path) as ds:
+            return ds.dimensions["time"].size
+
+    def test_read_pixel_timeseries(self):
+        for day in (1, 2, 3):
+            self.write_timestep(day, day * 100)
+
+        values = self.cube.read_pixel_timeseries([get_time(1), get_time(3), get_time(4)], 2.5, 5.5)
+
+        # column 2, and times not in the cube are left out
+        self.assertEqual(values, {get_time(1): 102.0, get_time(3): 302.0})
+
+    def test_no_data_and_outside_coordinates(self):
+        self.write_timestep(1, 100)
+
+        self.assertEqual(self.cube.read_pixel_timeseries([get_time(1)], 0.5, 9.5), {get_time(1): None})
+        self.assertEqual(self.cube.read_pixel_timeseries([get_time(1)], 20, 20), {get_time(1): None})
+
+    def test_write_replaces_existing_time(self):
+        self.write_timestep(1, 100)
+        self.write_timestep(1, 500)
+
+        self.assertEqual(self.get_time_count(), 1)
+        self.assertEqual(self.cube.read_pixel_timeseries([get_time(1)], 0.5, 5.5), {get_time(1): 500.0})
+
+    def test_grid_mismatch(self):
+        self.write_timestep(1, 100)
+
+        path = self.write_raster("other", np.zeros((5, 5)), bounds=(0, 0, 5, 5))
+
+        with self.assertRaises(DataCubeGridMismatch):
+            self.cube.write_timestep(get_time(2), path)
+
+    def test_removed_timestep_is_not_read_and_its_slot_is_reused(self):
+        self.write_timestep(1, 100)
+        self.write_timestep(2, 200)
+
+        self.cube.remove_timestep(get_time(1))
+
+        self.assertEqual(self.cube.read_pixel_timeseries([get_time(1), get_time(2)], 0.5, 5.5),
+                         {get_time(2): 200.0})
+
+        self.write_timestep(3, 300)
+
+        self.assertEqual(self.get_time_count(), 2)
+        self.assertEqual(self.cube.read_pixel_timeseries([get_time(3)], 0.5, 5.5), {get_time(3): 300.0})
+
+    def test_read_geometry_timeseries_in_runs(self):
+        for day in (1, 2, 3, 4):
+            self.write_timestep(day, day * 100)
+
+        # columns 2 and 3 of rows 4 and 5, read one timestep at a time
+        geom = box(2, 4, 4, 6)
+        with mock.patch.dict(geomanager_settings, {"raster_datacube_max_read_cells": 1}):
+            values = self.cube.read_geometry_timeseries([get_time(1), get_time(2), get_time(4)], geom)
+
+        self.assertEqual(sorted(values), [get_time(1), get_time(2), get_time(4)])
+        self.assertEqual(sorted(values[get_time(2)].tolist()), [202.0, 202.0, 203.0, 203.0])
+        self.assertEqual(sorted(values[get_time(4)].tolist()), [402.0, 402.0, 403.0, 403.0])
+
+    def test_read_geometry_timeseries_leaves_out_no_data(self):
+        self.write_timestep(1, 100)
+
+        values = self.cube.read_geometry_timeseries([get_time(1)], box(0, 9, 2, 10))
+
+        self.assertEqual(values[get_time(1)].tolist(), [101.0])
@@ -0,0 +1,99 @@
+import csv
+import datetime
+import io
+import unittest
+
+from django.test import SimpleTestCase
+
+from geomanager.utils import export
+from geomanager.utils.export import CSV_EXPORT_ERROR_MARKER, iter_csv, iter_export_content, iter_parquet
+
+COLUMNS = {"time": "timestamp", "value": "float", "name": "string"}
+
+TIME = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def get_rows(count):
+    return [{"time": TIME + datetime.timedelta(days=i), "value": i * 1.5, "name": f"row-{i}"} for i in range(count)]
+
+
+class IterCsvTest(SimpleTestCase):
+    def test_rows(self):
+        chunks = list(iter_csv(get_rows(2), COLUMNS))
+
+        # the header and then one chunk per row
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(list(csv.reader(io.StringIO("".join(chunks)))), [
+            ["time", "value", "name"],
+            ["2024-01-01T00:00:00+00:00", "0.0", "row-0"],
+            ["2024-01-02T00:00:00+00:00", "1.5", "row-1"],
+        ])
+
+    def test_missing_values_are_empty(self):
+        content = "".join(iter_csv([{"time": TIME, "value": None}], COLUMNS))
+
+        self.assertEqual(list(csv.reader(io.StringIO(content)))[1], ["2024-01-01T00:00:00+00:00", "", ""])
+
+    def test_rows_are_computed_as_they_are_sent(self):
+        def rows():
+            yield from get_rows(1)
+            raise ValueError("lookup failed")
+
+        content = iter_csv(rows(), COLUMNS)
+
+        self.assertTrue(next(content).startswith("time,"))
+        self.assertTrue(next(content).startswith("2024-01-01"))
+        with self.assertRaises(ValueError):
+            next(content)
+
+
+class IterExportContentTest(SimpleTestCase):
+    def failing_content(self):
+        yield "time,value\n"
+        raise ValueError("lookup failed")
+
+    def test_csv_error_marker(self):
+        content = iter_export_content(self.failing_content(), export.EXPORT_FORMAT_CSV, "export")
+
+        self.assertEqual(next(content), "time,value\n")
+        self.assertEqual(next(content), CSV_EXPORT_ERROR_MARKER)
+        with self.assertRaises(ValueError):
+            next(content)
+
+    def test_parquet_is_aborted(self):
+        content = iter_export_content(self.failing_content(), export.EXPORT_FORMAT_PARQUET, "export")
+
+        self.assertEqual(next(content), "time,value\n")
+        with self.assertRaises(ValueError):
+            next(content)
+
+
+@unittest.skipIf(export.pa is None, "pyarrow is not installed")
+class IterParquetTest(SimpleTestCase):
+    def read_table(self, chunks):
+        return export.pq.read_table(io.BytesIO(b"".join(chunks)))
+
+    def test_rows(self):
+        table = self.read_table(iter_parquet(get_rows(3), COLUMNS))
+
+        self.assertEqual(table.column_names, ["time", "value", "name"])
+        self.assertEqual(table.column("value").to_pylist(), [0.0, 1.5, 3.0])
+        self.assertEqual(table.column("name").to_pylist(), ["row-0", "row-1", "row-2"])
+        self.assertEqual(table.column("time").to_pylist()[1], TIME + datetime.timedelta(days=1))
+
+    def test_row_groups(self):
+        rows = get_rows(export.PARQUET_ROW_GROUP_SIZE * 2 + 1)
+
+        chunks = list(iter_parquet(rows, COLUMNS))
+        parquet_file = export.pq.ParquetFile(io.BytesIO(b"".join(chunks)))
+
+        # a chunk per complete row group, and the last one with the rest and the footer
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(parquet_file.metadata.num_row_groups, 3)
+        self.assertEqual(parquet_file.metadata.num_rows, len(rows))
+
+    def test_no_rows(self):
+        table = self.read_table(iter_parquet([], COLUMNS))
+
+        self.assertEqual(table.num_rows, 0)
+        self.assertEqual(table.column_names, ["time", "value", "name"])
@@ -0,0 +1,264 @@
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from geomanager.models import IngestJob, RasterFileLayer
+from geomanager.settings import geomanager_settings
+from geomanager.tests.helpers import create_raster_file_layer
+from geomanager.utils.ingest import IngestException
+from geomanager.utils.ingest_jobs import claim_ingest_job, run_ingest_job, requeue_stale_ingest_jobs
+
+JOB_SETTINGS = {
+    "ingest_job_layer_concurrency": 1,
+    "ingest_job_retry_delay": 60,
+    "ingest_job_timeout": 600,
+    "ingest_job_heartbeat_interval": 30,
+}
+
+
+def create_job(layer, name="data.tif", **kwargs):
+    return IngestJob.objects.create(layer=layer, file_path=f"/data/{layer.pk}/{name}", **kwargs)
+
+
+@mock.patch.dict(geomanager_settings, JOB_SETTINGS)
+class ClaimIngestJobTest(TestCase):
+    def setUp(self):
+        self.layer = create_raster_file_layer()
+
+    def test_claims_oldest_due_job(self):
+        now = timezone.now()
+        create_job(self.layer, "later.tif", run_after=now + timedelta(minutes=5))
+        oldest = create_job(self.layer, "oldest.tif", run_after=now - timedelta(minutes=2))
+        create_job(self.layer, "newer.tif", run_after=now - timedelta(minutes=1))
+
+        job = claim_ingest_job(worker="worker-1")
+
+        self.assertEqual(job.pk, oldest.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, "running")
+        self.assertEqual(job.attempts, 1)
+        self.assertEqual(job.worker, "worker-1")
+        self.assertIsNotNone(job.started_at)
+        self.assertIsNotNone(job.heartbeat_at)
+
+    def test_no_due_jobs(self):
+        create_job(self.layer, run_after=timezone.now() + timedelta(minutes=5))
+        create_job(self.layer, "failed.tif", status="failed")
+
+        self.assertIsNone(claim_ingest_job())
+
+    def test_layer_concurrency(self):
+        other_layer = create_raster_file_layer("Other")
+        create_job(self.layer, "running.tif", status="running")
+        create_job(self.layer, "pending.tif")
+        other_job = create_job(other_layer)
+
+        # the jobs of the layer at its limit are skipped
+        self.assertEqual(claim_ingest_job().pk, other_job.pk)
+        self.assertIsNone(claim_ingest_job())
+
+    def test_layer_concurrency_limit(self):
+        create_job(self.layer, "running.tif", status="running")
+        job = create_job(self.layer, "pending.tif")
+
+        with mock.patch.dict(geomanager_settings, {"ingest_job_layer_concurrency": 2}):
+            self.assertEqual(claim_ingest_job().pk, job.pk)
+
+    def test_no_layer_concurrency_limit(self):
+        for name in ("running-1.tif", "running-2.tif"):
+            create_job(self.layer, name, status="running")
+        job = create_job(self.layer, "pending.tif")
+
+        with mock.patch.dict(geomanager_settings, {"ingest_job_layer_concurrency": 0}):
+            self.assertEqual(claim_ingest_job().pk, job.pk)
+
+
+@mock.patch.dict(geomanager_settings, JOB_SETTINGS)
+class ClaimIngestJobLockingTest(TransactionTestCase):
+    """
+    Rows locked by another connection, like a worker in another process that is claiming them
+    """
+
+    def setUp(self):
+        self.layer = create_raster_file_layer()
+        self.other_layer = create_raster_file_layer("Other")
+
+    def claim_while_locked(self, queryset):
+        locked = threading.Event()
+        release = threading.Event()
+
+        def lock():
+            try:
+                with transaction.atomic():
+                    list(queryset.select_for_update())
+                    locked.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=lock)
+        thread.start()
+        try:
+            self.assertTrue(locked.wait(10))
+            return claim_ingest_job()
+        finally:
+            release.set()
+            thread.join()
+
+    def test_locked_jobs_are_skipped(self):
+        now = timezone.now()
+        locked_job = create_job(self.layer, run_after=now - timedelta(minutes=1))
+        job = create_job(self.other_layer, run_after=now)
+
+        claimed = self.claim_while_locked(IngestJob.objects.filter(pk=locked_job.pk))
+
+        self.assertEqual(claimed.pk, job.pk)
+        locked_job.refresh_from_db()
+        self.assertEqual(locked_job.status, "pending")
+
+    def test_jobs_of_locked_layers_are_skipped(self):
+        now = timezone.now()
+        create_job(self.layer, run_after=now - timedelta(minutes=1))
+        job = create_job(self.other_layer, run_after=now)
+
+        # another worker counting the running jobs of the layer
+        claimed = self.claim_while_locked(RasterFileLayer.objects.filter(pk=self.layer.pk))
+
+        self.assertEqual(claimed.pk, job.pk)
+
+    def test_all_jobs_locked(self):
+        job = create_job(self.layer)
+
+        self.assertIsNone(self.claim_while_locked(IngestJob.objects.filter(pk=job.pk)))
+
+
+@mock.patch.dict(geomanager_settings, JOB_SETTINGS)
+@mock.patch("geomanager.utils.ingest_jobs.ingest_raster_file")
+class RunIngestJobTest(TestCase):
+    def setUp(self):
+        self.layer = create_raster_file_layer()
+        create_job(self.layer, max_attempts=3)
+
+    def run_next_job(self):
+        # make retried jobs due
+        IngestJob.objects.filter(status="pending").update(run_after=timezone.now())
+        job = run_ingest_job(claim_ingest_job())
+        job.refresh_from_db()
+        return job
+
+    def test_succeeded(self, ingest_raster_file):
+        ingest_raster_file.return_value = {}
+
+        job = self.run_next_job()
+
+        self.assertEqual(job.status, "succeeded")
+        self.assertIsNone(job.error)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_retry_with_backoff(self, ingest_raster_file):
+        ingest_raster_file.side_effect = ValueError("read error")
+
+        for attempt, delay in ((1, 60), (2, 120)):
+            job = self.run_next_job()
+
+            self.assertEqual(job.status, "pending")
+            self.assertEqual(job.attempts, attempt)
+            self.assertEqual(job.error, "read error")
+            self.assertEqual(job.run_after - job.finished_at, timedelta(seconds=delay))
+
+        # no attempts left
+        job = self.run_next_job()
+
+        self.assertEqual(job.status, "failed")
+        self.assertEqual(job.attempts, 3)
+
+    def test_retry_is_not_claimed_before_its_delay(self, ingest_raster_file):
+        ingest_raster_file.side_effect = ValueError("read error")
+
+        run_ingest_job(claim_ingest_job())
+
+        self.assertIsNone(claim_ingest_job())
+
+    def test_failed_timesteps_are_retried(self, ingest_raster_file):
+        time = timezone.now().replace(microsecond=0)
+        ingest_raster_file.return_value = {time: "conversion error"}
+
+        job = self.run_next_job()
+
+        self.assertEqual(job.status, "pending")
+        self.assertEqual(job.failed_timesteps, {time.isoformat(): "conversion error"})
+
+    def test_ingest_exception_is_not_retried(self, ingest_raster_file):
+        ingest_raster_file.side_effect = IngestException("No layer for the file")
+
+        job = self.run_next_job()
+
+        self.assertEqual(job.status, "failed")
+        self.assertEqual(job.attempts, 1)
+        self.assertEqual(job.error, "No layer for the file")
+
+    def test_result_of_requeued_job_is_not_saved(self, ingest_raster_file):
+        ingest_raster_file.return_value = {}
+        job = claim_ingest_job(worker="worker-1")
+
+        # requeued as stale and claimed by another worker while running
+        IngestJob.objects.filter(pk=job.pk).update(attempts=2, worker="worker-2")
+
+        run_ingest_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, "running")
+        self.assertEqual(job.worker, "worker-2")
+
+
+@mock.patch.dict(geomanager_settings, JOB_SETTINGS)
+class RequeueStaleIngestJobsTest(TestCase):
+    def setUp(self):
+        self.layer = create_raster_file_layer()
+
+    def create_running_job(self, name, heartbeat_age=None, started_age=None, attempts=1):
+        now = timezone.now()
+        return create_job(self.layer, name, status="running", attempts=attempts, max_attempts=3,
+                          started_at=now - timedelta(seconds=started_age or heartbeat_age or 0),
+                          heartbeat_at=now - timedelta(seconds=heartbeat_age) if heartbeat_age is not None else None)
+
+    def test_requeue_stale_jobs(self):
+        stale = self.create_running_job("stale.tif", heartbeat_age=700)
+        no_heartbeat = self.create_running_job("no-heartbeat.tif", started_age=700)
+        alive = self.create_running_job("alive.tif", heartbeat_age=60, started_age=3600)
+        no_attempts_left = self.create_running_job("last-attempt.tif", heartbeat_age=700, attempts=3)
+
+        self.assertEqual(requeue_stale_ingest_jobs(), (2, 1))
+
+        for job in (stale, no_heartbeat):
+            job.refresh_from_db()
+            self.assertEqual(job.status, "pending")
+            self.assertLessEqual(job.run_after, timezone.now())
+            self.assertTrue(job.error.startswith("Timed out"))
+
+        alive.refresh_from_db()
+        self.assertEqual(alive.status, "running")
+
+        no_attempts_left.refresh_from_db()
+        self.assertEqual(no_attempts_left.status, "failed")
+        self.assertIsNotNone(no_attempts_left.finished_at)
+
+    def test_requeued_job_is_claimed_again(self):
+        job = self.create_running_job("stale.tif", heartbeat_age=700)
+
+        requeue_stale_ingest_jobs()
+
+        claimed = claim_ingest_job()
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual(claimed.attempts, 2)
+
+    def test_pending_jobs_are_not_touched(self):
+        job = create_job(self.layer, started_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(requeue_stale_ingest_jobs(), (0, 0))
+        job.refresh_from_db()
+        self.assertEqual(job.status, "pending")
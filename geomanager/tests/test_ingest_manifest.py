@@ -0,0 +1,114 @@
+import os
+import tempfile
+
+from django.test import SimpleTestCase, TestCase
+
+from geomanager.models import IngestManifestEntry
+from geomanager.tests.helpers import create_raster_file_layer
+from geomanager.utils.ingest_manifest import IngestManifest, HashingReader, compute_file_hash, record_ingested_file
+
+
+class IngestManifestTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.layer = create_raster_file_layer()
+        self.path = os.path.join(self.tmp_dir.name, "data.tif")
+        self.write(b"raster data")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write(self, content, mtime_ns=None):
+        with open(self.path, "wb") as f:
+            f.write(content)
+        if mtime_ns is not None:
+            os.utime(self.path, ns=(mtime_ns, mtime_ns))
+
+    def record(self, content_hash=None):
+        return record_ingested_file(self.layer, self.path, os.stat(self.path), content_hash=content_hash)
+
+    def test_file_not_in_manifest(self):
+        self.assertFalse(IngestManifest(self.layer).is_unchanged(self.path))
+
+    def test_unchanged_file(self):
+        self.record()
+
+        self.assertTrue(IngestManifest(self.layer).is_unchanged(self.path))
+
+    def test_entries_of_other_layers_are_not_used(self):
+        self.record()
+
+        self.assertFalse(IngestManifest(create_raster_file_layer("Other")).is_unchanged(self.path))
+
+    def test_size_changed(self):
+        self.record(content_hash=compute_file_hash(self.path))
+        mtime_ns = os.stat(self.path).st_mtime_ns
+
+        self.write(b"more raster data", mtime_ns=mtime_ns)
+
+        self.assertFalse(IngestManifest(self.layer).is_unchanged(self.path))
+
+    def test_touched_file_with_same_content(self):
+        entry = self.record(content_hash=compute_file_hash(self.path))
+
+        self.write(b"raster data", mtime_ns=entry.mtime_ns + 10 ** 9)
+
+        self.assertTrue(IngestManifest(self.layer).is_unchanged(self.path))
+
+        # the new modified time is recorded, so that the file is not hashed again
+        entry.refresh_from_db()
+        self.assertEqual(entry.mtime_ns, os.stat(self.path).st_mtime_ns)
+
+    def test_touched_file_with_other_content(self):
+        entry = self.record(content_hash=compute_file_hash(self.path))
+
+        self.write(b"raster date", mtime_ns=entry.mtime_ns + 10 ** 9)
+
+        self.assertFalse(IngestManifest(self.layer).is_unchanged(self.path))
+
+    def test_touched_file_without_hash(self):
+        entry = self.record()
+
+        self.write(b"raster data", mtime_ns=entry.mtime_ns + 10 ** 9)
+
+        self.assertFalse(IngestManifest(self.layer).is_unchanged(self.path))
+
+    def test_record_updates_entry(self):
+        self.record()
+        self.write(b"more raster data")
+        self.record()
+
+        entry = IngestManifestEntry.objects.get(layer=self.layer)
+        self.assertEqual(entry.size, len(b"more raster data"))
+
+
+class HashingReaderTest(SimpleTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "data.tif")
+        with open(self.path, "wb") as f:
+            f.write(b"raster data" * 1000)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_hash_of_content_read(self):
+        with open(self.path, "rb") as f:
+            reader = HashingReader(f)
+            while reader.read(1024):
+                pass
+            self.assertEqual(reader.hexdigest(), compute_file_hash(self.path))
+
+    def test_partial_read(self):
+        with open(self.path, "rb") as f:
+            reader = HashingReader(f)
+            reader.read(1024)
+            self.assertIsNone(reader.hexdigest())
+
+    def test_read_again_from_start(self):
+        with open(self.path, "rb") as f:
+            reader = HashingReader(f)
+            reader.read(1024)
+            reader.seek(0)
+            reader.read()
+            self.assertEqual(reader.hexdigest(), compute_file_hash(self.path))
@@ -0,0 +1,50 @@
+import datetime
+import tempfile
+
+from django.test import SimpleTestCase
+
+from geomanager.utils.tile_store import RasterTileStore
+
+TIME = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+OTHER_TIME = datetime.datetime(2024, 1, 2, tzinfo=datetime.timezone.utc)
+
+
+class RasterTileStoreTest(SimpleTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = RasterTileStore(root=self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_put_and_get(self):
+        self.store.put(1, TIME, "style", "png", 2, 1, 3, b"tile")
+
+        self.assertEqual(self.store.get(1, TIME, "style", "png", 2, 1, 3), b"tile")
+        self.assertIsNone(self.store.get(1, TIME, "other", "png", 2, 1, 3))
+
+    def test_remove_time(self):
+        self.store.put(1, TIME, "style", "png", 0, 0, 0, b"tile")
+        self.store.put(1, OTHER_TIME, "style", "png", 0, 0, 0, b"tile")
+
+        self.store.remove_time(1, TIME)
+
+        self.assertFalse(self.store.exists(1, TIME, "style", "png", 0, 0, 0))
+        self.assertTrue(self.store.exists(1, OTHER_TIME, "style", "png", 0, 0, 0))
+
+    def test_remove_other_styles(self):
+        for time in (TIME, OTHER_TIME):
+            self.store.put(1, time, "old", "png", 0, 0, 0, b"tile")
+            self.store.put(1, time, "new", "png", 0, 0, 0, b"tile")
+        self.store.put(2, TIME, "old", "png", 0, 0, 0, b"tile")
+
+        self.store.remove_other_styles(1, "new")
+
+        for time in (TIME, OTHER_TIME):
+            self.assertFalse(self.store.exists(1, time, "old", "png", 0, 0, 0))
+            self.assertTrue(self.store.exists(1, time, "new", "png", 0, 0, 0))
+        # other layers are left alone
+        self.assertTrue(self.store.exists(2, TIME, "old", "png", 0, 0, 0))
+
+    def test_remove_other_styles_of_layer_without_tiles(self):
+        self.store.remove_other_styles(1, "new")
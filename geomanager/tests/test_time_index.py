@@ -0,0 +1,79 @@
+import datetime
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase
+
+from geomanager.utils.time_index import (
+    LayerTimeIndex,
+    TIME_MATCH_EXACT,
+    TIME_MATCH_NEAREST,
+    TIME_MATCH_PREVIOUS,
+    TIME_MATCH_NEXT,
+    parse_time,
+)
+
+
+def get_time(day, hour=0):
+    return datetime.datetime(2024, 1, day, hour, tzinfo=datetime.timezone.utc)
+
+
+class LayerTimeIndexTest(SimpleTestCase):
+    def setUp(self):
+        # out of order, the index sorts the files by time
+        self.raster_files = {day: SimpleNamespace(time=get_time(day)) for day in (5, 1, 3)}
+        self.index = LayerTimeIndex(self.raster_files.values())
+
+    def find(self, time, match):
+        raster_file = self.index.find(time, match=match)
+        return raster_file.time.day if raster_file else None
+
+    def test_latest(self):
+        self.assertIs(self.index.latest(), self.raster_files[5])
+        self.assertIsNone(LayerTimeIndex([]).latest())
+
+    def test_exact(self):
+        self.assertIs(self.index.find(get_time(3)), self.raster_files[3])
+        self.assertIsNone(self.index.find(get_time(2), match=TIME_MATCH_EXACT))
+
+    def test_exact_time_matches_all_modes(self):
+        for match in (TIME_MATCH_NEAREST, TIME_MATCH_PREVIOUS, TIME_MATCH_NEXT):
+            self.assertEqual(self.find(get_time(3), match), 3)
+
+    def test_previous(self):
+        self.assertEqual(self.find(get_time(4), TIME_MATCH_PREVIOUS), 3)
+        self.assertEqual(self.find(get_time(6), TIME_MATCH_PREVIOUS), 5)
+        self.assertIsNone(self.find(datetime.datetime(2023, 12, 31, tzinfo=datetime.timezone.utc),
+                                    TIME_MATCH_PREVIOUS))
+
+    def test_next(self):
+        self.assertEqual(self.find(get_time(2), TIME_MATCH_NEXT), 3)
+        self.assertEqual(self.find(datetime.datetime(2023, 12, 31, tzinfo=datetime.timezone.utc),
+                                   TIME_MATCH_NEXT), 1)
+        self.assertIsNone(self.find(get_time(6), TIME_MATCH_NEXT))
+
+    def test_nearest(self):
+        self.assertEqual(self.find(get_time(3, 23), TIME_MATCH_NEAREST), 3)
+        self.assertEqual(self.find(get_time(4, 1), TIME_MATCH_NEAREST), 5)
+        # halfway between two files, the earlier one
+        self.assertEqual(self.find(get_time(4), TIME_MATCH_NEAREST), 3)
+        # outside the range of the index, the closest end
+        self.assertEqual(self.find(datetime.datetime(2023, 12, 1, tzinfo=datetime.timezone.utc),
+                                   TIME_MATCH_NEAREST), 1)
+        self.assertEqual(self.find(get_time(20), TIME_MATCH_NEAREST), 5)
+
+    def test_empty_index(self):
+        index = LayerTimeIndex([])
+        for match in (TIME_MATCH_EXACT, TIME_MATCH_NEAREST, TIME_MATCH_PREVIOUS, TIME_MATCH_NEXT):
+            self.assertIsNone(index.find(get_time(1), match=match))
+
+
+class ParseTimeTest(SimpleTestCase):
+    def test_parse_time(self):
+        self.assertEqual(parse_time("2024-01-03T00:00:00.000Z"), get_time(3))
+        self.assertEqual(parse_time("2024-01-03T02:00:00+02:00"), get_time(3))
+        self.assertIsNone(parse_time("not a time"))
+        self.assertIsNone(parse_time("2024-13-45T00:00:00Z"))
+
+    def test_naive_time_is_made_aware(self):
+        parsed = parse_time("2024-01-03T00:00:00")
+        self.assertIsNotNone(parsed.tzinfo)
@@ -6,6 +6,7 @@ from rest_framework_simplejwt.views import (
 from geomanager.viewsets.aoi import AoiViewSet
 from .views import (
     RasterTileView,
+    RasterTileStackView,
     VectorTileView,
     map_view,
     RegisterView,
@@ -27,8 +28,10 @@ from .views.profile import (
 from .views.raster_file import (
     RasterDataPixelView,
     RasterDataPixelTimeseriesView,
+    RasterDataPixelBatchView,
     RasterDataGeostoreView,
-    RasterDataGeostoreTimeseriesView, raster_file_as_tile_json, RasterThumbnailView
+    RasterDataGeostoreTimeseriesView, raster_file_as_tile_json, RasterThumbnailView,
+    RasterAdminStatsTileView
 )
 from .viewsets import (
     RasterLayerRasterFileDetailViewSet,
@@ -110,10 +113,15 @@ urlpatterns = [
                   # Tiles
                   path(r'api/raster-tiles/<uuid:layer_id>/<int:z>/<int:x>/<int:y>', RasterTileView.as_view(),
                        name="raster_tiles"),
+                  path(r'api/raster-tiles/stack/<uuid:layer_id>/<int:z>/<int:x>/<int:y>', RasterTileStackView.as_view(),
+                       name="raster_tiles_stack"),
                   path(r'api/vector-tiles/<int:z>/<int:x>/<int:y>', VectorTileView.as_view(), name="vector_tiles"),
                   path(r'api/map-boundary-tiles/<str:table_name>/<int:z>/<int:x>/<int:y>',
                        AdditionalBoundaryVectorTileView.as_view(),
                        name="map_boundary_tiles"),
+                  path(r'api/raster-admin-stats-tiles/<uuid:layer_id>/<int:z>/<int:x>/<int:y>',
+                       RasterAdminStatsTileView.as_view(),
+                       name="raster_admin_stats_tiles"),
 
                   # Thumbnail
                   path(r'api/raster-file-thumbnail/<int:file_id>.png', RasterThumbnailView.as_view(),
@@ -124,6 +132,8 @@ urlpatterns = [
                        name="raster_data_pixel"),
                   path(r'api/raster-data/pixel/timeseries/<uuid:layer_id>', RasterDataPixelTimeseriesView.as_view(),
                        name="raster_data_pixel_timeseries"),
+                  path(r'api/raster-data/pixel/batch/<uuid:layer_id>', RasterDataPixelBatchView.as_view(),
+                       name="raster_data_pixel_batch"),
 
                   path(r'api/raster-data/geostore/<uuid:layer_id>', RasterDataGeostoreView.as_view(),
                        name="raster_data_geostore"),
@@ -1,5 +1,9 @@
+import contextlib
+import hashlib
 import json
 import math
+import os
+import tempfile
 from uuid import UUID
 
 from django.utils.translation import gettext_lazy as _
@@ -13,6 +17,64 @@ class UUIDEncoder(json.JSONEncoder):
         return json.JSONEncoder.default(self, obj)
 
 
+def get_style_hash(style):
+    """
+    Returns a short, stable hash for a large_image style definition.
+
+    Args:
+        style: The style as a dict, a JSON string or None.
+
+    Returns:
+        A hex digest string. Equivalent styles always produce the same hash.
+    """
+    if not style:
+        return "none"
+
+    if not isinstance(style, str):
+        style = json.dumps(style, sort_keys=True, separators=(",", ":"))
+
+    return hashlib.md5(style.encode()).hexdigest()
+
+
+def make_etag(*parts):
+    """
+    Builds a strong ETag value from the given parts, for example a file id and its modified time.
+    """
+    value = ":".join(str(part) for part in parts)
+    return hashlib.md5(value.encode()).hexdigest()
+
+
+@contextlib.contextmanager
+def atomic_write(path):
+    """
+    Yields a temporary path, in the directory of path, to write a file to. The file is moved to path once
+    the block exits without error, and removed otherwise, so that readers never see a partially written file.
+
+    Temporary files have a .tmp suffix, so that directory caches can skip them.
+    """
+    directory = os.path.dirname(str(path))
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def write_file_atomic(path, data):
+    """
+    Writes bytes to path with atomic_write
+    """
+    with atomic_write(path) as tmp_path:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+
+
 DATE_FORMAT_CHOICES = (
     ("yyyy-MM-dd HH:mm", _("Hour minute:second - (E.g 2023-01-01 00:00)")),
     ("yyyy-MM-dd", _("Day - (E.g 2023-01-01)")),
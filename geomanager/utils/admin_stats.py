@@ -0,0 +1,153 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from adminboundarymanager.models import AdminBoundary
+from django.db import close_old_connections, connection, transaction
+from django_large_image.utilities import field_file_to_local_path
+from shapely import wkb
+
+from geomanager.models import LayerRasterFile, RasterAdminBoundaryStats
+from geomanager.settings import geomanager_settings
+from geomanager.utils.cache_namespace import bump_cache_namespaces, layer_cache_namespace
+from geomanager.utils.zonal_stats import iter_geometries_zonal_stats
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_admin_boundary_filter(data_source, gid_0, gid_1=None, gid_2=None):
+    """
+    Returns the AdminBoundary filter for an admin unit given by its country, region and sub region ids
+    """
+    boundary_filter = {
+        "gid_0": gid_0,
+        "level": 0
+    }
+
+    if data_source != "gadm41":
+        if gid_1:
+            boundary_filter.update({"gid_1": gid_1, "level": 1})
+        if gid_2:
+            boundary_filter.update({"gid_2": gid_2, "level": 2})
+    else:
+        if gid_1:
+            boundary_filter.update({"gid_1": f"{gid_0}.{gid_1}_1", "level": 1})
+        if gid_2:
+            boundary_filter.update({"gid_2": f"{gid_0}.{gid_1}.{gid_2}_1", "level": 2})
+
+    return boundary_filter
+
+
+def get_admin_boundary_gid(boundary):
+    return getattr(boundary, f"gid_{boundary.level}")
+
+
+def get_geostore_admin_unit(geostore, data_source):
+    """
+    Returns the (level, gid) of the admin unit a geostore was created from, or None for other geostores
+    """
+    if not geostore.iso:
+        return None
+
+    boundary_filter = get_admin_boundary_filter(data_source, geostore.iso, geostore.id1, geostore.id2)
+    level = boundary_filter["level"]
+
+    return level, boundary_filter[f"gid_{level}"]
+
+
+def get_raster_files_admin_stats(raster_files, geostore, data_source):
+    """
+    Returns a dict of raster file time to the precomputed stats for the admin unit of the geostore,
+    for the raster files that have them
+    """
+    admin_unit = get_geostore_admin_unit(geostore, data_source)
+    if admin_unit is None:
+        return {}
+
+    level, gid = admin_unit
+    stats = RasterAdminBoundaryStats.objects.filter(raster_file__in=[raster_file.pk for raster_file in raster_files],
+                                                    level=level, gid=gid)
+
+    return {admin_stats.time: admin_stats for admin_stats in stats}
+
+
+def compute_raster_file_admin_stats(raster_file):
+    """
+    Computes the zonal statistics of a raster file for every admin boundary unit of the configured levels,
+    replacing any existing stats for the raster file time. The units are computed on the zonal stats process pool.
+    """
+    file_path = field_file_to_local_path(raster_file.file)
+    levels = geomanager_settings.get("raster_admin_stats_levels")
+    boundaries = list(AdminBoundary.objects.filter(level__in=levels)
+                      .only("id", "level", "gid_0", "gid_1", "gid_2", "geom"))
+    geoms = (wkb.loads(boundary.geom.hex) for boundary in boundaries)
+
+    stats = []
+
+    for boundary, zonal_stats in zip(boundaries, iter_geometries_zonal_stats(file_path, geoms)):
+
+        stats.append(RasterAdminBoundaryStats(
+            layer_id=raster_file.layer_id,
+            raster_file=raster_file,
+            time=raster_file.time,
+            level=boundary.level,
+            gid=get_admin_boundary_gid(boundary),
+            boundary_id=boundary.pk,
+            count=zonal_stats.count,
+            mean=zonal_stats.mean,
+            min=zonal_stats.min,
+            max=zonal_stats.max,
+            sum=zonal_stats.sum if zonal_stats.count else None,
+        ))
+
+    with transaction.atomic():
+        RasterAdminBoundaryStats.objects.filter(layer_id=raster_file.layer_id, time=raster_file.time).delete()
+        RasterAdminBoundaryStats.objects.bulk_create(stats, batch_size=1000)
+
+    # cached geostore and choropleth responses for the layer may have been computed without the stats
+    bump_cache_namespaces(layer_cache_namespace(raster_file.layer_id))
+
+    return len(stats)
+
+
+def get_admin_stats_executor():
+    """
+    Returns the thread pool that runs admin boundary stats jobs in the background, sized by
+    GEOMANAGER_RASTER_ADMIN_STATS_WORKERS. The threads only wait for the zonal stats process pool
+    and save the results.
+    """
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=geomanager_settings.get("raster_admin_stats_workers"),
+                                           thread_name_prefix="geomanager-admin-stats")
+    return _executor
+
+
+def _compute_admin_stats_job(raster_file_id):
+    close_old_connections()
+    try:
+        raster_file = LayerRasterFile.objects.filter(pk=raster_file_id).first()
+        if raster_file:
+            count = compute_raster_file_admin_stats(raster_file)
+            logger.info(f"[GEOMANAGER_ADMIN_STATS]: Computed stats for {count} admin units for {raster_file}")
+    except Exception as e:
+        logger.error(f"[GEOMANAGER_ADMIN_STATS]: Error computing admin stats for raster file {raster_file_id}: {e}")
+    finally:
+        connection.close()
+
+
+def schedule_raster_file_admin_stats(raster_file):
+    """
+    Computes the admin boundary stats of a raster file in the background, once the current transaction commits.
+    Stats that are lost, e.g. when the process exits first, are computed by compute_geomanager_admin_stats.
+    """
+    if not geomanager_settings.get("raster_admin_stats_levels"):
+        return
+
+    raster_file_id = raster_file.pk
+    transaction.on_commit(lambda: get_admin_stats_executor().submit(_compute_admin_stats_job, raster_file_id))
@@ -0,0 +1,69 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+
+CACHE_NAMESPACE_KEY_PREFIX = "geomanager-cache-ns"
+
+# query string param added to the cache key of namespaced cache_page views
+CACHE_NAMESPACE_PARAM = "_cache_ns"
+
+
+def layer_cache_namespace(layer_id):
+    return f"layer:{layer_id}"
+
+
+def table_cache_namespace(table_name):
+    return f"table:{table_name}"
+
+
+def mbt_source_cache_namespace(source_slug):
+    return f"mbtsource:{source_slug}"
+
+
+def _get_version_key(namespace):
+    return f"{CACHE_NAMESPACE_KEY_PREFIX}:{namespace}"
+
+
+def _new_version():
+    # time based, so that a version key evicted from the cache never comes back with an old value
+    return time.time_ns() // 1000
+
+
+def get_cache_namespace_versions(namespaces):
+    """
+    Returns a dict of namespace to its current version, creating versions for new namespaces
+    """
+    keys = {_get_version_key(namespace): namespace for namespace in namespaces}
+    versions = cache.get_many(keys.keys())
+
+    for key, namespace in keys.items():
+        if key not in versions:
+            version = _new_version()
+            if not cache.add(key, version, None):
+                version = cache.get(key, version)
+            versions[key] = version
+
+    return {namespace: versions[key] for key, namespace in keys.items()}
+
+
+def get_cache_namespaces_token(namespaces):
+    """
+    Returns a short token that changes whenever any of the namespaces is bumped
+    """
+    versions = get_cache_namespace_versions(namespaces)
+    value = ";".join(f"{namespace}={versions[namespace]}" for namespace in sorted(versions))
+
+    return hashlib.md5(value.encode()).hexdigest()[:12]
+
+
+def bump_cache_namespaces(*namespaces):
+    """
+    Invalidates all cached responses in the given namespaces, by moving them to a new version
+    """
+    for namespace in namespaces:
+        key = _get_version_key(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), None)
@@ -0,0 +1,89 @@
+import functools
+import io
+
+import numpy as np
+from matplotlib.colors import to_rgba_array
+from PIL import Image
+
+LUT_SIZE = 256
+
+# index of the max value, the same scale as RasterStyle.scale_value
+LUT_MAX_INDEX = 254
+
+
+class CompiledRasterStyle:
+    """
+    A RasterStyle compiled into a NumPy lookup table.
+
+    Values are scaled linearly from [min, max] to lookup table entries 0 to 254, with the scale of
+    RasterStyle.scale_value, matching the 'discrete' scheme used for the large_image style json.
+    Colorizing a band is then a single vectorized index operation instead of large_image parsing
+    the palette for every tile.
+    """
+
+    def __init__(self, min_value, max_value, lut, version=None):
+        self.min_value = float(min_value)
+        self.max_value = float(max_value)
+        self.lut = lut
+        self.version = version
+
+    @classmethod
+    def from_palette(cls, min_value, max_value, palette, version=None):
+        colors = (to_rgba_array(palette) * 255).round().astype(np.uint8)
+
+        # spread the palette colors evenly across the entries from min to max
+        indexes = np.minimum((np.arange(LUT_SIZE) * len(colors)) // (LUT_MAX_INDEX + 1), len(colors) - 1)
+        lut = colors[indexes]
+
+        return cls(min_value, max_value, lut, version=version)
+
+    def get_indexes(self, values):
+        value_range = self.max_value - self.min_value
+        if value_range == 0:
+            value_range = 0.1
+
+        scaled = (values.astype(np.float64) - self.min_value) * (LUT_MAX_INDEX / value_range)
+        scaled = np.nan_to_num(scaled, nan=0, posinf=LUT_MAX_INDEX, neginf=0)
+
+        return np.clip(scaled, 0, LUT_MAX_INDEX).astype(np.uint8)
+
+    def apply(self, values, mask=None):
+        """
+        Colorizes a 2D array of values
+
+        Args:
+            values: 2D array of band values.
+            mask: Optional boolean array, True where the pixel has no data.
+
+        Returns:
+            An RGBA uint8 array of shape (height, width, 4). No data pixels are fully transparent.
+        """
+        rgba = self.lut[self.get_indexes(values)]
+
+        no_data = np.isnan(values) if np.issubdtype(values.dtype, np.floating) else None
+        if mask is not None:
+            no_data = mask if no_data is None else (no_data | mask)
+
+        if no_data is not None:
+            rgba[no_data] = 0
+
+        return rgba
+
+    def render_png(self, values, mask=None):
+        rgba = self.apply(values, mask=mask)
+
+        buffer = io.BytesIO()
+        Image.fromarray(rgba, "RGBA").save(buffer, format="PNG")
+
+        return buffer.getvalue()
+
+
+@functools.lru_cache(maxsize=8)
+def get_empty_png(width=256, height=256):
+    """
+    Returns a fully transparent PNG, shared by all tiles that have no data
+    """
+    buffer = io.BytesIO()
+    Image.new("RGBA", (width, height), (0, 0, 0, 0)).save(buffer, format="PNG")
+
+    return buffer.getvalue()
@@ -0,0 +1,290 @@
+import json
+import logging
+import os
+
+import netCDF4
+import numpy as np
+import rasterio as rio
+from affine import Affine
+from django.conf import settings
+from django_large_image.utilities import get_file_lock
+from rasterio.features import geometry_mask
+from rasterio.windows import from_bounds
+
+from geomanager.errors import DataCubeGridMismatch
+from geomanager.settings import geomanager_settings
+
+logger = logging.getLogger(__name__)
+
+TIME_UNITS = "seconds since 1970-01-01 00:00:00"
+
+
+def get_datacube_dir():
+    datacube_dir = geomanager_settings.get("raster_datacube_dir")
+    if datacube_dir:
+        return str(datacube_dir)
+    return os.path.join(settings.MEDIA_ROOT, "raster_datacubes")
+
+
+class RasterDataCube:
+    """
+    All timesteps of a raster file layer stored as one chunked, compressed NetCDF4 cube.
+
+    Values are stored as float32 in a (time, y, x) variable, with no data as NaN. Chunks span several
+    timesteps and a small spatial block, so that a timeseries for a point or an area reads a few chunks
+    instead of opening one file per timestep. The grid of the cube is the grid of the first timestep
+    written, and later timesteps must match it.
+
+    The cube is written in place, so reads and writes are serialized with the file lock of the cube.
+    Removed timesteps are masked, with a NaN time, and their slot is reused by the next timestep written.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+
+    @classmethod
+    def for_layer(cls, layer_id):
+        return cls(os.path.join(get_datacube_dir(), f"{layer_id}.nc"))
+
+    def exists(self):
+        return os.path.isfile(self.path)
+
+    def remove(self):
+        if self.exists():
+            os.remove(self.path)
+
+    @staticmethod
+    def time_value(time):
+        return time.timestamp()
+
+    def _create(self, height, width, transform, crs):
+        chunks = geomanager_settings.get("raster_datacube_chunks")
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        ds = netCDF4.Dataset(self.path, "w", format="NETCDF4")
+        ds.createDimension("time", None)
+        ds.createDimension("y", height)
+        ds.createDimension("x", width)
+
+        time_var = ds.createVariable("time", "f8", ("time",))
+        time_var.units = TIME_UNITS
+        time_var.calendar = "standard"
+
+        chunk_sizes = (chunks.get("time", 32), min(chunks.get("y", 64), height), min(chunks.get("x", 64), width))
+        ds.createVariable("values", "f4", ("time", "y", "x"), zlib=True, complevel=4, shuffle=True,
+                          chunksizes=chunk_sizes, fill_value=np.nan)
+
+        ds.transform = json.dumps(list(transform)[:6])
+        ds.crs = crs.to_wkt() if crs else ""
+
+        return ds
+
+    def _check_grid(self, ds, height, width, transform):
+        cube_transform = Affine(*json.loads(ds.transform))
+        same_shape = ds.dimensions["y"].size == height and ds.dimensions["x"].size == width
+
+        if not same_shape or not cube_transform.almost_equals(transform):
+            raise DataCubeGridMismatch(f"Raster grid does not match the grid of the datacube: {self.path}")
+
+    def write_timestep(self, time, file_path):
+        """
+        Writes band 1 of a raster file as the given timestep, replacing the timestep if it exists
+        """
+        with rio.open(str(file_path)) as src:
+            data = src.read(1, masked=True).astype(np.float32).filled(np.nan)
+            transform = src.transform
+            crs = src.crs
+
+        height, width = data.shape
+        time_value = self.time_value(time)
+
+        with get_file_lock(self.path).acquire():
+            if self.exists():
+                ds = netCDF4.Dataset(self.path, "a")
+            else:
+                ds = self._create(height, width, transform, crs)
+
+            try:
+                self._check_grid(ds, height, width, transform)
+
+                time_var = ds.variables["time"]
+                cube_times = np.ma.filled(time_var[:], np.nan)
+                existing = np.nonzero(cube_times == time_value)[0]
+                if not len(existing):
+                    # reuse the slot of a removed timestep
+                    existing = np.nonzero(np.isnan(cube_times))[0]
+                index = int(existing[0]) if len(existing) else len(time_var)
+
+                time_var[index] = time_value
+                ds.variables["values"][index, :, :] = data
+            finally:
+                ds.close()
+
+    def remove_timestep(self, time):
+        """
+        Masks a timestep, so that it is no longer read. Does nothing if the timestep is not in the cube.
+        """
+        if not self.exists():
+            return
+
+        time_value = self.time_value(time)
+
+        with get_file_lock(self.path).acquire():
+            with netCDF4.Dataset(self.path, "a") as ds:
+                time_var = ds.variables["time"]
+                for index in np.nonzero(np.ma.filled(time_var[:], np.nan) == time_value)[0]:
+                    time_var[index] = np.nan
+                    ds.variables["values"][index, :, :] = np.nan
+
+    def _get_time_indexes(self, ds, times):
+        cube_times = ds.variables["time"][:]
+        positions = {float(value): index for index, value in enumerate(np.ma.filled(cube_times, np.nan))}
+
+        indexes = {}
+        for time in times:
+            index = positions.get(self.time_value(time))
+            if index is not None:
+                indexes[time] = index
+        return indexes
+
+    @staticmethod
+    def _read_runs(variable, indexes, rows, cols, max_steps=None):
+        """
+        Reads the values for the given time indexes in runs of contiguous indexes, of at most max_steps timesteps,
+        so that the timesteps between the requested ones are never read. Yields (index, values) in index order.
+        """
+        def read_run(run):
+            slab = np.ma.filled(variable[run[0]:run[-1] + 1, rows, cols], np.nan)
+            for position, index in enumerate(run):
+                yield index, slab[position]
+
+        run = []
+        for index in sorted(set(indexes)):
+            if run and (index != run[-1] + 1 or (max_steps and len(run) >= max_steps)):
+                yield from read_run(run)
+                run = []
+            run.append(index)
+
+        if run:
+            yield from read_run(run)
+
+    def read_pixel_timeseries(self, times, x_coord, y_coord):
+        """
+        Returns a dict of time to the value at the coordinates, for the times that are in the cube
+        """
+        with get_file_lock(self.path).acquire(), netCDF4.Dataset(self.path, "r") as ds:
+            transform = Affine(*json.loads(ds.transform))
+            row, col = rio.transform.rowcol(transform, x_coord, y_coord)
+
+            if not (0 <= row < ds.dimensions["y"].size and 0 <= col < ds.dimensions["x"].size):
+                return {time: None for time in times}
+
+            indexes = self._get_time_indexes(ds, times)
+            if not indexes:
+                return {}
+
+            values = dict(self._read_runs(ds.variables["values"], indexes.values(), row, col))
+
+        return {time: None if np.isnan(values[index]) else float(values[index]) for time, index in indexes.items()}
+
+    def read_geometry_timeseries(self, times, geom):
+        """
+        Returns a dict of time to the no data free values within a shapely geometry, for the times that are in
+        the cube. Only the window covering the geometry bounds is read, for at most
+        GEOMANAGER_RASTER_DATACUBE_MAX_READ_CELLS window cells across timesteps at a time.
+        """
+        with get_file_lock(self.path).acquire(), netCDF4.Dataset(self.path, "r") as ds:
+            transform = Affine(*json.loads(ds.transform))
+            height, width = ds.dimensions["y"].size, ds.dimensions["x"].size
+
+            window = from_bounds(*geom.bounds, transform=transform).round_offsets().round_lengths()
+            row_off, col_off = int(window.row_off), int(window.col_off)
+            row_start, col_start = max(0, row_off), max(0, col_off)
+            row_stop = min(height, row_off + int(window.height) + 1)
+            col_stop = min(width, col_off + int(window.width) + 1)
+
+            indexes = self._get_time_indexes(ds, times)
+
+            if row_start >= row_stop or col_start >= col_stop:
+                return {time: np.array([], dtype=np.float32) for time in indexes}
+
+            if not indexes:
+                return {}
+
+            window_shape = (row_stop - row_start, col_stop - col_start)
+            window_transform = transform * Affine.translation(col_start, row_start)
+            inside = geometry_mask([geom], out_shape=window_shape, transform=window_transform, invert=True)
+
+            max_cells = geomanager_settings.get("raster_datacube_max_read_cells")
+            max_steps = max(1, max_cells // (window_shape[0] * window_shape[1]))
+
+            values_by_index = {}
+            for index, values in self._read_runs(ds.variables["values"], indexes.values(),
+                                                 slice(row_start, row_stop), slice(col_start, col_stop),
+                                                 max_steps=max_steps):
+                values = values[inside]
+                values_by_index[index] = values[~np.isnan(values)]
+
+        return {time: values_by_index[index] for time, index in indexes.items()}
+
+
+def write_raster_file_to_datacube(raster_file, file_path):
+    """
+    Adds a raster file to the datacube of its layer, if the layer uses the datacube storage mode
+    """
+    if raster_file.layer.storage_mode != "datacube":
+        return
+
+    cube = RasterDataCube.for_layer(raster_file.layer_id)
+
+    try:
+        cube.write_timestep(raster_file.time, file_path)
+    except Exception as e:
+        logger.error(f"[GEOMANAGER_DATACUBE]: Error writing {raster_file} to datacube: {e}")
+        # a previous slice for this time would be served instead of the new file
+        remove_datacube_timestep(raster_file.layer_id, raster_file.time)
+
+
+def remove_datacube_timestep(layer_id, time):
+    """
+    Removes a timestep from the layer datacube, e.g. when its raster file is deleted
+    """
+    cube = RasterDataCube.for_layer(layer_id)
+
+    try:
+        cube.remove_timestep(time)
+    except Exception as e:
+        logger.error(f"[GEOMANAGER_DATACUBE]: Error removing time {time} from {cube.path}: {e}")
+
+
+def read_datacube_pixel_timeseries(layer_id, times, x_coord, y_coord):
+    """
+    Returns a dict of time to pixel value from the layer datacube. Times missing from the datacube,
+    or all times if the datacube can not be read, are left out so that they can be read from the raster files.
+    """
+    cube = RasterDataCube.for_layer(layer_id)
+    if not cube.exists():
+        return {}
+
+    try:
+        return cube.read_pixel_timeseries(times, x_coord, y_coord)
+    except Exception as e:
+        logger.warning(f"[GEOMANAGER_DATACUBE]: Error reading pixel timeseries from {cube.path}: {e}")
+        return {}
+
+
+def read_datacube_geometry_timeseries(layer_id, times, geom):
+    """
+    Returns a dict of time to the values within a shapely geometry from the layer datacube.
+    Like read_datacube_pixel_timeseries, times that can not be read from the datacube are left out.
+    """
+    cube = RasterDataCube.for_layer(layer_id)
+    if not cube.exists():
+        return {}
+
+    try:
+        return cube.read_geometry_timeseries(times, geom)
+    except Exception as e:
+        logger.warning(f"[GEOMANAGER_DATACUBE]: Error reading geometry timeseries from {cube.path}: {e}")
+        return {}
@@ -0,0 +1,142 @@
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# files used within this many seconds are never trimmed, as they may be about to be opened
+RECENTLY_USED_SECONDS = 10
+
+
+class SizeBoundedDirectoryCache:
+    """
+    Files cached in a directory, bounded by the total size of the files.
+
+    Files are touched when used, so that trimming evicts the least recently used files first. The size of
+    the cache is tracked in process, and recomputed from disk when trimming. Computing the size and trimming
+    list the whole directory, so both run in a background thread when triggered by a write.
+
+    Subclasses list the cached files in iter_paths.
+    """
+    name = "directory-cache"
+    log_prefix = "[DIRECTORY_CACHE]"
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._size = None
+        self._lock = threading.Lock()
+        self._trim_thread = None
+
+    def iter_paths(self):
+        raise NotImplementedError
+
+    def get_used_time(self, stat):
+        return stat.st_mtime
+
+    def touch(self, path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def record_write(self, size):
+        """
+        Records size bytes written to the cache, trimming it in the background if it is above its budget
+        """
+        with self._lock:
+            # the size is unknown until the first trim has listed the directory
+            if self._size is not None:
+                self._size += size
+            needs_trim = self._size is None or self._size > self.max_bytes
+
+        if needs_trim:
+            self.schedule_trim()
+
+    def schedule_trim(self):
+        """
+        Trims the cache in a background thread, unless a trim is already running
+        """
+        with self._lock:
+            if self._trim_thread is not None and self._trim_thread.is_alive():
+                return
+            self._trim_thread = threading.Thread(target=self._run_trim, name=f"geomanager-{self.name}-trim",
+                                                 daemon=True)
+            self._trim_thread.start()
+
+    def _run_trim(self):
+        try:
+            self.trim()
+        except Exception as e:
+            logger.warning(f"{self.log_prefix}: Error trimming cache: {e}")
+
+    def _list_files(self, paths=None):
+        files = []
+        for path in self.iter_paths() if paths is None else paths:
+            # files being written
+            if str(path).endswith(".tmp"):
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if os.path.isfile(path):
+                files.append((self.get_used_time(stat), stat.st_size, path))
+        return files
+
+    def get_usage(self):
+        """
+        Returns a tuple of (total bytes, number of files) in the cache
+        """
+        files = self._list_files()
+        return sum(size for _, size, _ in files), len(files)
+
+    def trim(self, max_bytes=None, min_age=RECENTLY_USED_SECONDS):
+        """
+        Removes the least recently used files until the cache is below 90% of max_bytes. Files used within
+        the last min_age seconds are kept. Returns a tuple of (bytes removed, files removed).
+        """
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+
+        target = int(max_bytes * 0.9)
+        files = sorted(self._list_files())
+        size = sum(file_size for _, file_size, _ in files)
+        used_before = time.time() - min_age
+        removed_bytes = removed_files = 0
+
+        for used_at, file_size, path in files:
+            # files are sorted by last use, the remaining ones have all been used recently
+            if size <= target or used_at > used_before:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            size -= file_size
+            removed_bytes += file_size
+            removed_files += 1
+
+        with self._lock:
+            self._size = size
+
+        if removed_files:
+            logger.info(f"{self.log_prefix}: Removed {removed_files} files ({removed_bytes} bytes)")
+
+        return removed_bytes, removed_files
+
+    def clear(self):
+        return self.trim(max_bytes=0, min_age=0)
+
+    def _remove_files(self, files):
+        removed = 0
+        for _, file_size, path in files:
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            removed += file_size
+
+        with self._lock:
+            if self._size is not None:
+                self._size = max(0, self._size - removed)
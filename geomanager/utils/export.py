@@ -0,0 +1,166 @@
+import csv
+import datetime
+import io
+import logging
+
+from django.http import StreamingHttpResponse
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+EXPORT_FORMAT_CSV = "csv"
+EXPORT_FORMAT_PARQUET = "parquet"
+
+EXPORT_CONTENT_TYPES = {
+    EXPORT_FORMAT_CSV: "text/csv",
+    EXPORT_FORMAT_PARQUET: "application/vnd.apache.parquet",
+}
+
+logger = logging.getLogger(__name__)
+
+# written as the last line of a CSV export that failed part way, after the response has started
+CSV_EXPORT_ERROR_MARKER = "# ERROR: export failed, the data above is incomplete\n"
+
+# number of rows written per parquet row group, each row group is sent as soon as it is complete
+PARQUET_ROW_GROUP_SIZE = 1000
+
+
+def get_export_formats():
+    """
+    Returns the available export formats. Parquet requires pyarrow to be installed.
+    """
+    if pa is None:
+        return [EXPORT_FORMAT_CSV]
+    return [EXPORT_FORMAT_CSV, EXPORT_FORMAT_PARQUET]
+
+
+def format_csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+
+def iter_csv(rows, columns):
+    """
+    Yields CSV text for rows, an iterable of dicts, one line at a time. columns is a dict of column name to type.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return data
+
+    writer.writerow(columns.keys())
+    yield flush()
+
+    for row in rows:
+        writer.writerow([format_csv_value(row.get(column)) for column in columns])
+        yield flush()
+
+
+class ChunkBuffer(io.RawIOBase):
+    """
+    Write only file object that keeps the written bytes until they are drained
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def get_arrow_type(column_type):
+    if column_type == "timestamp":
+        return pa.timestamp("us", tz="UTC")
+    if column_type == "float":
+        return pa.float64()
+    return pa.string()
+
+
+def iter_parquet(rows, columns):
+    """
+    Yields a Parquet file for rows, an iterable of dicts, in row groups of PARQUET_ROW_GROUP_SIZE rows.
+    columns is a dict of column name to type, one of 'timestamp', 'float' or 'string'.
+    """
+    schema = pa.schema([(column, get_arrow_type(column_type)) for column, column_type in columns.items()])
+    sink = ChunkBuffer()
+    writer = pq.ParquetWriter(sink, schema)
+
+    def write_batch(batch):
+        arrays = [pa.array([row.get(column) for row in batch], type=schema.field(column).type) for column in columns]
+        writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= PARQUET_ROW_GROUP_SIZE:
+            write_batch(batch)
+            batch = []
+            yield sink.drain()
+
+    if batch:
+        write_batch(batch)
+
+    writer.close()
+    yield sink.drain()
+
+
+def iter_export_content(content, export_format, filename):
+    """
+    Passes through the chunks of an export, and fails the stream explicitly if computing a row raises.
+
+    The response status has already been sent by then, so a CSV export gets an error marker line and the
+    error is raised again, which aborts the response instead of ending it as if the export was complete.
+    A Parquet export is not readable without its footer, and is only aborted.
+    """
+    try:
+        yield from content
+    except Exception:
+        logger.exception(f"Export of {filename}.{export_format} failed after the response started")
+        if export_format == EXPORT_FORMAT_CSV:
+            yield CSV_EXPORT_ERROR_MARKER
+        raise
+
+
+def export_response(rows, columns, export_format, filename):
+    """
+    Returns a StreamingHttpResponse that downloads rows as export_format, computing the rows as they are sent.
+    Lookups that can fail should be done before, so that their errors get a proper error response.
+    """
+    if export_format == EXPORT_FORMAT_PARQUET:
+        content = iter_parquet(rows, columns)
+    else:
+        content = iter_csv(rows, columns)
+
+    content = iter_export_content(content, export_format, filename)
+
+    response = StreamingHttpResponse(content, content_type=EXPORT_CONTENT_TYPES[export_format])
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{export_format}"'
+
+    return response
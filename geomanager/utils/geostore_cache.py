@@ -0,0 +1,72 @@
+import os
+import pathlib
+import shutil
+
+from django_large_image.utilities import get_cache_dir
+
+from geomanager.settings import geomanager_settings
+from geomanager.utils.directory_cache import SizeBoundedDirectoryCache
+
+GEOSTORE_CACHE_DIR_NAME = "geostore"
+
+
+class GeostoreClipCache(SizeBoundedDirectoryCache):
+    """
+    Raster files clipped to geostores, stored under the django-large-image cache directory as
+    <cache dir>/<Model>-<pk>/geostore/<geostore id>-<file name>, bounded by the total size of the files.
+
+    Files are touched when used, so that trimming evicts the least recently used clips first.
+    """
+    name = "geostore-cache"
+    log_prefix = "[GEOSTORE_CACHE]"
+
+    @property
+    def root(self):
+        return get_cache_dir()
+
+    def get_instance_dir_name(self, instance):
+        return f"{type(instance).__name__}-{instance.pk}"
+
+    def get_path(self, field_file, geostore):
+        field_file_basename = pathlib.PurePath(field_file.name).name
+        directory = self.root / self.get_instance_dir_name(field_file.instance) / GEOSTORE_CACHE_DIR_NAME
+        return directory / f"{geostore.pk.hex}-{field_file_basename}"
+
+    def add(self, path):
+        """
+        Records a newly written clip, trimming the cache in the background if it is above its budget
+        """
+        if not self.max_bytes:
+            return
+
+        try:
+            file_size = os.path.getsize(path)
+        except OSError:
+            return
+
+        self.record_write(file_size)
+
+    def iter_paths(self, pattern=f"*/{GEOSTORE_CACHE_DIR_NAME}/*"):
+        return self.root.glob(pattern)
+
+    def get_used_time(self, stat):
+        return max(stat.st_atime, stat.st_mtime)
+
+    def remove_for_instance(self, instance):
+        """
+        Removes all clips of the file of a model instance, e.g. a LayerRasterFile
+        """
+        dir_name = self.get_instance_dir_name(instance)
+        paths = self.iter_paths(pattern=f"{dir_name}/{GEOSTORE_CACHE_DIR_NAME}/*")
+        self._remove_files(self._list_files(paths))
+        shutil.rmtree(self.root / dir_name / GEOSTORE_CACHE_DIR_NAME, ignore_errors=True)
+
+    def remove_for_geostore(self, geostore):
+        """
+        Removes all clips of a geostore
+        """
+        paths = self.iter_paths(pattern=f"*/{GEOSTORE_CACHE_DIR_NAME}/{geostore.pk.hex}-*")
+        self._remove_files(self._list_files(paths))
+
+
+geostore_clip_cache = GeostoreClipCache(max_bytes=geomanager_settings.get("geostore_clip_cache_max_bytes"))
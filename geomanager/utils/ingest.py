@@ -1,13 +1,19 @@
 import logging
+import math
+import multiprocessing
 import os
 import re
 import tempfile
+import threading
 import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
 from os.path import splitext, isfile
 
 from geomanager.settings import geomanager_settings
 
+import django
 import pytz
 from adminboundarymanager.models import AdminBoundarySettings, AdminBoundary
 from dateutil.parser import isoparse
@@ -17,8 +23,13 @@ from shapely import wkb
 from wagtail.models import Site
 
 from geomanager.models import RasterUpload, LayerRasterFile, RasterFileLayer
+from geomanager.utils.ingest_manifest import HashingReader, record_ingested_file
 from geomanager.utils.raster_utils import (
     create_layer_raster_file,
+    prepare_layer_raster_file,
+    create_raster_file_derived_data,
+    invalidate_layer_raster_files,
+    convert_netcdf_to_geotiffs,
     read_raster_info,
     bounds_to_polygon,
     check_raster_bounds_with_boundary,
@@ -31,6 +42,9 @@ logger.setLevel(logging.INFO)
 
 ALLOWED_RASTER_FILE_EXTENSIONS = ['.tif', '.nc']
 
+_executor = None
+_executor_lock = threading.Lock()
+
 
 class IngestException(Exception):
     def __init__(self, message):
@@ -154,17 +168,209 @@ def create_raster(layer_obj, upload, time, overwrite=False, band_index=None, dat
         create_layer_raster_file(layer_obj, upload, time, band_index=band_index, data_variable=data_variable)
 
 
+def get_ingest_executor():
+    """
+    Returns the process pool used to convert raster files at ingest, sized by GEOMANAGER_RASTER_INGEST_WORKERS
+    and shared by all ingest threads of this process, e.g. the auto ingest daemon and ingest job workers.
+
+    Workers are spawned rather than forked, since the processes ingesting files run other threads.
+    """
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=geomanager_settings.get("raster_ingest_workers"),
+                                            mp_context=multiprocessing.get_context("spawn"),
+                                            initializer=django.setup)
+    return _executor
+
+
+def reset_ingest_executor(executor):
+    global _executor
+
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def convert_netcdf_chunk(file_path, metadata, timesteps, data_variable=None):
+    try:
+        return convert_netcdf_to_geotiffs(file_path, metadata, timesteps, data_variable=data_variable)
+    except Exception as e:
+        return [(band_index, str(e)) for band_index, _ in timesteps]
+
+
+def convert_netcdf_timesteps(file_path, metadata, timesteps, data_variable=None, workers=1):
+    """
+    Converts timesteps of a NetCDF file to COGs. The timesteps are split into one contiguous chunk per worker,
+    and each chunk is converted in a single pass over the dataset, opening the file once per chunk.
+    Chunks are converted on the shared ingest process pool, so that concurrent ingests share its workers.
+
+    Args:
+        timesteps: List of (band_index, out_file_path) tuples.
+
+    Returns:
+        A list of (band_index, error) tuples, with None as error for the timesteps that were converted.
+    """
+    if workers <= 1 or len(timesteps) <= 1:
+        return convert_netcdf_chunk(file_path, metadata, timesteps, data_variable=data_variable)
+
+    chunk_size = math.ceil(len(timesteps) / workers)
+    chunks = [timesteps[i:i + chunk_size] for i in range(0, len(timesteps), chunk_size)]
+
+    executor = get_ingest_executor()
+
+    try:
+        futures = {executor.submit(convert_netcdf_to_geotiffs, file_path, metadata, chunk,
+                                   data_variable=data_variable): chunk for chunk in chunks}
+    except (BrokenProcessPool, RuntimeError):
+        reset_ingest_executor(executor)
+        futures = {}
+
+    results = []
+    retry_chunks = [] if futures else chunks
+
+    for future in as_completed(futures):
+        try:
+            results.extend(future.result())
+        except BrokenProcessPool:
+            retry_chunks.append(futures[future])
+        except Exception as e:
+            results.extend((band_index, str(e)) for band_index, _ in futures[future])
+
+    if retry_chunks:
+        # a worker died, e.g. killed for using too much memory. Replace the pool and convert the rest here
+        logger.warning('[GEOMANAGER_AUTO_INGEST]: Ingest process pool broken, converting in process')
+        reset_ingest_executor(executor)
+        for chunk in retry_chunks:
+            results.extend(convert_netcdf_chunk(file_path, metadata, chunk, data_variable=data_variable))
+
+    return results
+
+
+def create_netcdf_rasters(layer_obj, upload, timesteps, overwrite=False, data_variable=None, workers=None):
+    """
+    Creates raster files for many timesteps of a NetCDF upload. The timesteps are converted to COGs
+    in a few passes over the dataset, split across worker processes. The files are then saved, their rows
+    inserted in one short transaction, and their derived data created once it commits.
+
+    Args:
+        timesteps: List of (band_index, time) tuples.
+        workers: Number of worker processes, GEOMANAGER_RASTER_INGEST_WORKERS by default.
+
+    Returns:
+        A dict of time to error message, for the timesteps that failed.
+    """
+    if workers is None:
+        workers = geomanager_settings.get("raster_ingest_workers")
+
+    times = [time for _, time in timesteps]
+    existing_times = set(LayerRasterFile.objects.filter(layer=layer_obj, time__in=times).values_list("time", flat=True))
+
+    if not overwrite:
+        for time in existing_times:
+            logger.warning(f'LayerRasterFile for layer: {layer_obj.pk} and time: {time} already exists.')
+        timesteps = [(band_index, time) for band_index, time in timesteps if time not in existing_times]
+
+    failures = {}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        times_by_band = {band_index: time for band_index, time in timesteps}
+        out_file_paths = {band_index: os.path.join(tmp_dir, f"{band_index}.tif") for band_index, _ in timesteps}
+
+        results = convert_netcdf_timesteps(upload.file.path, upload.raster_metadata, list(out_file_paths.items()),
+                                           data_variable=data_variable, workers=workers)
+
+        converted = []
+        for band_index, error in results:
+            time = times_by_band[band_index]
+            if error:
+                failures[time] = error
+                logger.error(f'[GEOMANAGER_AUTO_INGEST]: Error converting time : {time.isoformat()}: {error}')
+            else:
+                converted.append((time, out_file_paths[band_index]))
+                logger.info(f'[GEOMANAGER_AUTO_INGEST]: Converted time : {time.isoformat()}')
+
+        # save the files and read their metadata before touching the database
+        prepared = []
+        for time, out_file_path in sorted(converted):
+            try:
+                # under a name of its own, so that the file of a replaced time is kept if the rows are not saved
+                prepared.append(prepare_layer_raster_file(layer_obj, time, out_file_path,
+                                                          data_variable=data_variable, unique_name=True))
+            except Exception as e:
+                failures[time] = str(e)
+                logger.error(f'[GEOMANAGER_AUTO_INGEST]: Error creating raster file for time : '
+                             f'{time.isoformat()}: {e}')
+
+    if not prepared:
+        return failures
+
+    try:
+        # one short transaction for the rows of all timesteps
+        with transaction.atomic():
+            replaced_times = [raster.time for raster in prepared if raster.time in existing_times]
+            replaced_files = []
+            for layer_raster_file in LayerRasterFile.objects.filter(layer=layer_obj, time__in=replaced_times):
+                replaced_files.append(layer_raster_file.file)
+                layer_raster_file.delete()
+
+            LayerRasterFile.objects.bulk_create(prepared)
+
+            transaction.on_commit(lambda: on_netcdf_rasters_created(layer_obj, prepared, replaced_files))
+    except Exception as e:
+        logger.error(f'[GEOMANAGER_AUTO_INGEST]: Error saving raster files: {e}')
+        for raster in prepared:
+            failures[raster.time] = str(e)
+            # the rows of replaced times still point at their own files
+            raster.file.delete(save=False)
+
+    return failures
+
+
+def on_netcdf_rasters_created(layer_obj, rasters, replaced_files=()):
+    # the files of the replaced rows are no longer referenced once the new rows are committed
+    for file in replaced_files:
+        try:
+            file.delete(save=False)
+        except Exception as e:
+            logger.warning(f'[GEOMANAGER_AUTO_INGEST]: Error removing replaced raster file {file.name}: {e}')
+
+    # bulk_create does not send post_save, so the caches of the new times are invalidated here
+    invalidate_layer_raster_files(layer_obj.pk, [raster.time for raster in rasters])
+
+    for raster in rasters:
+        try:
+            create_raster_file_derived_data(raster)
+        except Exception as e:
+            logger.error(f'[GEOMANAGER_AUTO_INGEST]: Error creating derived data for time : '
+                         f'{raster.time.isoformat()}: {e}')
+
+
 def raw_raster_file_to_layer_raster_file(layer_obj, file_path, time=None, overwrite=False, clip_to_boundary=False):
+    # taken before the file is read, so that changes made while it is ingested are picked up by the next sync
+    stat = os.stat(file_path)
+
     with open(file_path, "rb") as file:
         file_name = os.path.basename(file.name)
 
+        # hash the file while it is copied to the upload, for the ingest manifest
+        reader = HashingReader(file)
+
         upload = RasterUpload.objects.create(dataset=layer_obj.dataset)
-        upload.file.save(file_name, file, save=True)
+        upload.file.save(file_name, File(reader, name=file.name), save=True)
+        content_hash = reader.hexdigest()
 
         raster_metadata = read_raster_info(upload.file.path)
         upload.raster_metadata = raster_metadata
         upload.save()
 
+        # time to error message, for the timesteps that failed
+        failures = {}
+        times = []
+
         try:
             if clip_to_boundary:
                 # clip raster upload to boundary
@@ -187,38 +393,42 @@ def raw_raster_file_to_layer_raster_file(layer_obj, file_path, time=None, overwr
                 if not timestamps:
                     raise IngestException(f'No timestamps found in NetCDF: {file_name}')
 
+                timesteps = []
                 for i, time_str in enumerate(timestamps):
                     d_time_unaware = datetime.fromisoformat(time_str)
                     d_time_aware = d_time_unaware.replace(tzinfo=pytz.UTC)
+                    timesteps.append((i, d_time_aware))
+                    times.append(d_time_aware)
 
-                    logger.info(f'[GEOMANAGER_AUTO_INGEST]: Processing time : {time_str}')
+                logger.info(f'[GEOMANAGER_AUTO_INGEST]: Processing {len(timesteps)} timesteps')
 
-                    create_raster(layer_obj, upload, d_time_aware, overwrite=overwrite, band_index=i,
-                                  data_variable=data_variable)
+                failures = create_netcdf_rasters(layer_obj, upload, timesteps, overwrite=overwrite,
+                                                 data_variable=data_variable)
 
             elif raster_driver == "GTiff":
                 if time:
                     logger.info(f'[GEOMANAGER_AUTO_INGEST]: Processing time : {time}')
                     create_raster(layer_obj, upload, time, overwrite=overwrite)
+                    times.append(time)
 
         finally:
             # delete raster upload
             upload.delete()
 
+    if failures:
+        logger.error(f'[GEOMANAGER_AUTO_INGEST]: {len(failures)} timestep(s) of {file_name} failed: '
+                     f'{", ".join(time.isoformat() for time in sorted(failures))}')
+    elif times:
+        record_ingested_file(layer_obj, file_path, stat, content_hash=content_hash, times=times)
 
-def ingest_raster_file(src_path, overwrite=False, clip_to_boundary=False):
-    # Check if source path exists
-    if not isfile(src_path):
-        raise IngestException(f'File path: {src_path} does not exist.')
-
-    file_extension = splitext(src_path)[1].lower()
+    return failures
 
-    if file_extension not in ALLOWED_RASTER_FILE_EXTENSIONS:
-        raise IngestException(f'File path: {src_path} is not a tiff or netcdf file.')
 
+def get_raster_file_layer_for_path(src_path):
+    """
+    Returns the RasterFileLayer that a file in the auto ingest directory belongs to, from the name of its directory
+    """
     directory = os.path.dirname(src_path)
-    file_name = os.path.basename(src_path)
-    file_name_without_extension = os.path.splitext(file_name)[0]
 
     # check if the directory name is an uuid
     layer_uuid = os.path.basename(os.path.normpath(directory))
@@ -254,6 +464,24 @@ def ingest_raster_file(src_path, overwrite=False, clip_to_boundary=False):
         if not raster_file_layer.auto_ingest_from_directory:
             raise IngestException(f'RasterFileLayer with directory: {layer_dir} is not set for auto ingest.')
 
+    return raster_file_layer
+
+
+def ingest_raster_file(src_path, overwrite=False, clip_to_boundary=False):
+    # Check if source path exists
+    if not isfile(src_path):
+        raise IngestException(f'File path: {src_path} does not exist.')
+
+    file_extension = splitext(src_path)[1].lower()
+
+    if file_extension not in ALLOWED_RASTER_FILE_EXTENSIONS:
+        raise IngestException(f'File path: {src_path} is not a tiff or netcdf file.')
+
+    file_name = os.path.basename(src_path)
+    file_name_without_extension = os.path.splitext(file_name)[0]
+
+    raster_file_layer = get_raster_file_layer_for_path(src_path)
+
     if file_extension == '.tif':
         # check if file name ends with iso format date, return the parsed date if it does
         iso_date_time = extract_iso_date_from_filename(file_name_without_extension)
@@ -261,13 +489,13 @@ def ingest_raster_file(src_path, overwrite=False, clip_to_boundary=False):
             raise IngestException(f'File name: {file_name} does not end with iso format date.')
 
         # create layer raster file from raw tiff file
-        raw_raster_file_to_layer_raster_file(raster_file_layer, src_path, time=iso_date_time, overwrite=overwrite,
-                                             clip_to_boundary=clip_to_boundary)
+        return raw_raster_file_to_layer_raster_file(raster_file_layer, src_path, time=iso_date_time,
+                                                    overwrite=overwrite, clip_to_boundary=clip_to_boundary)
 
     elif file_extension == '.nc':
         # process netcdf file
-        raw_raster_file_to_layer_raster_file(raster_file_layer, src_path, time=None, overwrite=overwrite,
-                                             clip_to_boundary=clip_to_boundary)
+        return raw_raster_file_to_layer_raster_file(raster_file_layer, src_path, time=None, overwrite=overwrite,
+                                                    clip_to_boundary=clip_to_boundary)
 
     else:
         raise IngestException(f'File extension: {file_extension} not supported.')
@@ -0,0 +1,232 @@
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.db import close_old_connections
+
+from geomanager.settings import geomanager_settings
+from geomanager.utils.ingest import ingest_raster_file, IngestException, ALLOWED_RASTER_FILE_EXTENSIONS
+from geomanager.utils.ingest_jobs import enqueue_ingest_job
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+logger = logging.getLogger("geomanager.ingest")
+
+
+def is_raster_file(path):
+    return os.path.splitext(path)[1].lower() in ALLOWED_RASTER_FILE_EXTENSIONS
+
+
+def get_file_state(path):
+    """
+    Returns a tuple of (size, modified time) of a file, or None if it does not exist
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class IngestEventHandler(FileSystemEventHandler):
+    """
+    Watchdog event handler that passes created, modified and moved raster files to the daemon
+    """
+
+    def __init__(self, daemon):
+        super().__init__()
+        self.daemon = daemon
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.daemon.notify(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.daemon.notify(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self.daemon.notify(event.dest_path)
+
+
+class IngestDaemon:
+    """
+    Watches the auto ingest directory and ingests new raster files in one long running process.
+
+    Files are picked up from watchdog events (inotify on Linux) when watchdog is installed, or by polling the
+    directory otherwise. A file is only queued once its size and modified time have not changed for
+    settle_seconds, so that files still being written are not ingested. Queued files are ingested by a fixed
+    number of worker threads, or with queue_jobs, added to the IngestJob queue for the ingest workers.
+    """
+
+    def __init__(self, directory, workers=None, settle_seconds=None, poll_interval=None, overwrite=False,
+                 clip=False, polling=False, scan_existing=False, queue_jobs=False):
+        self.directory = directory
+        self.workers = workers or geomanager_settings.get("auto_ingest_daemon_workers")
+        self.settle_seconds = settle_seconds if settle_seconds is not None else \
+            geomanager_settings.get("auto_ingest_settle_seconds")
+        self.poll_interval = poll_interval or geomanager_settings.get("auto_ingest_poll_interval")
+        self.overwrite = overwrite
+        self.clip = clip
+        self.polling = polling or Observer is None
+        self.scan_existing = scan_existing
+        self.queue_jobs = queue_jobs
+
+        self.queue = queue.Queue()
+        self.stop_event = threading.Event()
+
+        # path to (file state, time of the last change), for files waiting to settle
+        self._pending = {}
+        # paths queued or being ingested, and those changed again meanwhile
+        self._active = set()
+        self._changed = set()
+        self._lock = threading.Lock()
+
+        # path to file state, of the files seen by the last directory scan
+        self._known = {}
+
+    def notify(self, path):
+        """
+        Records a change to a file. The file is queued for ingest once it has settled.
+        """
+        if not is_raster_file(path):
+            return
+
+        with self._lock:
+            if path in self._active:
+                self._changed.add(path)
+                return
+            self._pending[path] = (get_file_state(path), time.monotonic())
+
+    def list_files(self):
+        """
+        Returns a dict of path to file state, of the raster files in the directory
+        """
+        found = {}
+        for root, _, files in os.walk(self.directory):
+            for file_name in files:
+                path = os.path.join(root, file_name)
+                if is_raster_file(path):
+                    found[path] = get_file_state(path)
+        return found
+
+    def scan(self):
+        """
+        Notifies new and changed files in the directory, compared to the previous scan
+        """
+        found = self.list_files()
+
+        for path, state in found.items():
+            if self._known.get(path) != state:
+                self.notify(path)
+
+        self._known = found
+
+    def check_pending(self):
+        """
+        Queues pending files whose size and modified time have not changed for settle_seconds
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            for path, (state, changed_at) in list(self._pending.items()):
+                current_state = get_file_state(path)
+
+                if current_state is None:
+                    # removed before it settled
+                    del self._pending[path]
+                elif current_state != state:
+                    self._pending[path] = (current_state, now)
+                elif now - changed_at >= self.settle_seconds:
+                    del self._pending[path]
+                    self._active.add(path)
+                    self.queue.put(path)
+
+    def ingest(self, path):
+        logger.info(f'[GEOMANAGER_AUTO_INGEST]: Processing file: {path}')
+
+        close_old_connections()
+        try:
+            if self.queue_jobs:
+                enqueue_ingest_job(path, self.overwrite, self.clip)
+                return
+
+            ingest_raster_file(path, self.overwrite, self.clip)
+            logger.info(f'[GEOMANAGER_AUTO_INGEST]: {path} done...')
+        except IngestException as e:
+            logger.error(f'[GEOMANAGER_AUTO_INGEST]: {e.message}')
+        except Exception as e:
+            logger.exception(f'[GEOMANAGER_AUTO_INGEST]: Error ingesting file: {path}: {e}')
+        finally:
+            close_old_connections()
+
+    def worker(self):
+        while True:
+            path = self.queue.get()
+            try:
+                if path is None:
+                    return
+                self.ingest(path)
+            finally:
+                self.queue.task_done()
+
+            with self._lock:
+                self._active.discard(path)
+                changed = path in self._changed
+                self._changed.discard(path)
+
+            # changed while being ingested, ingest again once it settles
+            if changed:
+                self.notify(path)
+
+    def stop(self, *args):
+        self.stop_event.set()
+
+    def run(self):
+        if not os.path.isdir(self.directory):
+            raise IngestException(f'Directory: {self.directory} does not exist.')
+
+        threads = [threading.Thread(target=self.worker, name=f"geomanager-ingest-{i}", daemon=True)
+                   for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+
+        if self.scan_existing:
+            self.scan()
+        else:
+            # only ingest files added from now on
+            self._known = self.list_files()
+
+        observer = None
+        if not self.polling:
+            observer = Observer()
+            observer.schedule(IngestEventHandler(self), self.directory, recursive=True)
+            observer.start()
+
+        logger.info(f'[GEOMANAGER_AUTO_INGEST]: Watching {self.directory} '
+                    f'{"by polling" if self.polling else "for file events"}, with {self.workers} workers')
+
+        try:
+            while not self.stop_event.wait(self.poll_interval):
+                if self.polling:
+                    self.scan()
+                self.check_pending()
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
+
+            logger.info('[GEOMANAGER_AUTO_INGEST]: Stopping, waiting for queued files to finish...')
+
+            for _ in threads:
+                self.queue.put(None)
+            for thread in threads:
+                thread.join()
@@ -0,0 +1,260 @@
+import logging
+import os
+import socket
+import threading
+from datetime import timedelta
+
+from django.db import transaction, close_old_connections
+from django.db.models import Count, Avg, Max, F, Q, ExpressionWrapper, DurationField
+from django.utils import timezone
+
+from geomanager.models import IngestJob, RasterFileLayer
+from geomanager.settings import geomanager_settings
+from geomanager.utils.ingest import ingest_raster_file, get_raster_file_layer_for_path, IngestException
+
+logger = logging.getLogger("geomanager.ingest")
+
+# number of pending jobs looked at when claiming, so that jobs of layers at their concurrency limit are skipped
+CLAIM_BATCH_SIZE = 20
+
+
+def get_worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+
+
+def enqueue_ingest_job(file_path, overwrite=False, clip=False):
+    """
+    Creates a pending IngestJob for a file, or returns its pending job if it is already queued.
+    Files that do not belong to a layer are recorded as failed jobs.
+    """
+    try:
+        layer = get_raster_file_layer_for_path(file_path)
+    except IngestException as e:
+        logger.error(f'[GEOMANAGER_INGEST_JOBS]: {e.message}')
+        return IngestJob.objects.create(file_path=file_path, overwrite=overwrite, clip=clip, status="failed",
+                                        error=e.message, finished_at=timezone.now())
+
+    job = IngestJob.objects.filter(file_path=file_path, status="pending").first()
+    if job:
+        return job
+
+    job = IngestJob.objects.create(layer=layer, file_path=file_path, overwrite=overwrite, clip=clip,
+                                   max_attempts=geomanager_settings.get("ingest_job_max_attempts"))
+
+    logger.info(f'[GEOMANAGER_INGEST_JOBS]: Queued {file_path} for layer: {layer}')
+
+    return job
+
+
+def claim_ingest_job(worker=None):
+    """
+    Claims the next pending job and marks it as running. Rows are locked with SELECT ... FOR UPDATE SKIP LOCKED,
+    so that workers in other processes or nodes never claim the same job. Jobs of layers that already have
+    GEOMANAGER_INGEST_JOB_LAYER_CONCURRENCY running jobs are skipped.
+
+    Returns:
+        The claimed IngestJob, or None if there is no job to run.
+    """
+    layer_concurrency = geomanager_settings.get("ingest_job_layer_concurrency")
+    now = timezone.now()
+
+    with transaction.atomic():
+        candidates = IngestJob.objects.select_for_update(skip_locked=True) \
+            .filter(status="pending", run_after__lte=now) \
+            .order_by("run_after", "pk")[:CLAIM_BATCH_SIZE]
+
+        checked_layers = set()
+
+        for job in candidates:
+            if job.layer_id in checked_layers:
+                continue
+            checked_layers.add(job.layer_id)
+
+            if layer_concurrency:
+                # lock the layer, so that workers claiming jobs of the same layer count its running jobs in turn
+                layer_locked = RasterFileLayer.objects.select_for_update(skip_locked=True) \
+                    .filter(pk=job.layer_id).values_list("pk", flat=True)
+                if not list(layer_locked):
+                    continue
+
+                running = IngestJob.objects.filter(layer_id=job.layer_id, status="running").count()
+                if running >= layer_concurrency:
+                    continue
+
+            job.status = "running"
+            job.attempts += 1
+            job.worker = worker or get_worker_name()
+            job.started_at = now
+            job.heartbeat_at = now
+            job.finished_at = None
+            job.save(update_fields=["status", "attempts", "worker", "started_at", "heartbeat_at", "finished_at"])
+
+            return job
+
+    return None
+
+
+def get_retry_delay(attempts):
+    """
+    Returns the delay before retrying a job, doubling with each failed attempt
+    """
+    return timedelta(seconds=geomanager_settings.get("ingest_job_retry_delay") * 2 ** max(0, attempts - 1))
+
+
+def get_claimed_job_queryset(job):
+    """
+    Returns a queryset matching the job only while it is still claimed by this attempt, so that a worker
+    whose job was requeued as stale does not overwrite the state of a newer attempt
+    """
+    return IngestJob.objects.filter(pk=job.pk, status="running", worker=job.worker, attempts=job.attempts)
+
+
+class IngestJobHeartbeat(threading.Thread):
+    """
+    Refreshes the heartbeat of a running job every GEOMANAGER_INGEST_JOB_HEARTBEAT_INTERVAL seconds,
+    so that long ingests are not taken for stale jobs
+    """
+
+    def __init__(self, job):
+        super().__init__(name=f"geomanager-ingest-heartbeat-{job.pk}", daemon=True)
+        self.job = job
+        self.stop_event = threading.Event()
+
+    def run(self):
+        interval = geomanager_settings.get("ingest_job_heartbeat_interval")
+        try:
+            while not self.stop_event.wait(interval):
+                if not get_claimed_job_queryset(self.job).update(heartbeat_at=timezone.now()):
+                    logger.warning(f'[GEOMANAGER_INGEST_JOBS]: Job {self.job.pk} is no longer claimed by '
+                                   f'{self.job.worker}')
+                    return
+        finally:
+            close_old_connections()
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
+
+
+def run_ingest_job(job):
+    """
+    Ingests the file of a claimed job and records the result. Jobs that fail, or have failed timesteps, are
+    retried with backoff until max_attempts. IngestExceptions are not retried, since they are caused by the
+    file name or the layer configuration.
+    """
+    logger.info(f'[GEOMANAGER_INGEST_JOBS]: Running job {job.pk}: {job.file_path}, attempt {job.attempts}')
+
+    failures = {}
+    retry = True
+
+    heartbeat = IngestJobHeartbeat(job)
+    heartbeat.start()
+
+    try:
+        failures = ingest_raster_file(job.file_path, job.overwrite, job.clip) or {}
+        error = f"{len(failures)} timestep(s) failed" if failures else None
+    except IngestException as e:
+        error = e.message
+        retry = False
+    except Exception as e:
+        logger.exception(f'[GEOMANAGER_INGEST_JOBS]: Error running job {job.pk}: {e}')
+        error = str(e)
+    finally:
+        heartbeat.stop()
+
+    job.finished_at = timezone.now()
+    job.error = error
+    job.failed_timesteps = {time.isoformat(): message for time, message in failures.items()}
+
+    if error is None:
+        job.status = "succeeded"
+    elif retry and job.attempts < job.max_attempts:
+        job.status = "pending"
+        job.run_after = job.finished_at + get_retry_delay(job.attempts)
+    else:
+        job.status = "failed"
+
+    updated = get_claimed_job_queryset(job).update(status=job.status, error=job.error,
+                                                   failed_timesteps=job.failed_timesteps,
+                                                   finished_at=job.finished_at, run_after=job.run_after)
+
+    if not updated:
+        logger.warning(f'[GEOMANAGER_INGEST_JOBS]: Job {job.pk} was requeued while running, '
+                       f'result of attempt {job.attempts} not saved')
+        return job
+
+    logger.info(f'[GEOMANAGER_INGEST_JOBS]: Job {job.pk} {job.status}'
+                f'{f": {error}" if error else ""}, in {job.duration.total_seconds():.1f}s')
+
+    return job
+
+
+def requeue_stale_ingest_jobs():
+    """
+    Returns running jobs without a heartbeat for GEOMANAGER_INGEST_JOB_TIMEOUT seconds, e.g. of a worker that was
+    killed, to the queue. Jobs without attempts left are marked as failed.
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=geomanager_settings.get("ingest_job_timeout"))
+    error = "Timed out. The worker running the job stopped reporting it as alive"
+
+    stale = IngestJob.objects.filter(Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff),
+                                     status="running")
+
+    failed = stale.filter(attempts__gte=F("max_attempts")).update(status="failed", error=error, finished_at=now)
+    requeued = stale.filter(attempts__lt=F("max_attempts")).update(status="pending", error=error, run_after=now)
+
+    if failed or requeued:
+        logger.warning(f'[GEOMANAGER_INGEST_JOBS]: {requeued} stale job(s) requeued, {failed} failed')
+
+    return requeued, failed
+
+
+def run_ingest_worker(stop_event, poll_interval=5, once=False):
+    """
+    Claims and runs jobs until stop_event is set. With once, returns as soon as there is no job to run.
+    """
+    while not stop_event.is_set():
+        close_old_connections()
+
+        job = claim_ingest_job()
+
+        if job is None:
+            if once:
+                return
+            requeue_stale_ingest_jobs()
+            stop_event.wait(poll_interval)
+            continue
+
+        run_ingest_job(job)
+
+
+def get_ingest_job_stats(since=None):
+    """
+    Returns the throughput and latency of the jobs finished since the given time, the last 24 hours by default,
+    and the number of jobs currently pending and running.
+    """
+    now = timezone.now()
+    if since is None:
+        since = now - timedelta(hours=24)
+
+    wait_time = ExpressionWrapper(F("started_at") - F("created"), output_field=DurationField())
+    duration = ExpressionWrapper(F("finished_at") - F("started_at"), output_field=DurationField())
+
+    stats = IngestJob.objects.filter(status__in=["succeeded", "failed"], finished_at__gte=since).aggregate(
+        succeeded=Count("pk", filter=Q(status="succeeded")),
+        failed=Count("pk", filter=Q(status="failed")),
+        avg_wait_time=Avg(wait_time),
+        avg_duration=Avg(duration),
+        max_duration=Max(duration),
+    )
+
+    hours = max((now - since).total_seconds() / 3600, 1 / 60)
+    stats["jobs_per_hour"] = round((stats["succeeded"] + stats["failed"]) / hours, 2)
+
+    counts = dict(IngestJob.objects.filter(status__in=["pending", "running"]).order_by().values_list("status")
+                  .annotate(count=Count("pk")))
+    stats["pending"] = counts.get("pending", 0)
+    stats["running"] = counts.get("running", 0)
+
+    return stats
@@ -0,0 +1,111 @@
+import hashlib
+import os
+
+from geomanager.models import IngestManifestEntry
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+MANIFEST_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S.000Z"
+
+
+def compute_file_hash(path):
+    """
+    Returns the SHA-256 of the content of a file, read in chunks
+    """
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class HashingReader:
+    """
+    Wraps a file opened for reading, and computes the SHA-256 of its content while it is read from the start,
+    e.g. while it is copied to the storage, so that the file does not need to be read again to hash it
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.name = file.name
+        self._reset()
+
+    def _reset(self):
+        self._sha256 = hashlib.sha256()
+        self._read = 0
+
+    def read(self, size=-1):
+        data = self.file.read(size)
+        self._sha256.update(data)
+        self._read += len(data)
+        return data
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        position = self.file.seek(offset, whence)
+        if position == 0:
+            self._reset()
+        return position
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+    def hexdigest(self):
+        """
+        Returns the hash of the content, or None if the file was not read in full from the start
+        """
+        if self._read != os.fstat(self.file.fileno()).st_size:
+            return None
+        return self._sha256.hexdigest()
+
+
+def record_ingested_file(layer, path, stat, content_hash=None, times=None):
+    """
+    Records a file as ingested. stat should be taken before the file is read, so that changes made while it was
+    being ingested are picked up by the next directory sync.
+    """
+    entry, _ = IngestManifestEntry.objects.update_or_create(
+        layer=layer,
+        path=os.path.abspath(path),
+        defaults={
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "content_hash": content_hash,
+            "times": [time.strftime(MANIFEST_TIME_FORMAT) for time in times or []],
+        }
+    )
+    return entry
+
+
+class IngestManifest:
+    """
+    The files of a layer directory that have been ingested, loaded once per directory run.
+
+    A file is unchanged if its size and modified time match its entry, which only needs a stat. Files whose
+    modified time changed, e.g. when copied again, are hashed, and skipped if their content is the same.
+    """
+
+    def __init__(self, layer):
+        self.layer = layer
+        self.entries = {entry.path: entry for entry in IngestManifestEntry.objects.filter(layer=layer)}
+
+    def is_unchanged(self, path):
+        entry = self.entries.get(os.path.abspath(path))
+        if entry is None:
+            return False
+
+        stat = os.stat(path)
+
+        if entry.size != stat.st_size:
+            return False
+
+        if entry.mtime_ns == stat.st_mtime_ns:
+            return True
+
+        if not entry.content_hash or entry.content_hash != compute_file_hash(path):
+            return False
+
+        # same content, record the new modified time so that the file is not hashed again
+        entry.mtime_ns = stat.st_mtime_ns
+        entry.save(update_fields=["mtime_ns"])
+
+        return True
@@ -0,0 +1,126 @@
+import datetime
+import hashlib
+import logging
+from collections import defaultdict
+
+import rasterio as rio
+from django.db import IntegrityError
+from django.db.models import F, Func, JSONField, Value
+from django.utils import timezone
+
+from geomanager.models import RasterPixelTimeseries
+from geomanager.settings import geomanager_settings
+from geomanager.utils.timeseries import get_pixel_row_col, read_src_pixel_value
+
+logger = logging.getLogger(__name__)
+
+# how often the last access time of a stored point is refreshed, to avoid a database write on every read
+LAST_ACCESSED_RESOLUTION = datetime.timedelta(hours=1)
+
+
+class JSONBMerge(Func):
+    """
+    Merges jsonb objects in SQL, the keys of the later objects overriding those of the earlier ones
+    """
+    template = "%(expressions)s"
+    arg_joiner = " || "
+    output_field = JSONField()
+
+
+def merge_values(values):
+    """
+    Returns an update expression that adds values to the stored values of a point, in the database, so that
+    concurrent writes for different times do not overwrite each other
+    """
+    return JSONBMerge(F("values"), Value(values, output_field=JSONField()))
+
+
+def get_grid_key(grid):
+    value = f"{tuple(grid.transform)[:6]}:{grid.width}:{grid.height}"
+    return hashlib.md5(value.encode()).hexdigest()
+
+
+def get_pixel_timeseries_entry(layer_id, grid, x_coord, y_coord):
+    """
+    Returns the stored pixel timeseries for the coordinates, creating it if it does not exist.
+
+    The pixel is located on grid, the RasterGrid of usually the latest raster file of the layer.
+    Returns None if the coordinates are outside the grid.
+    """
+    row_col = get_pixel_row_col(grid, x_coord, y_coord)
+
+    if row_col is None:
+        return None
+
+    row, col = row_col
+    grid_key = get_grid_key(grid)
+    now = timezone.now()
+
+    try:
+        entry, created = RasterPixelTimeseries.objects.get_or_create(layer_id=layer_id, grid=grid_key, row=row, col=col,
+                                                                     defaults={"last_accessed": now})
+    except IntegrityError:
+        # created by a concurrent request
+        entry = RasterPixelTimeseries.objects.get(layer_id=layer_id, grid=grid_key, row=row, col=col)
+        created = False
+
+    if created:
+        prune_pixel_timeseries(layer_id)
+    elif now - entry.last_accessed > LAST_ACCESSED_RESOLUTION:
+        RasterPixelTimeseries.objects.filter(pk=entry.pk).update(last_accessed=now)
+
+    return entry
+
+
+def save_pixel_timeseries_values(entry, values):
+    """
+    Adds values, a mapping of raster file time string to value, to a stored pixel timeseries
+    """
+    if not values:
+        return
+
+    entry.values.update(values)
+    entry.last_accessed = timezone.now()
+
+    RasterPixelTimeseries.objects.filter(pk=entry.pk).update(values=merge_values(values),
+                                                             last_accessed=entry.last_accessed)
+
+
+def prune_pixel_timeseries(layer_id):
+    """
+    Removes the least recently accessed points of a layer above GEOMANAGER_RASTER_PIXEL_TIMESERIES_MAX_POINTS
+    """
+    max_points = geomanager_settings.get("raster_pixel_timeseries_max_points")
+
+    stale_ids = list(RasterPixelTimeseries.objects.filter(layer_id=layer_id)
+                     .order_by("-last_accessed")
+                     .values_list("pk", flat=True)[max_points:])
+
+    if stale_ids:
+        RasterPixelTimeseries.objects.filter(pk__in=stale_ids).delete()
+
+
+def append_raster_file_pixel_values(raster_file, file_path):
+    """
+    Adds the values of a newly ingested raster file to all stored pixel timeseries of its layer
+    that share its grid. Each pixel is read as a single pixel window.
+    """
+    entries = list(RasterPixelTimeseries.objects.filter(layer_id=raster_file.layer_id,
+                                                        grid=get_grid_key(raster_file.grid)).only("row", "col"))
+
+    if not entries:
+        return
+
+    time_key = raster_file.time_str
+
+    # points are grouped by value, so that each distinct value is merged with a single update
+    entry_ids_by_value = defaultdict(list)
+
+    with rio.open(str(file_path)) as src:
+        for entry in entries:
+            entry_ids_by_value[read_src_pixel_value(src, entry.row, entry.col)].append(entry.pk)
+
+    for value, entry_ids in entry_ids_by_value.items():
+        RasterPixelTimeseries.objects.filter(pk__in=entry_ids).update(values=merge_values({time_key: value}))
+
+    logger.debug(f"[GEOMANAGER_PIXEL_TIMESERIES]: Appended {raster_file} to {len(entries)} stored point(s)")
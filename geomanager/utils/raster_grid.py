@@ -0,0 +1,148 @@
+import threading
+from collections import OrderedDict
+
+import rasterio as rio
+from affine import Affine
+from django_large_image.utilities import field_file_to_local_path
+
+RASTER_GRID_METADATA_KEY = "grid"
+
+
+class RasterGrid:
+    """
+    Georeferencing and layout of a raster file: geotransform, CRS, size, nodata, dtype, block size and
+    overview count. Stored in LayerRasterFile.raster_metadata at ingest, so that pixel and window
+    computations do not need to open the file.
+    """
+
+    def __init__(self, transform, width, height, crs=None, nodata=None, dtype=None, block_shape=None,
+                 overview_count=0):
+        self.transform = transform
+        self.width = width
+        self.height = height
+        self.crs = crs
+        self.nodata = nodata
+        self.dtype = dtype
+        self.block_shape = block_shape
+        self.overview_count = overview_count
+
+    @classmethod
+    def from_dataset(cls, src):
+        return cls(
+            transform=src.transform,
+            width=src.width,
+            height=src.height,
+            crs=src.crs.to_string() if src.crs else None,
+            nodata=src.nodata,
+            dtype=src.dtypes[0],
+            block_shape=tuple(src.block_shapes[0]),
+            overview_count=len(src.overviews(1)),
+        )
+
+    @classmethod
+    def from_file(cls, file_path):
+        with rio.open(str(file_path)) as src:
+            return cls.from_dataset(src)
+
+    @classmethod
+    def from_dict(cls, data):
+        block_shape = data.get("block_shape")
+        nodata = data.get("nodata")
+        return cls(
+            transform=Affine(*data["transform"]),
+            width=data["width"],
+            height=data["height"],
+            crs=data.get("crs"),
+            nodata=float(nodata) if nodata == "nan" else nodata,
+            dtype=data.get("dtype"),
+            block_shape=tuple(block_shape) if block_shape else None,
+            overview_count=data.get("overview_count", 0),
+        )
+
+    def to_dict(self):
+        nodata = self.nodata
+        # NaN is not valid JSON
+        if nodata is not None and nodata != nodata:
+            nodata = "nan"
+
+        return {
+            "transform": list(self.transform)[:6],
+            "width": self.width,
+            "height": self.height,
+            "crs": self.crs,
+            "nodata": nodata,
+            "dtype": self.dtype,
+            "block_shape": list(self.block_shape) if self.block_shape else None,
+            "overview_count": self.overview_count,
+        }
+
+    def rowcol(self, x_coord, y_coord):
+        """
+        Returns the (row, col) of the pixel at the coordinates, or None if outside the grid
+        """
+        col, row = ~self.transform * (x_coord, y_coord)
+        row, col = int(row // 1), int(col // 1)
+
+        if 0 <= row < self.height and 0 <= col < self.width:
+            return row, col
+        return None
+
+
+class RasterGridCache:
+    """
+    Process-level LRU of raster file grids, keyed by raster file id and modified time
+    """
+
+    def __init__(self, max_size=4096):
+        self.max_size = max_size
+        self._grids = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, raster_file):
+        """
+        Returns the RasterGrid of a LayerRasterFile, from its metadata if available. Files ingested before the
+        grid was stored in the metadata are read once per process, until update_geomanager_raster_grids
+        stores their grid.
+        """
+        key = (raster_file.pk, raster_file.modified)
+
+        with self._lock:
+            grid = self._grids.get(key)
+            if grid is not None:
+                self._grids.move_to_end(key)
+                return grid
+
+        metadata = raster_file.raster_metadata or {}
+        grid_data = metadata.get(RASTER_GRID_METADATA_KEY)
+
+        if grid_data:
+            grid = RasterGrid.from_dict(grid_data)
+        else:
+            grid = RasterGrid.from_file(field_file_to_local_path(raster_file.file))
+
+        with self._lock:
+            self._grids[key] = grid
+            while len(self._grids) > self.max_size:
+                self._grids.popitem(last=False)
+
+        return grid
+
+    def clear(self):
+        with self._lock:
+            self._grids.clear()
+
+
+def save_raster_file_grid(raster_file, grid):
+    metadata = dict(raster_file.raster_metadata or {})
+    metadata[RASTER_GRID_METADATA_KEY] = grid.to_dict()
+    raster_file.raster_metadata = metadata
+
+    # update directly, so that the modified time and the caches keyed by it are left as they are
+    type(raster_file).objects.filter(pk=raster_file.pk).update(raster_metadata=metadata)
+
+
+raster_grid_cache = RasterGridCache()
+
+
+def get_raster_file_grid(raster_file):
+    return raster_grid_cache.get(raster_file)
@@ -1,32 +1,107 @@
+import base64
+import functools
+import glob
+import logging
 import math
+import os
 import pathlib
+import re
 import tempfile
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 
+import mercantile
 import numpy as np
 import pandas as pd
 import rasterio as rio
 import xarray as xr
 import rioxarray as rxr
+from django.contrib.gis.geos import Polygon as GEOSPolygon
+from django.core.cache import cache
 from django.core.files import File
+from django.db import transaction
 from django.forms import FileField
 from django_large_image import tilesource
 from django_large_image.utilities import (
     field_file_to_local_path,
-    get_cache_dir,
     get_file_lock,
-    get_file_safe_path
 )
 from large_image.exceptions import TileSourceError
 from rasterio import CRS
+from rasterio.enums import Resampling
 from rasterio.mask import mask
+from rasterio.warp import transform_bounds
 from rest_framework.exceptions import APIException
 from rio_cogeo.cogeo import cog_translate
 from rio_cogeo.profiles import cog_profiles
 from shapely import wkb, Polygon
 
-from geomanager.errors import UnsupportedRasterFormat
+from geomanager.errors import UnsupportedRasterFormat, RasterConvertError
 from geomanager.models import LayerRasterFile, Geostore
 from geomanager.settings import geomanager_settings
+from geomanager.utils import get_style_hash, make_etag, atomic_write, write_file_atomic
+from geomanager.utils.admin_stats import schedule_raster_file_admin_stats
+from geomanager.utils.cache_namespace import bump_cache_namespaces, layer_cache_namespace
+from geomanager.utils.datacube import write_raster_file_to_datacube
+from geomanager.utils.geostore_cache import geostore_clip_cache
+from geomanager.utils.pixel_timeseries import append_raster_file_pixel_values
+from geomanager.utils.raster_grid import RasterGrid, RASTER_GRID_METADATA_KEY
+from geomanager.utils.timeseries import read_pixel_value
+from geomanager.utils.tile_source_pool import tile_source_pool
+from geomanager.utils.tile_store import raster_tile_store
+from geomanager.utils.time_index import raster_time_index
+from geomanager.utils.zonal_stats import get_zonal_stats
+
+logger = logging.getLogger(__name__)
+
+_tile_stack_executor = None
+_tile_stack_executor_lock = threading.Lock()
+
+
+def open_tile_source(file_path, tag=None, encoding=None, style=None, projection=None):
+    """
+    Opens a large_image tile source for a local file path, reusing a pooled source if available.
+    """
+    kwargs = {}
+    
+    if encoding:
+        kwargs["encoding"] = encoding
+    if style:
+        kwargs["style"] = style
+    if projection:
+        kwargs["projection"] = projection
+    
+    def open_source():
+        try:
+            return tilesource.get_tilesource_from_path(file_path, source=None, **kwargs)
+        except (TileSourceError, Exception) as e:
+            # Raise 500 server error if tile source failed to open
+            raise APIException(str(e))
+    
+    pool_key = tile_source_pool.make_key(file_path, style=style, projection=projection, encoding=encoding)
+    
+    return tile_source_pool.get(pool_key, open_source, tag=tag)
+
+
+def get_geostore_or_none(geostore_id):
+    if not geostore_id:
+        return None
+    
+    try:
+        return Geostore.objects.get(pk=geostore_id)
+    except Exception:
+        return None
+
+
+def get_local_file_path(path, geostore_id=None, geostore=None):
+    if geostore is None:
+        geostore = get_geostore_or_none(geostore_id)
+    
+    if geostore:
+        return field_file_to_local_path_for_geostore(path, geostore)
+    
+    return field_file_to_local_path(path)
 
 
 def get_tile_source(path, options=None):
@@ -38,81 +113,336 @@ def get_tile_source(path, options=None):
     projection = options.get("projection")
     geostore_id = options.get("geostore_id")
     
-    kwargs = {}
+    file_path = get_local_file_path(path, geostore_id)
     
-    if encoding:
-        kwargs["encoding"] = encoding
-    if style:
-        kwargs["style"] = style
-    if projection:
-        kwargs["projection"] = projection
+    return open_tile_source(file_path, tag=path.name, encoding=encoding, style=style, projection=projection)
+
+
+def get_tile_stack_executor():
+    """
+    Returns the process-wide thread pool used to render the tiles of a tile stack, bounded by
+    GEOMANAGER_RASTER_TILE_STACK_WORKERS so that concurrent requests share the same workers
+    """
+    global _tile_stack_executor
+    
+    with _tile_stack_executor_lock:
+        if _tile_stack_executor is None:
+            _tile_stack_executor = ThreadPoolExecutor(
+                max_workers=geomanager_settings.get("raster_tile_stack_workers"),
+                thread_name_prefix="geomanager-tile-stack")
+    return _tile_stack_executor
+
+
+def render_raster_tile(file_path, x, y, z, tag=None, fmt="png", projection="EPSG:3857", style=None,
+                       compiled_style=None, nodata=None):
+    """
+    Renders a single XYZ tile for a local raster file.
+    
+    If a compiled style is provided and the format is png, the raw band values are colorized using
+    the compiled lookup table, with nodata, the nodata value of the file's RasterGrid, left transparent.
+    Otherwise, large_image renders the tile using the style json.
+    
+    Returns:
+        A tuple of (tile_binary, mime_type)
+    """
+    if compiled_style is not None and fmt == "png":
+        source = open_tile_source(file_path, tag=tag, projection=projection)
+        # without applyStyle=False, large_image applies its default min/max stretch to the band values
+        tile = source.getTile(x, y, z, numpyAllowed="always", applyStyle=False)
+        
+        if tile.ndim == 2:
+            tile = tile[:, :, np.newaxis]
+        
+        values = tile[:, :, 0]
+        
+        no_data_mask = values == nodata if nodata is not None else None
+        
+        # reprojected tiles can have an extra alpha band, marking areas outside the raster
+        band_count = source.getMetadata().get("bandCount") or 1
+        if tile.shape[2] > band_count:
+            alpha_mask = tile[:, :, -1] == 0
+            no_data_mask = alpha_mask if no_data_mask is None else (no_data_mask | alpha_mask)
+        
+        return compiled_style.render_png(values, mask=no_data_mask), "image/png"
+    
+    encoding = tilesource.format_to_encoding(fmt, pil_safe=True)
+    source = open_tile_source(file_path, tag=tag, encoding=encoding, style=style, projection=projection)
+    
+    return source.getTile(x, y, z), source.getTileMimeType()
+
+
+def get_layer_style_json(raster_file):
+    layer = raster_file.layer
+    if not layer.style:
+        return None
     
-    geostore = None
+    # keyed by the style version, so that editing the style does not serve the old json
+    key = f"layer-style:{layer.style.version}"
+    data = cache.get(key)
+    if data is None:
+        data = layer.style.get_style_as_json()
+        cache.set(key, data, 60 * 60 * 24)  # cache for 24 hours
+    return data
+
+
+def get_layer_style_key(layer):
+    """
+    Returns a key identifying the current version of the layer's style
+    """
+    return get_style_hash(layer.style.version if layer.style else None)
+
+
+def get_raster_file_wgs84_bounds(file_path):
+    """
+    Returns the bounds of a raster file as (west, south, east, north) in EPSG:4326
+    """
+    with rio.open(str(file_path)) as src:
+        bounds = src.bounds
+        if src.crs and src.crs != CRS.from_epsg(4326):
+            return transform_bounds(src.crs, CRS.from_epsg(4326), *bounds)
+    return bounds.left, bounds.bottom, bounds.right, bounds.top
+
+
+def get_raster_footprint(file_path):
+    """
+    Computes the footprint of a raster file, and a coarse mask of the areas that have data.
+    
+    The data mask is a grid of at most GEOMANAGER_RASTER_DATA_MASK_SIZE cells on the longest side, where a
+    cell is set if any pixel within it has data. It is only computed for rasters in EPSG:4326.
+    
+    Returns:
+        A tuple of (footprint, data_mask). The footprint is a polygon of the raster bounds in EPSG:4326.
+    """
+    mask_size = geomanager_settings.get("raster_data_mask_size")
+    data_mask = None
+    
+    with rio.open(str(file_path)) as src:
+        bounds = src.bounds
+        is_wgs84 = not src.crs or src.crs == CRS.from_epsg(4326)
+        
+        if is_wgs84:
+            west, south, east, north = bounds.left, bounds.bottom, bounds.right, bounds.top
+        else:
+            west, south, east, north = transform_bounds(src.crs, CRS.from_epsg(4326), *bounds)
+        
+        if mask_size and is_wgs84:
+            scale = min(1, mask_size / max(src.width, src.height))
+            width = max(1, round(src.width * scale))
+            height = max(1, round(src.height * scale))
+            
+            # averaging the 0/255 mask values keeps any cell that has at least one pixel with data
+            has_data = src.read_masks(1, out_shape=(height, width), resampling=Resampling.average) > 0
+            
+            # grow the mask by one cell, so that data at the cell edges is never hidden
+            padded = np.pad(has_data, 1)
+            grown = np.zeros_like(has_data)
+            for row_offset in range(3):
+                for col_offset in range(3):
+                    grown |= padded[row_offset:row_offset + height, col_offset:col_offset + width]
+            
+            data_mask = {
+                "width": width,
+                "height": height,
+                "bounds": [west, south, east, north],
+                "data": base64.b64encode(np.packbits(grown)).decode("ascii"),
+            }
+    
+    footprint = GEOSPolygon.from_bbox((west, south, east, north))
+    footprint.srid = 4326
+    
+    return footprint, data_mask
+
+
+@functools.lru_cache(maxsize=256)
+def _decode_data_mask(data, width, height):
+    bits = np.unpackbits(np.frombuffer(base64.b64decode(data), dtype=np.uint8), count=width * height)
+    return bits.reshape((height, width)).astype(bool)
+
+
+def raster_tile_has_data(raster_file, z, x, y):
+    """
+    Checks whether a web mercator XYZ tile may have data, using the stored footprint and data mask of the
+    raster file. Returns True when this can not be decided, so that the tile is rendered as usual.
+    """
+    footprint = raster_file.footprint
+    if footprint is None:
+        return True
+    
+    fp_west, fp_south, fp_east, fp_north = footprint.extent
+    
+    # rasters with longitudes in 0-360 or crossing the antimeridian are not handled here
+    if fp_west < -180 or fp_east > 180:
+        return True
+    
+    west, south, east, north = mercantile.bounds(x, y, z)
+    
+    if west >= fp_east or east <= fp_west or south >= fp_north or north <= fp_south:
+        return False
     
-    if geostore_id:
+    data_mask = raster_file.data_mask
+    if not data_mask:
+        return True
+    
+    width, height = data_mask["width"], data_mask["height"]
+    mask_west, mask_south, mask_east, mask_north = data_mask["bounds"]
+    grid = _decode_data_mask(data_mask["data"], width, height)
+    
+    cell_width = (mask_east - mask_west) / width
+    cell_height = (mask_north - mask_south) / height
+    
+    col_start = max(0, math.floor((west - mask_west) / cell_width))
+    col_end = min(width, math.ceil((east - mask_west) / cell_width))
+    row_start = max(0, math.floor((mask_north - north) / cell_height))
+    row_end = min(height, math.ceil((mask_north - south) / cell_height))
+    
+    if col_start >= col_end or row_start >= row_end:
+        return False
+    
+    return bool(grid[row_start:row_end, col_start:col_end].any())
+
+
+def get_raster_thumbnail_path(raster_file, width, height):
+    """
+    Returns the path of the stored thumbnail of a raster file, rendered with the layer style.
+    
+    Thumbnails are stored in a 'thumbnails' directory next to the raster file. The name includes a digest of
+    the file modification time and the layer style version, so a replaced file or an edited style gets a new path.
+    """
+    file_path = raster_file.file.path
+    style = raster_file.layer.style
+    digest = make_etag(os.path.getmtime(file_path), style.version if style else None)[:12]
+    name = pathlib.Path(file_path).stem
+    
+    return os.path.join(os.path.dirname(file_path), "thumbnails", f"{name}_{digest}_{width}x{height}.png")
+
+
+def remove_raster_thumbnails(raster_file, keep=None):
+    """
+    Removes the stored thumbnails of a raster file, except the paths in keep
+    """
+    file_path = raster_file.file.path
+    name = pathlib.Path(file_path).stem
+    thumbnails_dir = os.path.join(glob.escape(os.path.dirname(file_path)), "thumbnails")
+    pattern = os.path.join(thumbnails_dir, f"{glob.escape(name)}_*.png")
+    
+    # the glob also matches thumbnails of other files whose name starts with this one's,
+    # so only names made of exactly this name, a digest and a size are removed
+    name_re = re.compile(rf"{re.escape(name)}_[0-9a-f]{{12}}_\d+x\d+\.png")
+    
+    for thumbnail_path in glob.glob(pattern):
+        if not name_re.fullmatch(os.path.basename(thumbnail_path)):
+            continue
+        if keep and thumbnail_path in keep:
+            continue
         try:
-            geostore = Geostore.objects.get(pk=geostore_id)
-        except Exception:
+            os.remove(thumbnail_path)
+        except OSError:
             pass
+
+
+def render_raster_thumbnail(raster_file, width, height):
+    style = get_layer_style_json(raster_file)
+    encoding = tilesource.format_to_encoding("png", pil_safe=True)
+    
+    options = {
+        "encoding": encoding,
+        "projection": "EPSG:3857",
+        "style": style,
+    }
     
-    if geostore:
-        file_path = field_file_to_local_path_for_geostore(path, geostore)
-    else:
-        file_path = field_file_to_local_path(path)
-    try:
-        return tilesource.get_tilesource_from_path(file_path, source=None, **kwargs)
-    except (TileSourceError, Exception) as e:
-        # Raise 500 server error if tile source failed to open
-        raise APIException(str(e))
+    source = get_tile_source(path=raster_file.file, options=options)
+    thumb_data, mime_type = source.getThumbnail(encoding=encoding, width=width, height=height)
+    
+    return thumb_data
 
 
-def get_raster_pixel_data(file: FileField, x_coord: float, y_coord: float):
-    source = get_tile_source(path=file)
+def save_raster_thumbnail(raster_file, width, height):
+    """
+    Renders and stores a thumbnail of a raster file. Returns the thumbnail data.
+    """
+    thumbnail_path = get_raster_thumbnail_path(raster_file, width, height)
+    thumb_data = render_raster_thumbnail(raster_file, width, height)
     
-    # get raster affine transform
-    metadata = source.getInternalMetadata()
-    affine = metadata.get("Affine")
+    write_file_atomic(thumbnail_path, thumb_data)
     
-    # get corresponding row col
-    row_col = rio.transform.rowcol(affine, xs=x_coord, ys=y_coord)
-    pixel_data = source.getPixel(region={'left': abs(row_col[1]), 'top': abs(row_col[0])})
+    return thumb_data
+
+
+def create_raster_thumbnails(raster_file):
+    """
+    Renders and stores thumbnails of a raster file in all GEOMANAGER_RASTER_THUMBNAIL_SIZES,
+    removing any thumbnails rendered from an older file or style
+    """
+    keep = []
+    
+    for width, height in geomanager_settings.get("raster_thumbnail_sizes"):
+        save_raster_thumbnail(raster_file, width, height)
+        keep.append(get_raster_thumbnail_path(raster_file, width, height))
+    
+    remove_raster_thumbnails(raster_file, keep=keep)
+
+
+def get_raster_thumbnail(raster_file, width, height):
+    """
+    Returns the stored thumbnail of a raster file, rendering it first if it does not exist or is stale.
+    Returns None if the size is not one of GEOMANAGER_RASTER_THUMBNAIL_SIZES.
+    """
+    sizes = [tuple(size) for size in geomanager_settings.get("raster_thumbnail_sizes")]
+    if (width, height) not in sizes:
+        return None
     
-    if pixel_data:
-        return pixel_data.get("bands", {}).get(1)
+    try:
+        with open(get_raster_thumbnail_path(raster_file, width, height), "rb") as f:
+            return f.read()
+    except OSError:
+        pass
+    
+    thumb_data = save_raster_thumbnail(raster_file, width, height)
     
-    return None
+    keep = [get_raster_thumbnail_path(raster_file, *size) for size in sizes]
+    remove_raster_thumbnails(raster_file, keep=keep)
+    
+    return thumb_data
 
 
-def get_geostore_data(file: FileField, geostore, value_type=None):
+def get_raster_pixel_data(file: FileField, x_coord: float, y_coord: float):
+    return read_pixel_value(field_file_to_local_path(file), x_coord, y_coord, file.instance.grid)
+
+
+def get_values_stats(values, value_type=None):
     data = {}
     
-    try:
-        file_path = field_file_to_local_path_for_geostore(file, geostore)
-        
-        with rio.open(str(file_path), 'r') as src:
-            band_array = src.read(1)
-            values = band_array[band_array != src.nodata]
-        
-        if value_type:
-            if value_type == "mean":
-                data.update({"mean": values.mean()})
-            elif value_type == "sum":
-                data.update({"sum": values.sum()})
-            elif value_type == "minmax":
-                data.update({
-                    "min": values.min(),
-                    "max": values.max()
-                })
-            elif value_type == "minmeanmax":
-                data.update({
-                    "min": values.min(),
-                    "max": values.max(),
-                    "mean": values.mean()
-                })
-            else:
-                data.update({"mean": values.mean()})
+    if value_type:
+        if value_type == "mean":
+            data.update({"mean": values.mean()})
+        elif value_type == "sum":
+            data.update({"sum": values.sum()})
+        elif value_type == "minmax":
+            data.update({
+                "min": values.min(),
+                "max": values.max()
+            })
+        elif value_type == "minmeanmax":
+            data.update({
+                "min": values.min(),
+                "max": values.max(),
+                "mean": values.mean()
+            })
         else:
             data.update({"mean": values.mean()})
+    else:
+        data.update({"mean": values.mean()})
+    
+    return data
+
+
+def get_geostore_data(file: FileField, geostore, value_type=None):
+    data = {}
+    
+    try:
+        file_path = field_file_to_local_path(file)
+        geom = wkb.loads(geostore.geom.hex)
+        data = get_zonal_stats(file_path, geom, value_type)
     except Exception:
         pass
     
@@ -184,59 +514,110 @@ def read_raster_info(file_path):
 
 
 def convert_upload_to_geotiff(upload, out_file_path, band_index=None, data_variable=None):
-    metadata = upload.raster_metadata
+    return convert_raster_file_to_geotiff(upload.file.path, upload.raster_metadata, out_file_path,
+                                          band_index=band_index, data_variable=data_variable)
+
+
+def open_netcdf_for_geotiff(file_path, metadata, data_variable=None):
+    """
+    Opens a NetCDF file, selecting data_variable and fixing its CRS, no data value and attributes,
+    so that its timesteps can be written to GeoTIFF. Data is not read until a timestep is written.
+    """
+    crs = metadata.get("crs")
     
-    driver = metadata.get("driver")
+    rds = xr.open_dataset(file_path, engine="rasterio")
     
-    crs = metadata.get("crs")
+    try:
+        if data_variable:
+            rds = rds[data_variable]
+        
+        # write crs if not available
+        if not rds.rio.crs:
+            epsg = "epsg:4326"
+            if crs and isinstance(crs, dict) and crs.get("init"):
+                epsg = crs.get("init")
+            rds = rds.rio.write_crs(epsg)
+        
+        # drop grid_mapping attr. somehow it causes errors when saving
+        if rds.rio.crs and rds.attrs.get("grid_mapping"):
+            rds.attrs.pop("grid_mapping")
+        
+        # make sure no data value is not nan
+        nodata_value = rds.encoding.get('nodata', rds.encoding.get('_FillValue'))
+        if not nodata_value or np.isnan(nodata_value):
+            rds = rds.rio.write_nodata(-9999, encoded=True)
+        
+        netcdf_attrs = []
+        for key in rds.attrs.keys():
+            if key.startswith("NETCDF_"):
+                netcdf_attrs.append(key)
+            
+            # assign only one unit
+            if key == "units" and isinstance(rds.attrs["units"], list):
+                rds.attrs["units"] = rds.attrs["units"][0]
+        
+        # delete 'NETCDF_*' attributes
+        for nc_attr in netcdf_attrs:
+            rds.attrs.pop(nc_attr)
+    except Exception:
+        rds.close()
+        raise
+    
+    return rds
+
+
+def convert_netcdf_to_geotiffs(file_path, metadata, timesteps, data_variable=None):
+    """
+    Writes many timesteps of a NetCDF file to COGs, opening and preparing the dataset once.
+    
+    Args:
+        timesteps: List of (band_index, out_file_path) tuples. band_index is the index on the time dimension,
+            or None for files without timestamps.
+    
+    Returns:
+        A list of (band_index, error) tuples, with None as error for the timesteps that were written.
+    """
     timestamps = metadata.get("timestamps", None)
     time_dimension_name = metadata.get("time_dimension_name", "time")
     
+    rds = open_netcdf_for_geotiff(file_path, metadata, data_variable=data_variable)
+    
+    results = []
+    
+    try:
+        for band_index, out_file_path in timesteps:
+            try:
+                # index must start from 0
+                if timestamps and band_index is not None:
+                    timestep_rds = rds.isel(**{time_dimension_name: int(band_index)})
+                else:
+                    timestep_rds = rds
+                
+                timestep_rds.rio.to_raster(out_file_path, driver="COG", compress="DEFLATE")
+                results.append((band_index, None))
+            except Exception as e:
+                results.append((band_index, str(e)))
+    finally:
+        rds.close()
+    
+    return results
+
+
+def convert_raster_file_to_geotiff(file_path, metadata, out_file_path, band_index=None, data_variable=None):
+    """
+    Converts a band or timestep of a raster file to a COG. Does not use the database, so that timesteps
+    can be converted in worker processes.
+    """
+    driver = metadata.get("driver")
+    
+    crs = metadata.get("crs")
+    
     # handle netcdf
     if driver == "netCDF":
-        rds = xr.open_dataset(upload.file.path, engine="rasterio")
-        
-        try:  # index must start from 0
-            if data_variable:
-                rds = rds[data_variable]
-            
-            if timestamps and band_index is not None:
-                rds = rds.isel(**{time_dimension_name: int(band_index)})
-            
-            # write crs if not available
-            if not rds.rio.crs:
-                epsg = "epsg:4326"
-                if crs and isinstance(crs, dict) and crs.get("init"):
-                    epsg = crs.get("init")
-                rds = rds.rio.write_crs(epsg)
-            
-            # drop grid_mapping attr. somehow it causes errors when saving
-            if rds.rio.crs and rds.attrs.get("grid_mapping"):
-                rds.attrs.pop("grid_mapping")
-            
-            # make sure no data value is not nan
-            nodata_value = rds.encoding.get('nodata', rds.encoding.get('_FillValue'))
-            if not nodata_value or np.isnan(nodata_value):
-                rds = rds.rio.write_nodata(-9999, encoded=True)
-            
-            netcdf_attrs = []
-            for key in rds.attrs.keys():
-                if key.startswith("NETCDF_"):
-                    netcdf_attrs.append(key)
-                
-                # assign only one unit
-                if key == "units" and isinstance(rds.attrs["units"], list):
-                    rds.attrs["units"] = rds.attrs["units"][0]
-            
-            # delete 'NETCDF_*' attributes
-            for nc_attr in netcdf_attrs:
-                rds.attrs.pop(nc_attr)
-            
-            rds.rio.to_raster(out_file_path, driver="COG", compress="DEFLATE")
-        except Exception as e:
-            raise e
-        finally:
-            rds.close()
+        [(_, error)] = convert_netcdf_to_geotiffs(file_path, metadata, [(band_index, out_file_path)],
+                                                  data_variable=data_variable)
+        if error:
+            raise RasterConvertError(error)
         
         return True
     
@@ -250,7 +631,7 @@ def convert_upload_to_geotiff(upload, out_file_path, band_index=None, data_varia
         
         # save as COG
         cog_translate(
-            upload.file.path,
+            file_path,
             out_file_path,
             output_profile,
             indexes=band_index,
@@ -265,23 +646,92 @@ def convert_upload_to_geotiff(upload, out_file_path, band_index=None, data_varia
 def create_layer_raster_file(layer, upload, time, band_index=None, data_variable=None):
     with tempfile.NamedTemporaryFile(suffix=".tif") as f:
         convert_upload_to_geotiff(upload, f.name, band_index=band_index, data_variable=data_variable)
-        with open(f.name, mode='rb') as file:
-            file_content = File(file)
-            raster = LayerRasterFile(layer=layer, time=time)
-            file_name = f"{raster.time_str}.tif"
-            if data_variable:
-                file_name = f"{data_variable}_{file_name}"
-            raster.file.save(file_name, file_content)
-            
-            try:
-                source = get_tile_source(raster.file)
-                metadata = source.getMetadata()
-                if metadata:
-                    raster.raster_metadata = metadata
-            except Exception:
-                pass
-            
-            raster.save()
+        return create_layer_raster_file_from_geotiff(layer, time, f.name, data_variable=data_variable)
+
+
+def create_layer_raster_file_from_geotiff(layer, time, geotiff_path, data_variable=None):
+    """
+    Creates a LayerRasterFile from a converted COG, with its metadata, footprint, thumbnails and derived data
+    """
+    raster = prepare_layer_raster_file(layer, time, geotiff_path, data_variable=data_variable)
+    raster.save()
+    
+    # runs immediately outside a transaction
+    transaction.on_commit(lambda: create_raster_file_derived_data(raster))
+    
+    return raster
+
+
+def prepare_layer_raster_file(layer, time, geotiff_path, data_variable=None, unique_name=False):
+    """
+    Saves a converted COG to the storage and returns an unsaved LayerRasterFile for it, with its metadata,
+    footprint and grid. Does not write to the database.
+    
+    With unique_name, the file is saved under a name of its own instead of over the file of an existing
+    row for the same time, which is left untouched until that row is replaced.
+    """
+    with open(geotiff_path, mode='rb') as file:
+        file_content = File(file)
+        raster = LayerRasterFile(layer=layer, time=time)
+        file_name = f"{raster.time_str}.tif"
+        if unique_name:
+            file_name = f"{raster.time_str}-{uuid.uuid4().hex[:8]}.tif"
+        if data_variable:
+            file_name = f"{data_variable}_{file_name}"
+        raster.file.save(file_name, file_content, save=False)
+    
+    try:
+        source = get_tile_source(raster.file)
+        metadata = source.getMetadata()
+        if metadata:
+            raster.raster_metadata = metadata
+    except Exception:
+        pass
+    
+    try:
+        raster.footprint, raster.data_mask = get_raster_footprint(field_file_to_local_path(raster.file))
+    except Exception:
+        pass
+    
+    try:
+        grid = RasterGrid.from_file(field_file_to_local_path(raster.file))
+        raster.raster_metadata = {**(raster.raster_metadata or {}), RASTER_GRID_METADATA_KEY: grid.to_dict()}
+    except Exception:
+        pass
+    
+    return raster
+
+
+def create_raster_file_derived_data(raster):
+    """
+    Creates the thumbnails, datacube slice, pixel timeseries values and admin boundary stats of a saved
+    LayerRasterFile. Should run once its row is committed.
+    """
+    try:
+        create_raster_thumbnails(raster)
+    except Exception:
+        pass
+    
+    write_raster_file_to_datacube(raster, field_file_to_local_path(raster.file))
+    
+    try:
+        append_raster_file_pixel_values(raster, field_file_to_local_path(raster.file))
+    except Exception as e:
+        logger.error(f"[GEOMANAGER_PIXEL_TIMESERIES]: Error appending {raster}: {e}")
+    
+    schedule_raster_file_admin_stats(raster)
+
+
+def invalidate_layer_raster_files(layer_id, times):
+    """
+    Invalidates the caches of the given times of a layer, for raster files created without their post_save
+    signals, e.g. with bulk_create
+    """
+    for time in times:
+        raster_tile_store.remove_time(layer_id, time)
+    
+    raster_time_index.invalidate(layer_id)
+    bump_cache_namespaces(layer_cache_namespace(layer_id))
 
 
 def clip_geotiff(geotiff_path, geom, out_file):
@@ -320,18 +770,22 @@ def clip_netcdf(nc_path, geom, out_file):
 
 
 def field_file_to_local_path_for_geostore(path, geostore):
-    field_file_basename = pathlib.PurePath(path.name).name
-    directory = get_cache_dir() / f"{type(path.instance).__name__}-{path.instance.pk}" / "geostore"
-    dest_path = directory / f"{geostore.pk.hex}-{field_file_basename}"
+    dest_path = geostore_clip_cache.get_path(path, geostore)
     lock = get_file_lock(dest_path)
-    safe = get_file_safe_path(dest_path)
     
     with lock.acquire():
-        if not safe.exists():
-            dest_path.parent.mkdir(parents=True, exist_ok=True)
-            # convert OGRGeometry to Shapely geometry for consistency in clipping
-            shapely_geom = wkb.loads(geostore.geom.hex)
-            clip_geotiff(path.file.name, shapely_geom, dest_path)
+        if dest_path.exists():
+            geostore_clip_cache.touch(dest_path)
+            return dest_path
+        
+        # convert OGRGeometry to Shapely geometry for consistency in clipping
+        shapely_geom = wkb.loads(geostore.geom.hex)
+        
+        # an existing path is always a complete clip
+        with atomic_write(dest_path) as tmp_path:
+            clip_geotiff(path.file.name, shapely_geom, tmp_path)
+    
+    geostore_clip_cache.add(dest_path)
     
     return dest_path
 
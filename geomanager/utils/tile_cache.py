@@ -0,0 +1,183 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from django_large_image.utilities import get_cache_dir
+
+from geomanager.settings import geomanager_settings
+from geomanager.utils import write_file_atomic
+from geomanager.utils.directory_cache import SizeBoundedDirectoryCache
+
+logger = logging.getLogger(__name__)
+
+
+def make_tile_cache_key(kind, source_id, version, z, x, y, fmt, style_hash=None, projection=None, geostore_id=None):
+    """
+    Builds a canonical tile cache key from the parameters that affect the rendered tile.
+
+    Args:
+        kind: Type of tile, e.g. 'raster' or 'vector'.
+        source_id: Identifier of the data the tile is rendered from, e.g. the raster file or table.
+        version: Changes whenever the source data changes, e.g. its modified timestamp.
+        style_hash: Hash of the style used to render the tile.
+        geostore_id: Geostore the tile is clipped to.
+    """
+    parts = [kind, source_id, version, style_hash or "-", projection or "-", geostore_id or "-", fmt, z, x, y]
+    return "/".join(str(part) for part in parts)
+
+
+class MemoryTileCache:
+    """
+    In-process LRU of tile bytes, bounded by the total size of the cached tiles
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._tiles = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+
+    def get(self, key):
+        with self._lock:
+            data = self._tiles.get(key)
+            if data is not None:
+                self._tiles.move_to_end(key)
+            return data
+
+    def set(self, key, data):
+        if not self.max_bytes or len(data) > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._tiles.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+
+            self._tiles[key] = data
+            self.size += len(data)
+
+            while self.size > self.max_bytes:
+                _, evicted = self._tiles.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._tiles.clear()
+            self.size = 0
+
+
+class DiskTileCache(SizeBoundedDirectoryCache):
+    """
+    Tile bytes stored as files in a directory, bounded by the total size of the files.
+
+    Files are touched when read, so that trimming the directory evicts the least recently used tiles.
+    """
+    name = "tile-cache"
+    log_prefix = "[TILE_CACHE]"
+
+    def __init__(self, root, max_bytes):
+        super().__init__(max_bytes)
+        self.root = root
+
+    def get_path(self, key):
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        return os.path.join(self.root, digest[:2], digest[2:4], f"{digest}.tile")
+
+    def get(self, key):
+        if not self.max_bytes:
+            return None
+
+        path = self.get_path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+
+        return data
+
+    def set(self, key, data):
+        if not self.max_bytes or len(data) > self.max_bytes:
+            return
+
+        try:
+            write_file_atomic(self.get_path(key), data)
+        except OSError as e:
+            logger.warning(f"[TILE_CACHE]: Error writing tile to disk cache: {e}")
+            return
+
+        self.record_write(len(data))
+
+    def iter_paths(self):
+        for dir_path, dir_names, file_names in os.walk(self.root):
+            for file_name in file_names:
+                if file_name.endswith(".tile"):
+                    yield os.path.join(dir_path, file_name)
+
+
+class TileCache:
+    """
+    Two tier tile cache: a small in-process LRU in front of a larger disk cache.
+    """
+
+    def __init__(self, memory_max_bytes, disk_root, disk_max_bytes):
+        self.memory = MemoryTileCache(memory_max_bytes)
+        self._disk_root = disk_root
+        self._disk_max_bytes = disk_max_bytes
+        self._disk = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def disk(self):
+        # the default directory is only resolved on first use, once django settings are available
+        if self._disk is None:
+            root = self._disk_root or os.path.join(get_cache_dir(), "tile_cache")
+            self._disk = DiskTileCache(str(root), self._disk_max_bytes)
+        return self._disk
+
+    def get(self, key):
+        data = self.memory.get(key)
+
+        if data is None:
+            data = self.disk.get(key)
+            if data is not None:
+                self.memory.set(key, data)
+
+        if data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return data
+
+    def set(self, key, data, disk=True):
+        """
+        Caches a tile. Use disk=False for tiles that are already persisted elsewhere, e.g. in the tile store.
+        """
+        self.memory.set(key, data)
+        if disk:
+            self.disk.set(key, data)
+
+    def clear(self):
+        self.memory.clear()
+        self.disk.clear()
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory_size": self.memory.size,
+            "memory_max_size": self.memory.max_bytes,
+            "disk_max_size": self.disk.max_bytes,
+        }
+
+
+tile_cache = TileCache(
+    memory_max_bytes=geomanager_settings.get("tile_cache_memory_max_bytes"),
+    disk_root=geomanager_settings.get("tile_cache_dir"),
+    disk_max_bytes=geomanager_settings.get("tile_cache_disk_max_bytes"),
+)
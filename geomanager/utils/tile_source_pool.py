@@ -0,0 +1,103 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from geomanager.settings import geomanager_settings
+from geomanager.utils import get_style_hash
+
+logger = logging.getLogger(__name__)
+
+
+class TileSourcePool:
+    """
+    Process-wide, size-bounded LRU pool of opened large_image tile sources.
+
+    Opening a tile source means a GDAL open plus metadata parsing, which dominates
+    the cost of rendering a single tile. Sources are kept open and keyed by
+    (file path, mtime, style hash, projection, encoding), so a replaced file gets a
+    new key even before it is explicitly invalidated.
+    """
+
+    def __init__(self, max_size=64):
+        self.max_size = max_size
+        self._sources = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(file_path, style=None, projection=None, encoding=None):
+        file_path = str(file_path)
+        try:
+            mtime = os.path.getmtime(file_path)
+        except OSError:
+            mtime = None
+
+        return file_path, mtime, get_style_hash(style), projection, encoding
+
+    def get(self, key, opener, tag=None):
+        """
+        Returns the pooled source for key, calling opener() to open it on a miss.
+
+        Args:
+            key: Key as returned by make_key.
+            opener: Callable that opens and returns a new tile source.
+            tag: Optional identifier used to invalidate the entry later,
+                 usually the storage name of the original file.
+        """
+        if not self.max_size:
+            return opener()
+
+        with self._lock:
+            entry = self._sources.get(key)
+            if entry is not None:
+                self._sources.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # open outside the lock, so that slow opens do not block other requests
+        source = opener()
+
+        with self._lock:
+            self._sources[key] = (source, tag)
+            self._sources.move_to_end(key)
+
+            while len(self._sources) > self.max_size:
+                self._sources.popitem(last=False)
+                self.evictions += 1
+
+        return source
+
+    def invalidate(self, tag):
+        """
+        Drops all pooled sources opened from the file identified by tag.
+        """
+        with self._lock:
+            stale_keys = [key for key, (source, entry_tag) in self._sources.items() if entry_tag == tag]
+            for key in stale_keys:
+                del self._sources[key]
+
+        if stale_keys:
+            logger.debug(f"[TILE_SOURCE_POOL]: Invalidated {len(stale_keys)} source(s) for {tag}")
+
+        return len(stale_keys)
+
+    def clear(self):
+        with self._lock:
+            self._sources.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._sources),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+tile_source_pool = TileSourcePool(max_size=geomanager_settings.get("tile_source_pool_size"))
@@ -0,0 +1,85 @@
+import logging
+import os
+import shutil
+
+from django.conf import settings
+
+from geomanager.settings import geomanager_settings
+from geomanager.utils import write_file_atomic
+
+logger = logging.getLogger(__name__)
+
+
+class RasterTileStore:
+    """
+    Persistent store of pre-rendered raster tiles.
+
+    Tiles are stored on disk as <root>/<layer_id>/<time>/<style_hash>/<z>/<x>/<y>.<format>,
+    so that all tiles for a layer or a single timestep can be removed at once.
+    """
+
+    def __init__(self, root=None):
+        self._root = root
+
+    @property
+    def root(self):
+        if self._root:
+            return str(self._root)
+        return os.path.join(settings.MEDIA_ROOT, "raster_tile_store")
+
+    @staticmethod
+    def time_key(time):
+        return time.strftime("%Y%m%dT%H%M%S")
+
+    def layer_dir(self, layer_id):
+        return os.path.join(self.root, str(layer_id))
+
+    def time_dir(self, layer_id, time):
+        return os.path.join(self.layer_dir(layer_id), self.time_key(time))
+
+    def tile_path(self, layer_id, time, style_hash, fmt, z, x, y):
+        return os.path.join(self.time_dir(layer_id, time), style_hash, str(z), str(x), f"{y}.{fmt}")
+
+    def exists(self, layer_id, time, style_hash, fmt, z, x, y):
+        return os.path.isfile(self.tile_path(layer_id, time, style_hash, fmt, z, x, y))
+
+    def get(self, layer_id, time, style_hash, fmt, z, x, y):
+        path = self.tile_path(layer_id, time, style_hash, fmt, z, x, y)
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, layer_id, time, style_hash, fmt, z, x, y, data):
+        path = self.tile_path(layer_id, time, style_hash, fmt, z, x, y)
+        write_file_atomic(path, data)
+        return path
+
+    def remove_time(self, layer_id, time):
+        shutil.rmtree(self.time_dir(layer_id, time), ignore_errors=True)
+
+    def remove_layer(self, layer_id):
+        shutil.rmtree(self.layer_dir(layer_id), ignore_errors=True)
+
+    def remove_other_styles(self, layer_id, style_hash):
+        """
+        Removes the tiles of a layer rendered with any style other than style_hash
+        """
+        try:
+            time_dirs = [entry.path for entry in os.scandir(self.layer_dir(layer_id)) if entry.is_dir()]
+        except OSError:
+            return
+
+        for time_dir in time_dirs:
+            try:
+                style_dirs = [entry for entry in os.scandir(time_dir) if entry.is_dir()]
+            except OSError:
+                # removed with its time
+                continue
+            for entry in style_dirs:
+                if entry.name != style_hash:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+
+
+raster_tile_store = RasterTileStore(root=geomanager_settings.get("raster_tile_store_dir"))
@@ -0,0 +1,177 @@
+import bisect
+import datetime
+import threading
+import time as time_module
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from geomanager.settings import geomanager_settings
+
+TIME_MATCH_EXACT = "exact"
+TIME_MATCH_NEAREST = "nearest"
+TIME_MATCH_PREVIOUS = "previous"
+TIME_MATCH_NEXT = "next"
+
+TIME_MATCH_CHOICES = [TIME_MATCH_EXACT, TIME_MATCH_NEAREST, TIME_MATCH_PREVIOUS, TIME_MATCH_NEXT]
+
+TIME_LATEST = "latest"
+
+
+def parse_time(value):
+    """
+    Parses an ISO 8601 time string to an aware datetime, in the current time zone if no offset is given.
+    Returns None if the value can not be parsed.
+    """
+    if isinstance(value, datetime.datetime):
+        parsed = value
+    else:
+        try:
+            parsed = parse_datetime(str(value))
+        except ValueError:
+            parsed = None
+
+    if parsed is None:
+        return None
+
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, timezone.get_current_timezone())
+
+    return parsed
+
+
+class LayerTimeIndex:
+    """
+    Sorted times of the raster files of a single layer
+    """
+
+    def __init__(self, raster_files):
+        self.raster_files = sorted(raster_files, key=lambda raster_file: raster_file.time)
+        self.times = [raster_file.time for raster_file in self.raster_files]
+        self.loaded_at = time_module.monotonic()
+
+    def __len__(self):
+        return len(self.times)
+
+    def latest(self):
+        return self.raster_files[-1] if self.raster_files else None
+
+    def find(self, time, match=TIME_MATCH_EXACT):
+        """
+        Finds the raster file for the given time.
+
+        Args:
+            time: Aware datetime.
+            match: One of exact, nearest, previous (the latest file at or before the time)
+                   or next (the earliest file at or after the time).
+        """
+        if not self.times:
+            return None
+
+        index = bisect.bisect_left(self.times, time)
+        exact = index < len(self.times) and self.times[index] == time
+
+        if exact:
+            return self.raster_files[index]
+
+        if match == TIME_MATCH_PREVIOUS:
+            return self.raster_files[index - 1] if index > 0 else None
+
+        if match == TIME_MATCH_NEXT:
+            return self.raster_files[index] if index < len(self.times) else None
+
+        if match == TIME_MATCH_NEAREST:
+            if index == 0:
+                return self.raster_files[0]
+            if index == len(self.times):
+                return self.raster_files[-1]
+            before, after = self.times[index - 1], self.times[index]
+            return self.raster_files[index - 1] if time - before <= after - time else self.raster_files[index]
+
+        return None
+
+
+class RasterTimeIndex:
+    """
+    Process-wide index of the raster file times of each layer.
+
+    Resolving a time to a raster file is a bisect on a sorted list instead of a database query.
+    Entries are invalidated by signals when raster files, layers or styles change in this process,
+    and expire after GEOMANAGER_RASTER_TIME_INDEX_TTL seconds to pick up changes from other processes,
+    such as files ingested by management commands.
+
+    An exact time that is not in the index reloads the layer, at most once every
+    GEOMANAGER_RASTER_TIME_INDEX_REFRESH_INTERVAL seconds, so that requests for missing times
+    do not reload the layer on every request.
+    """
+
+    def __init__(self, ttl=60, refresh_interval=5):
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+        self._layers = {}
+        self._lock = threading.Lock()
+
+    def _load(self, layer_id):
+        from geomanager.models import LayerRasterFile
+
+        raster_files = LayerRasterFile.objects.filter(layer_id=layer_id).select_related("layer__style")
+
+        return LayerTimeIndex(raster_files)
+
+    def _is_fresh(self, layer_index):
+        if not self.ttl:
+            return False
+        return time_module.monotonic() - layer_index.loaded_at < self.ttl
+
+    def _can_refresh(self, layer_index):
+        return time_module.monotonic() - layer_index.loaded_at >= self.refresh_interval
+
+    def get_layer_index(self, layer_id, refresh=False):
+        key = str(layer_id)
+
+        with self._lock:
+            layer_index = self._layers.get(key)
+
+        if refresh or layer_index is None or not self._is_fresh(layer_index):
+            layer_index = self._load(layer_id)
+            with self._lock:
+                self._layers[key] = layer_index
+
+        return layer_index
+
+    def resolve(self, layer_id, time, match=TIME_MATCH_EXACT):
+        """
+        Returns the raster file of the layer matching time, or None.
+
+        Args:
+            layer_id: Layer id.
+            time: 'latest', or an ISO 8601 time string or datetime.
+            match: How to match times that do not have a raster file. See LayerTimeIndex.find.
+        """
+        if time == TIME_LATEST:
+            return self.get_layer_index(layer_id).latest()
+
+        parsed_time = parse_time(time)
+        if parsed_time is None:
+            return None
+
+        layer_index = self.get_layer_index(layer_id)
+        raster_file = layer_index.find(parsed_time, match=match)
+
+        # the file might have been added by another process since the index was loaded
+        if raster_file is None and match == TIME_MATCH_EXACT and self._can_refresh(layer_index):
+            raster_file = self.get_layer_index(layer_id, refresh=True).find(parsed_time, match=match)
+
+        return raster_file
+
+    def invalidate(self, layer_id):
+        with self._lock:
+            self._layers.pop(str(layer_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._layers.clear()
+
+
+raster_time_index = RasterTimeIndex(ttl=geomanager_settings.get("raster_time_index_ttl"),
+                                    refresh_interval=geomanager_settings.get("raster_time_index_refresh_interval"))
@@ -0,0 +1,144 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import rasterio as rio
+from rasterio.windows import Window
+
+from geomanager.settings import geomanager_settings
+
+# size of the blocks points are grouped by when sampling many points, each block with points is read as one window
+POINTS_BLOCK_SIZE = 512
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_timeseries_executor():
+    """
+    Returns the process-wide thread pool used to read raster files for timeseries, bounded by
+    GEOMANAGER_RASTER_TIMESERIES_WORKERS so that concurrent requests share the same workers
+    """
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=geomanager_settings.get("raster_timeseries_workers"),
+                                           thread_name_prefix="geomanager-timeseries")
+    return _executor
+
+
+def get_pixel_row_col(grid, x_coord, y_coord, row_cols=None):
+    """
+    Returns the (row, col) of the pixel at the coordinates on a RasterGrid, or None if outside the grid.
+    Results are memoized in row_cols by grid, so that files sharing a grid compute it once.
+    """
+    key = (grid.transform, grid.width, grid.height)
+
+    if row_cols is not None and key in row_cols:
+        return row_cols[key]
+
+    row_col = grid.rowcol(x_coord, y_coord)
+
+    if row_cols is not None:
+        row_cols[key] = row_col
+
+    return row_col
+
+
+def read_pixel_value(file_path, x_coord, y_coord, grid, row_cols=None):
+    """
+    Reads the band 1 value at the coordinates from a raster file, reading only the single pixel window.
+    Returns None for no data or coordinates outside the raster. grid is the RasterGrid of the file.
+    """
+    row_col = get_pixel_row_col(grid, x_coord, y_coord, row_cols=row_cols)
+
+    if row_col is None:
+        return None
+
+    row, col = row_col
+
+    with rio.open(str(file_path)) as src:
+        return read_src_pixel_value(src, row, col)
+
+
+def read_src_pixel_value(src, row, col):
+    """
+    Reads the band 1 value of the pixel at (row, col) from an open rasterio dataset.
+    Returns None for no data.
+    """
+    value = src.read(1, window=Window(col, row, 1, 1), masked=True)[0, 0]
+
+    if value is np.ma.masked:
+        return None
+
+    value = value.item()
+
+    if isinstance(value, float) and np.isnan(value):
+        return None
+
+    return value
+
+
+def iter_pixel_timeseries(file_paths, x_coord, y_coord, grids):
+    """
+    Reads the pixel value at the coordinates from each file on the timeseries thread pool.
+    Yields the values as they become available, in the order of file_paths.
+    grids is the list of the RasterGrid of each file.
+    """
+    row_cols = {}
+
+    def read(file_path, grid):
+        return read_pixel_value(file_path, x_coord, y_coord, grid, row_cols=row_cols)
+
+    return get_timeseries_executor().map(read, file_paths, grids)
+
+
+def read_pixel_values(file_path, x_coords, y_coords, grid):
+    """
+    Reads the band 1 values at many coordinates from a raster file.
+
+    Points are grouped by blocks of POINTS_BLOCK_SIZE pixels, and the pixels of each block are sampled from a single
+    window read, so nearby points share a read. Returns a list of values in the order of the coordinates,
+    with None for no data or coordinates outside the raster. grid is the RasterGrid of the file.
+    """
+    rows, cols = rio.transform.rowcol(grid.transform, x_coords, y_coords)
+    rows, cols = np.atleast_1d(rows), np.atleast_1d(cols)
+
+    values = [None] * len(rows)
+    indexes = np.nonzero((rows >= 0) & (rows < grid.height) & (cols >= 0) & (cols < grid.width))[0]
+
+    if not indexes.size:
+        return values
+
+    blocks_per_row = grid.width // POINTS_BLOCK_SIZE + 1
+    block_keys = (rows[indexes] // POINTS_BLOCK_SIZE) * blocks_per_row + cols[indexes] // POINTS_BLOCK_SIZE
+
+    with rio.open(str(file_path)) as src:
+        for block_key in np.unique(block_keys):
+            block_indexes = indexes[block_keys == block_key]
+            block_rows, block_cols = rows[block_indexes], cols[block_indexes]
+            row_off, col_off = int(block_rows.min()), int(block_cols.min())
+
+            window = Window(col_off, row_off, int(block_cols.max()) - col_off + 1, int(block_rows.max()) - row_off + 1)
+            data = src.read(1, window=window, masked=True)
+            sampled = data[block_rows - row_off, block_cols - col_off]
+
+            for index, value, masked in zip(block_indexes, sampled.data.tolist(), np.ma.getmaskarray(sampled)):
+                if masked or (isinstance(value, float) and np.isnan(value)):
+                    continue
+                values[index] = value
+
+    return values
+
+
+def iter_pixel_values(file_paths, x_coords, y_coords, grids):
+    """
+    Reads the pixel values at the coordinates from each file on the timeseries thread pool.
+    Yields a list of values per file, in the order of file_paths. grids is the list of the RasterGrid of each file.
+    """
+
+    def read(file_path, grid):
+        return read_pixel_values(file_path, x_coords, y_coords, grid)
+
+    return get_timeseries_executor().map(read, file_paths, grids)
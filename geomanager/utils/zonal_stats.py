@@ -0,0 +1,356 @@
+import hashlib
+import logging
+import math
+import multiprocessing
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import rasterio as rio
+from rasterio.features import geometry_mask
+from rasterio.windows import Window, from_bounds
+from shapely import wkb
+from shapely.geometry import box
+from shapely.prepared import prep
+
+from geomanager.settings import geomanager_settings
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class ZonalStats:
+    """
+    Running count, sum, min and max of raster values, accumulated block by block
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def update(self, values):
+        if not values.size:
+            return
+
+        values = values.astype(np.float64, copy=False)
+        block_min, block_max = values.min().item(), values.max().item()
+
+        self.count += values.size
+        self.sum += values.sum().item()
+        self.min = block_min if self.min is None else min(self.min, block_min)
+        self.max = block_max if self.max is None else max(self.max, block_max)
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+    def as_dict(self, value_type=None):
+        return format_zonal_stats(value_type, self.count, self.sum, self.min, self.max)
+
+
+def format_zonal_stats(value_type, count, total, minimum, maximum):
+    """
+    Returns the statistics for value_type, with the same keys as get_values_stats.
+    Returns an empty dict if there are no values.
+    """
+    if not count:
+        return {}
+
+    if value_type == "sum":
+        return {"sum": total}
+    if value_type == "minmax":
+        return {"min": minimum, "max": maximum}
+    if value_type == "minmeanmax":
+        return {"min": minimum, "max": maximum, "mean": total / count}
+
+    return {"mean": total / count}
+
+
+def get_geometry_window(src, geom):
+    """
+    Returns the window of the dataset covering the bounds of the geometry, or None if they do not overlap
+    """
+    window = from_bounds(*geom.bounds, transform=src.transform)
+
+    row_start = max(0, math.floor(window.row_off))
+    col_start = max(0, math.floor(window.col_off))
+    row_stop = min(src.height, math.ceil(window.row_off + window.height))
+    col_stop = min(src.width, math.ceil(window.col_off + window.width))
+
+    if row_start >= row_stop or col_start >= col_stop:
+        return None
+
+    return Window(col_start, row_start, col_stop - col_start, row_stop - row_start)
+
+
+def iter_blocks(window, block_size):
+    for row_off in range(window.row_off, window.row_off + window.height, block_size):
+        height = min(block_size, window.row_off + window.height - row_off)
+        for col_off in range(window.col_off, window.col_off + window.width, block_size):
+            width = min(block_size, window.col_off + window.width - col_off)
+            yield Window(col_off, row_off, width, height)
+
+
+class BlockMaskCache:
+    """
+    LRU of rasterized geometry masks per raster block, keyed by geometry, grid and block.
+
+    Raster files of a layer usually share a grid, so the mask of a geometry is rasterized once per block
+    and reused for every file. Blocks entirely outside or inside the geometry are cached without an array.
+    Masks are stored bit packed to keep the cache small.
+    """
+
+    OUTSIDE = "outside"
+    INSIDE = "inside"
+
+    def __init__(self, max_blocks):
+        self.max_blocks = max_blocks
+        self._masks = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, geom_key, geom, prepared_geom, src, block):
+        key = (geom_key, tuple(src.transform)[:6], block.col_off, block.row_off, block.width, block.height)
+
+        with self._lock:
+            mask = self._masks.get(key)
+            if mask is not None:
+                self._masks.move_to_end(key)
+
+        if mask is None:
+            block_box = box(*src.window_bounds(block))
+
+            if not prepared_geom.intersects(block_box):
+                mask = self.OUTSIDE
+            elif prepared_geom.contains(block_box):
+                mask = self.INSIDE
+            else:
+                inside = geometry_mask([geom], out_shape=(block.height, block.width),
+                                       transform=src.window_transform(block), invert=True)
+                mask = np.packbits(inside)
+
+            if self.max_blocks:
+                with self._lock:
+                    self._masks[key] = mask
+                    while len(self._masks) > self.max_blocks:
+                        self._masks.popitem(last=False)
+
+        if isinstance(mask, str):
+            return mask
+
+        return np.unpackbits(mask, count=block.height * block.width).reshape(block.height, block.width).astype(bool)
+
+
+block_mask_cache = BlockMaskCache(geomanager_settings.get("raster_zonal_stats_mask_cache_blocks"))
+
+
+def get_geometry_key(geom):
+    return hashlib.md5(geom.wkb).hexdigest()
+
+
+def get_zonal_stats(file_path, geom, value_type=None, band=1, geom_key=None):
+    """
+    Returns the statistics of the raster values within a shapely geometry for value_type, see compute_zonal_stats
+    """
+    return compute_zonal_stats(file_path, geom, band=band, geom_key=geom_key).as_dict(value_type)
+
+
+def compute_zonal_stats(file_path, geom, band=1, geom_key=None):
+    """
+    Computes a ZonalStats of the raster values within a shapely geometry, in the CRS of the raster.
+
+    Only the window covering the geometry bounds is read, in blocks of GEOMANAGER_RASTER_ZONAL_STATS_BLOCK_SIZE
+    pixels, so memory use does not depend on the size of the geometry. Blocks outside the geometry are skipped,
+    and the geometry is only rasterized for blocks that cross its boundary. Pixel selection matches
+    rasterio.mask.mask, i.e. pixels whose center is within the geometry.
+    """
+    block_size = geomanager_settings.get("raster_zonal_stats_block_size")
+    stats = ZonalStats()
+    prepared_geom = prep(geom)
+
+    if geom_key is None:
+        geom_key = get_geometry_key(geom)
+
+    with rio.open(str(file_path)) as src:
+        window = get_geometry_window(src, geom)
+
+        if window is None:
+            return stats
+
+        for block in iter_blocks(window, block_size):
+            mask = block_mask_cache.get(geom_key, geom, prepared_geom, src, block)
+
+            if mask is BlockMaskCache.OUTSIDE:
+                continue
+
+            data = src.read(band, window=block, masked=True)
+            valid = ~np.ma.getmaskarray(data)
+
+            if mask is not BlockMaskCache.INSIDE:
+                valid &= mask
+
+            values = data.data[valid]
+
+            if values.dtype.kind == "f":
+                values = values[~np.isnan(values)]
+
+            stats.update(values)
+
+    return stats
+
+
+def get_zonal_stats_executor():
+    """
+    Returns the process pool used to compute zonal statistics for geostore timeseries,
+    sized by GEOMANAGER_RASTER_ZONAL_STATS_PROCESSES and shared by all requests of this process.
+
+    Workers are spawned rather than forked, since the web worker creating the pool runs other threads.
+    """
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=geomanager_settings.get("raster_zonal_stats_processes"),
+                                            mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+def reset_zonal_stats_executor(executor):
+    """
+    Discards a broken pool, e.g. after a worker was killed, so that the next request creates a new one
+    """
+    global _executor
+
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+_worker_geoms = {}
+
+
+def _compute_zonal_stats(file_path, geom_wkb, geom_key, value_type):
+    # runs in a worker process. The geometry is parsed once per worker, so that the block masks are reused
+    geom = _worker_geoms.get(geom_key)
+    if geom is None:
+        _worker_geoms.clear()
+        geom = _worker_geoms[geom_key] = wkb.loads(geom_wkb)
+
+    try:
+        return get_zonal_stats(file_path, geom, value_type, geom_key=geom_key)
+    except Exception as e:
+        logger.warning(f"[GEOMANAGER_ZONAL_STATS]: Error computing zonal stats for {file_path}: {e}")
+        return {}
+
+
+def iter_zonal_stats(file_paths, geom, value_type=None):
+    """
+    Computes the zonal statistics of a geometry for each file on the zonal stats process pool.
+    Yields the results in the order of file_paths.
+
+    At most GEOMANAGER_RASTER_ZONAL_STATS_REQUEST_WORKERS files are in progress at a time, so that
+    a long timeseries does not take over the pool from other requests. If the pool breaks, the pool is
+    replaced for the next requests, and the remaining files of this request are computed in process.
+    """
+    executor = get_zonal_stats_executor()
+    max_pending = max(1, geomanager_settings.get("raster_zonal_stats_request_workers"))
+    geom_wkb = geom.wkb
+    geom_key = get_geometry_key(geom)
+    pending = deque()
+    broken = False
+
+    def get_result(file_path, future):
+        nonlocal broken
+
+        if future is not None:
+            try:
+                return future.result()
+            except BrokenProcessPool:
+                if not broken:
+                    logger.warning("[GEOMANAGER_ZONAL_STATS]: Process pool broken, computing in process")
+                    broken = True
+                    reset_zonal_stats_executor(executor)
+
+        try:
+            return get_zonal_stats(file_path, geom, value_type, geom_key=geom_key)
+        except Exception as e:
+            logger.warning(f"[GEOMANAGER_ZONAL_STATS]: Error computing zonal stats for {file_path}: {e}")
+            return {}
+
+    for file_path in file_paths:
+        file_path = str(file_path)
+        future = None
+
+        if not broken:
+            try:
+                future = executor.submit(_compute_zonal_stats, file_path, geom_wkb, geom_key, value_type)
+            except (BrokenProcessPool, RuntimeError):
+                broken = True
+                reset_zonal_stats_executor(executor)
+
+        pending.append((file_path, future))
+        if len(pending) >= max_pending:
+            yield get_result(*pending.popleft())
+
+    while pending:
+        yield get_result(*pending.popleft())
+
+
+def _compute_geometry_zonal_stats(file_path, geom_wkb):
+    # runs in a worker process
+    return compute_zonal_stats(file_path, wkb.loads(geom_wkb))
+
+
+def iter_geometries_zonal_stats(file_path, geoms):
+    """
+    Computes a ZonalStats of each shapely geometry of geoms for a single file on the zonal stats process pool,
+    so that computing many geometries, e.g. all admin boundaries, does not hold the GIL of the calling process.
+    Yields the results in the order of geoms.
+
+    At most GEOMANAGER_RASTER_ZONAL_STATS_REQUEST_WORKERS geometries are in progress at a time. If the pool
+    breaks, it is replaced for the next callers, and the remaining geometries are computed in process.
+    Other errors are raised.
+    """
+    executor = get_zonal_stats_executor()
+    max_pending = max(1, geomanager_settings.get("raster_zonal_stats_request_workers"))
+    file_path = str(file_path)
+    pending = deque()
+    broken = False
+
+    def get_result(geom, future):
+        nonlocal broken
+
+        if future is not None:
+            try:
+                return future.result()
+            except BrokenProcessPool:
+                if not broken:
+                    logger.warning("[GEOMANAGER_ZONAL_STATS]: Process pool broken, computing in process")
+                    broken = True
+                    reset_zonal_stats_executor(executor)
+
+        return compute_zonal_stats(file_path, geom)
+
+    for geom in geoms:
+        future = None
+
+        if not broken:
+            try:
+                future = executor.submit(_compute_geometry_zonal_stats, file_path, geom.wkb)
+            except (BrokenProcessPool, RuntimeError):
+                broken = True
+                reset_zonal_stats_executor(executor)
+
+        pending.append((geom, future))
+        if len(pending) >= max_pending:
+            yield get_result(*pending.popleft())
+
+    while pending:
+        yield get_result(*pending.popleft())
@@ -9,6 +9,7 @@ from .raster_file import (
     publish_raster,
     delete_raster_upload,
     RasterTileView,
+    RasterTileStackView,
     preview_raster_layers
 )
 from .tile_gl import tile_gl, tile_json_gl, style_json_gl
@@ -7,8 +7,10 @@ from django.db import connection
 from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render
 from django.urls import reverse
+from django.utils.decorators import method_decorator
 from django.utils.translation import gettext as _
 from django.views import View
+from django.views.decorators.http import condition
 from wagtail.admin.views.generic import (
     IndexView,
     CreateView,
@@ -19,6 +21,7 @@ from wagtail.admin.views.generic import (
 from geomanager.forms.boundary import AdditionalBoundaryDataAddForm, AdditionalBoundaryDataEditForm
 from geomanager.models import AdditionalMapBoundaryData, Geostore
 from geomanager.serializers.geostore import GeostoreSerializer
+from geomanager.utils import make_etag
 
 
 def boundary_landing_view(request, ):
@@ -88,6 +91,16 @@ class AdditionalBoundaryDeleteView(DeleteView):
     success_message = _("Boundary dataset '%(object)s' deleted.")
 
 
+def boundary_tile_etag(request, table_name, **kwargs):
+    # boundary data tables are only written when the boundary dataset is created,
+    # so the dataset id and table name identify the tile data
+    pk = AdditionalMapBoundaryData.objects.filter(table_name=table_name).values_list("pk", flat=True).first()
+    if not pk:
+        return None
+    return make_etag(pk, table_name)
+
+
+@method_decorator(condition(etag_func=boundary_tile_etag), name='get')
 class AdditionalBoundaryVectorTileView(View):
     def get(self, request, table_name, z, x, y):
         try:
@@ -1,13 +1,17 @@
 import datetime
+import io
 import json
+import math
+import mimetypes
 import tempfile
+import uuid
 from typing import Optional, Any
 
 import pytz
 from adminboundarymanager.models import AdminBoundarySettings, AdminBoundary
-from django.core.cache import cache
 from django.core.exceptions import ValidationError, ObjectDoesNotExist
 from django.core.files.base import File
+from django.db import connection
 from django.http import JsonResponse, HttpResponse
 from django.shortcuts import get_object_or_404, render
 from django.template.defaultfilters import filesizeformat
@@ -15,7 +19,10 @@ from django.template.loader import render_to_string
 from django.urls import reverse
 from django.utils.decorators import method_decorator
 from django.utils.translation import gettext as _
+from django.views.decorators.http import condition
 from django_large_image import tilesource
+from django_large_image.utilities import field_file_to_local_path
+from PIL import Image
 from large_image.exceptions import TileSourceXYZRangeError
 from rest_framework.renderers import JSONRenderer
 from rest_framework.request import Request
@@ -31,10 +38,15 @@ from wagtail.api.v2.utils import get_full_url
 from wagtail.models import Site
 from wagtail.snippets.permissions import get_permission_name
 from wagtail_modeladmin.helpers import AdminURLHelper
-from wagtailcache.cache import cache_page
 
-from geomanager.decorators import revalidate_cache
-from geomanager.errors import RasterFileNotFound, QueryParamRequired, GeostoreNotFound
+from geomanager.decorators import revalidate_cache, namespaced_cache_page
+from geomanager.errors import (
+    RasterFileNotFound,
+    QueryParamRequired,
+    GeostoreNotFound,
+    InvalidPoints,
+    UnsupportedExportFormat
+)
 from geomanager.forms import LayerRasterFileForm
 from geomanager.models import (
     Category,
@@ -44,21 +56,45 @@ from geomanager.models import (
     LayerRasterFile,
     Geostore,
     GeomanagerSettings,
+    RasterAdminBoundaryStats,
 )
 from geomanager.serializers import RasterFileLayerSerializer
-from geomanager.utils import UUIDEncoder
+from geomanager.settings import geomanager_settings
+from geomanager.utils import UUIDEncoder, make_etag, get_style_hash
+from geomanager.utils.admin_stats import get_raster_files_admin_stats
+from geomanager.utils.cache_namespace import layer_cache_namespace
+from geomanager.utils.colormap import get_empty_png
+from geomanager.utils.datacube import read_datacube_pixel_timeseries, read_datacube_geometry_timeseries
+from geomanager.utils.export import export_response, get_export_formats
+from geomanager.utils.pixel_timeseries import get_pixel_timeseries_entry, save_pixel_timeseries_values, get_grid_key
 from geomanager.utils.raster_utils import (
     get_tile_source,
+    get_geostore_or_none,
+    get_local_file_path,
+    get_layer_style_json,
+    get_layer_style_key,
+    get_raster_thumbnail,
+    render_raster_tile,
+    raster_tile_has_data,
+    get_tile_stack_executor,
     read_raster_info,
     create_layer_raster_file,
     get_raster_pixel_data, get_geostore_data,
+    get_values_stats,
     check_raster_bounds_with_boundary,
     clip_netcdf, clip_geotiff,
     bounds_to_polygon
 )
+from geomanager.utils.tile_cache import tile_cache, make_tile_cache_key
+from geomanager.utils.tile_store import raster_tile_store
+from geomanager.utils.time_index import raster_time_index, parse_time, TIME_MATCH_EXACT, TIME_MATCH_CHOICES
+from geomanager.utils.timeseries import iter_pixel_timeseries, iter_pixel_values
+from geomanager.utils.zonal_stats import iter_zonal_stats
 
 ALLOWED_RASTER_EXTENSIONS = ["tif", "tiff", "geotiff", "nc"]
 
+TIMESERIES_EXPORT_COLUMNS = {"date": "timestamp", "value": "float"}
+
 
 @user_passes_test(user_has_any_page_permission)
 def upload_raster_file(request, dataset_id=None, layer_id=None):
@@ -442,30 +478,34 @@ class RasterDataMixin:
         time = self.get_query_param(request, "time")
         if not time:
             raise QueryParamRequired(_("time param required"))
-        qs = (LayerRasterFile.objects
-              .select_related("layer__style"))
-        try:
-            return qs.get(layer_id=layer_id, time=time)
-        except LayerRasterFile.DoesNotExist:
+        
+        time_match = self.get_query_param(request, "time_match", TIME_MATCH_EXACT)
+        if time_match not in TIME_MATCH_CHOICES:
+            time_match = TIME_MATCH_EXACT
+        
+        raster_file = raster_time_index.resolve(layer_id, time, match=time_match)
+        
+        if not raster_file:
             msg = _("File not found matching 'layer': %(layer_id)s and 'time': %(time)s") % {"layer_id": layer_id,
                                                                                              "time": time}
             raise RasterFileNotFound(msg)
-        except LayerRasterFile.MultipleObjectsReturned:
-            obj = (qs.filter(layer_id=layer_id, time=time)
-                   .order_by("-updated_at", "-id")
-                   .first())
-            return obj
+        
+        return raster_file
     
     def get_multiple_raster_files(self, request: Request, layer_id) -> [LayerRasterFile]:
+        times = self.get_query_param(request, "times")
         time_from = self.get_query_param(request, "time_from")
         time_to = self.get_query_param(request, "time_to")
         
-        if not time_from and not time_to:
-            raise QueryParamRequired(_("time_from or time_to param required"))
+        if not times and not time_from and not time_to:
+            raise QueryParamRequired(_("times, time_from or time_to param required"))
         
         time_filter = {}
         
-        if time_to and time_from:
+        if times:
+            parsed_times = [parse_time(time) for time in times.split(",")]
+            time_filter.update({"time__in": [time for time in parsed_times if time is not None]})
+        elif time_to and time_from:
             time_filter.update({"time__range": [time_from, time_to]})
         elif time_from:
             time_filter.update({"time__gte": time_from})
@@ -515,21 +555,150 @@ class RasterDataMixin:
     def get_raster_geostore_data(self, raster_file, geostore, value_type):
         geostore_data = get_geostore_data(raster_file.file, geostore)
     
+    def get_export_format(self, request: Request) -> Optional[str]:
+        export_format = self.get_query_param(request, "export")
+        
+        if export_format and export_format not in get_export_formats():
+            error_message = _("Unsupported export format: %(export_format)s. Supported formats: %(formats)s") % {
+                "export_format": export_format, "formats": ", ".join(get_export_formats())}
+            raise UnsupportedExportFormat(error_message)
+        
+        return export_format or None
+    
     def get_query_param(self, request: Request, key: str, default: Optional[Any] = '') -> str:
         return request.query_params.get(key, str(default))
 
 
-def get_layer_style_json(raster_file):
-    key = f"layer-style:{raster_file.layer_id}"
-    data = cache.get(key)
-    if data is None:
-        data = raster_file.layer.style.get_style_as_json()
-        cache.set(key, data, 60 * 60 * 24)  # cache for 24 hours
-    return data
+def raster_layer_cache_namespaces(request, layer_id, **kwargs):
+    return [layer_cache_namespace(layer_id)]
+
+
+def raster_file_cache_namespaces(request, file_id, **kwargs):
+    layer_id = LayerRasterFile.objects.filter(pk=file_id).values_list("layer_id", flat=True).first()
+    if not layer_id:
+        return None
+    return [layer_cache_namespace(layer_id)]
+
+
+def get_conditional_raster_file(request, layer_id):
+    """
+    Looks up the raster file for a tile request, for computing conditional response headers.
+    The result is memoized on the request, since both the ETag and Last-Modified functions need it.
+    """
+    if not hasattr(request, "_conditional_raster_file"):
+        raster_file = None
+        time = request.GET.get("time")
+        if time:
+            time_match = request.GET.get("time_match", TIME_MATCH_EXACT)
+            if time_match not in TIME_MATCH_CHOICES:
+                time_match = TIME_MATCH_EXACT
+            raster_file = raster_time_index.resolve(layer_id, time, match=time_match)
+        request._conditional_raster_file = raster_file
+    return request._conditional_raster_file
+
+
+def raster_tile_etag(request, layer_id, **kwargs):
+    raster_file = get_conditional_raster_file(request, layer_id)
+    if not raster_file:
+        return None
+    
+    style = raster_file.layer.style
+    
+    return make_etag(raster_file.pk, raster_file.modified.timestamp(), style.version if style else None)
+
+
+def raster_tile_last_modified(request, layer_id, **kwargs):
+    raster_file = get_conditional_raster_file(request, layer_id)
+    if not raster_file:
+        return None
+    
+    style = raster_file.layer.style
+    
+    if style and style.modified:
+        return max(raster_file.modified, style.modified)
+    
+    return raster_file.modified
+
+
+def get_raster_tile_style(raster_file, fmt, style_param):
+    """
+    Decides the style for rendering tiles of a raster file, preferring the compiled layer style
+    unless a custom style json is provided.
+    
+    Returns:
+        A tuple of (style, compiled_style, style_key, use_layer_style)
+    """
+    style = None
+    compiled_style = None
+    use_layer_style = not style_param or style_param == "layer-style"
+    
+    if not use_layer_style:
+        try:
+            style = json.loads(style_param)  # simple validation; harden as needed
+        except Exception:
+            # fallback to layer style if param is invalid
+            use_layer_style = True
+    
+    layer_style = raster_file.layer.style
+    
+    if use_layer_style and layer_style:
+        compiled_style = layer_style.get_compiled_style()
+        if fmt != "png":
+            style = get_layer_style_json(raster_file)
+    
+    style_key = get_layer_style_key(raster_file.layer) if use_layer_style else get_style_hash(style)
+    
+    return style, compiled_style, style_key, use_layer_style
+
+
+def get_raster_file_tile(raster_file, z, x, y, fmt="png", projection="EPSG:3857", style=None, compiled_style=None,
+                         style_key=None, use_layer_style=True, geostore=None):
+    """
+    Returns a tile of a raster file, from the tile cache or tile store if available, otherwise rendered.
+    Does not query the database, so that it can be called from worker threads.
+    
+    Returns:
+        A tuple of (tile_binary, mime_type). tile_binary is None for empty tiles in formats other than png.
+    """
+    # tiles outside the footprint or data areas of the raster are empty, no need to open the file
+    if projection == "EPSG:3857" and not raster_tile_has_data(raster_file, z, x, y):
+        if fmt == "png":
+            return get_empty_png(), "image/png"
+        return None, None
+    
+    geostore_id = geostore.pk if geostore else None
+    mime_type = mimetypes.guess_type(f"tile.{fmt}")[0] or "application/octet-stream"
+    
+    # only parameters that affect the rendered tile are part of the key, so reordered query params still hit
+    cache_key = make_tile_cache_key("raster", raster_file.pk, raster_file.modified.timestamp(), z, x, y, fmt,
+                                    style_hash=style_key, projection=projection, geostore_id=geostore_id)
+    tile_binary = tile_cache.get(cache_key)
+    if tile_binary is not None:
+        return tile_binary, mime_type
+    
+    # only tiles rendered with the layer style in web mercator are pre-rendered
+    use_tile_store = use_layer_style and not geostore and projection == "EPSG:3857"
+    
+    if use_tile_store:
+        tile_binary = raster_tile_store.get(raster_file.layer_id, raster_file.time, style_key, fmt, z, x, y)
+        if tile_binary is not None:
+            # already on disk in the tile store, only keep it in memory
+            tile_cache.set(cache_key, tile_binary, disk=False)
+            return tile_binary, mime_type
+    
+    file_path = get_local_file_path(raster_file.file, geostore=geostore)
+    
+    tile_binary, mime_type = render_raster_tile(file_path, x, y, z, tag=raster_file.file.name, fmt=fmt,
+                                                projection=projection, style=style, compiled_style=compiled_style,
+                                                nodata=raster_file.grid.nodata)
+    
+    tile_cache.set(cache_key, tile_binary)
+    
+    return tile_binary, mime_type
 
 
 @method_decorator(revalidate_cache, name='get')
-@method_decorator(cache_page, name='get')
+@method_decorator(condition(etag_func=raster_tile_etag, last_modified_func=raster_tile_last_modified), name='get')
 class RasterTileView(RasterDataMixin, APIView):
     # TODO: Validate style query param thoroughly. If not validated, the whole app just exits without warning.
     def get(self, request, layer_id, z, x, y):
@@ -543,38 +712,135 @@ class RasterTileView(RasterDataMixin, APIView):
         fmt = self.get_query_param(request, "format", "png")
         projection = self.get_query_param(request, "projection", "EPSG:3857")
         style_param = self.get_query_param(request, "style")
-        geostore_id = self.get_query_param(request, "geostore_id")
-        
-        # Decide the style (prefer cached layer style unless a custom JSON is provided)
-        style = None
-        if not style_param or style_param == "layer-style":
-            style = get_layer_style_json(raster_file)
-        else:
-            try:
-                style = json.loads(style_param)  # simple validation; harden as needed
-            except Exception:
-                # fallback to layer style if param is invalid
-                style = get_layer_style_json(raster_file)
+        geostore = get_geostore_or_none(self.get_query_param(request, "geostore_id"))
         
-        encoding = tilesource.format_to_encoding(fmt, pil_safe=True)
-        options = {
-            "encoding": encoding,
-            "projection": projection,
-            "style": style,
-            "geostore_id": geostore_id,
-        }
+        style, compiled_style, style_key, use_layer_style = get_raster_tile_style(raster_file, fmt, style_param)
         
-        source = get_tile_source(path=raster_file.file, options=options)
-        mime_type = source.getTileMimeType()
         try:
-            tile_binary = source.getTile(int(x), int(y), int(z))
+            tile_binary, mime_type = get_raster_file_tile(raster_file, int(z), int(x), int(y), fmt=fmt,
+                                                          projection=projection, style=style,
+                                                          compiled_style=compiled_style, style_key=style_key,
+                                                          use_layer_style=use_layer_style, geostore=geostore)
         except TileSourceXYZRangeError as e:
             raise ValidationError(str(e))
+        
+        if tile_binary is None:
+            return HttpResponse(status=204)
+        
         return HttpResponse(tile_binary, content_type=mime_type)
 
 
+def build_tile_sprite(tiles):
+    """
+    Combines png tiles into a single horizontal strip, in the given order
+    """
+    images = [Image.open(io.BytesIO(tile)).convert("RGBA") for tile in tiles]
+    width = sum(image.width for image in images)
+    height = max(image.height for image in images)
+    
+    sprite = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    offset = 0
+    for image in images:
+        sprite.paste(image, (offset, 0))
+        offset += image.width
+    
+    buffer = io.BytesIO()
+    sprite.save(buffer, format="PNG")
+    
+    return buffer.getvalue()
+
+
+def build_tile_multipart(tiles, times, boundary):
+    """
+    Builds a multipart/mixed body, with one part per tile. Empty tiles have a part without content.
+    """
+    body = io.BytesIO()
+    
+    for (tile_binary, mime_type), time in zip(tiles, times):
+        body.write(f"--{boundary}\r\n".encode())
+        body.write(f"Content-Type: {mime_type or 'application/octet-stream'}\r\n".encode())
+        body.write(f"X-Tile-Time: {time}\r\n".encode())
+        body.write(f"Content-Length: {len(tile_binary or b'')}\r\n\r\n".encode())
+        body.write(tile_binary or b"")
+        body.write(b"\r\n")
+    
+    body.write(f"--{boundary}--\r\n".encode())
+    
+    return body.getvalue()
+
+
+@method_decorator(revalidate_cache, name='get')
+@method_decorator(namespaced_cache_page(raster_layer_cache_namespaces), name='get')
+class RasterTileStackView(RasterDataMixin, APIView):
+    """
+    Returns the same tile for many timesteps of a layer in one response, for animations.
+    
+    Timesteps are selected with time_from/time_to or a comma separated times list. The tiles are
+    returned as a horizontal png sprite strip (mode=sprite, default) or as a multipart/mixed payload
+    (mode=multipart). The X-Tile-Times header lists the time of each tile, in order.
+    """
+    
+    def get(self, request, layer_id, z, x, y):
+        try:
+            raster_files = self.get_multiple_raster_files(request, layer_id)
+        except QueryParamRequired as e:
+            return HttpResponse(e.message, status=400)
+        
+        max_steps = geomanager_settings.get("raster_tile_stack_max_steps")
+        raster_files = list(raster_files.select_related("layer__style").order_by("time")[:max_steps + 1])
+        
+        if not raster_files:
+            msg = _("No files found matching 'layer': %(layer_id)s and the requested times") % {"layer_id": layer_id}
+            return HttpResponse(msg, status=404)
+        
+        if len(raster_files) > max_steps:
+            msg = _("Too many timesteps requested. The maximum is %(max_steps)s") % {"max_steps": max_steps}
+            return HttpResponse(msg, status=400)
+        
+        fmt = self.get_query_param(request, "format", "png")
+        projection = self.get_query_param(request, "projection", "EPSG:3857")
+        style_param = self.get_query_param(request, "style")
+        mode = self.get_query_param(request, "mode", "sprite")
+        
+        if mode not in ["sprite", "multipart"]:
+            return HttpResponse(_("mode must be one of 'sprite' or 'multipart'"), status=400)
+        
+        if mode == "sprite" and fmt != "png":
+            return HttpResponse(_("sprite mode is only supported for png format"), status=400)
+        
+        geostore = get_geostore_or_none(self.get_query_param(request, "geostore_id"))
+        
+        # all files belong to the same layer, so the style is resolved once
+        style, compiled_style, style_key, use_layer_style = get_raster_tile_style(raster_files[0], fmt, style_param)
+        
+        def get_tile(raster_file):
+            return get_raster_file_tile(raster_file, z, x, y, fmt=fmt, projection=projection, style=style,
+                                        compiled_style=compiled_style, style_key=style_key,
+                                        use_layer_style=use_layer_style, geostore=geostore)
+        
+        try:
+            tiles = list(get_tile_stack_executor().map(get_tile, raster_files))
+        except TileSourceXYZRangeError as e:
+            return HttpResponse(str(e), status=400)
+        
+        times = [raster_file.time_str for raster_file in raster_files]
+        
+        if mode == "sprite":
+            response = HttpResponse(build_tile_sprite([tile_binary for tile_binary, mime_type in tiles]),
+                                    content_type="image/png")
+        else:
+            boundary = uuid.uuid4().hex
+            response = HttpResponse(build_tile_multipart(tiles, times, boundary),
+                                    content_type=f"multipart/mixed; boundary={boundary}")
+        
+        response["X-Tile-Times"] = ",".join(times)
+        response["Access-Control-Expose-Headers"] = "X-Tile-Times"
+        
+        return response
+
+
 @method_decorator(revalidate_cache, name='get')
-@method_decorator(cache_page, name='get')
+@method_decorator(namespaced_cache_page(raster_file_cache_namespaces), name='get')
 class RasterThumbnailView(RasterDataMixin, APIView):
     def get(self, request, file_id):
         try:
@@ -590,6 +856,12 @@ class RasterThumbnailView(RasterDataMixin, APIView):
         width = int(self.get_query_param(request, 'width', 256))
         height = int(self.get_query_param(request, 'height', 256))
         
+        # thumbnails in the layer style are pre-rendered at ingest
+        if (not style or style == "layer-style") and fmt == "png" and projection == "EPSG:3857":
+            thumb_data = get_raster_thumbnail(raster_file, width, height)
+            if thumb_data is not None:
+                return HttpResponse(thumb_data, content_type="image/png")
+        
         if style:
             # explict request to use layer defined style. Mostly used for admin previews
             if style == "layer-style":
@@ -626,7 +898,7 @@ class RasterThumbnailView(RasterDataMixin, APIView):
 
 
 @method_decorator(revalidate_cache, name='get')
-@method_decorator(cache_page, name='get')
+@method_decorator(namespaced_cache_page(raster_layer_cache_namespaces), name='get')
 class RasterDataPixelView(RasterDataMixin, APIView):
     renderer_classes = [JSONRenderer]
     
@@ -642,30 +914,197 @@ class RasterDataPixelView(RasterDataMixin, APIView):
 
 
 @method_decorator(revalidate_cache, name='get')
-@method_decorator(cache_page, name='get')
+@method_decorator(namespaced_cache_page(raster_layer_cache_namespaces), name='get')
+class RasterDataPixelBatchView(RasterDataMixin, APIView):
+    """
+    Pixel values at many points, for one time or a range of times.
+    
+    Points are passed as comma separated x and y params for GET requests, and as a GeoJSON MultiPoint,
+    or x and y arrays, in the body of POST requests. Times are passed as query params, either a single time,
+    or times, time_from or time_to for a timeseries.
+    """
+    renderer_classes = [JSONRenderer]
+    
+    def get_points(self, request: Request):
+        if request.method == "POST":
+            x_coords, y_coords = self.get_body_points(request.data)
+        else:
+            x_coords = self.get_query_param(request, "x")
+            y_coords = self.get_query_param(request, "y")
+            x_coords = x_coords.split(",") if x_coords else None
+            y_coords = y_coords.split(",") if y_coords else None
+        
+        if not x_coords or not y_coords:
+            raise QueryParamRequired(_("x and y coordinates, or a MultiPoint geometry required"))
+        
+        if len(x_coords) != len(y_coords):
+            raise InvalidPoints(_("x and y must have the same number of coordinates"))
+        
+        max_points = geomanager_settings.get("raster_batch_pixel_max_points")
+        if len(x_coords) > max_points:
+            raise InvalidPoints(_("At most %(max_points)s points can be queried at once") % {"max_points": max_points})
+        
+        try:
+            x_coords, y_coords = [float(x) for x in x_coords], [float(y) for y in y_coords]
+        except (TypeError, ValueError):
+            raise InvalidPoints(_("Invalid coordinates"))
+        
+        if not all(math.isfinite(coord) for coord in x_coords + y_coords):
+            raise InvalidPoints(_("Invalid coordinates"))
+        
+        return x_coords, y_coords
+    
+    def get_body_points(self, data):
+        """
+        Returns the x and y coordinates of a GeoJSON Point, MultiPoint or Feature with one of them,
+        or of an object with x and y arrays
+        """
+        if not isinstance(data, dict):
+            raise InvalidPoints(_("The body must be a GeoJSON geometry, or an object with x and y arrays"))
+        
+        if data.get("type") == "Feature":
+            data = data.get("geometry")
+            if not isinstance(data, dict):
+                raise InvalidPoints(_("The feature must have a Point or MultiPoint geometry"))
+        
+        if data.get("type") in ("Point", "MultiPoint"):
+            coords = data.get("coordinates")
+            if data["type"] == "Point":
+                coords = [coords]
+            
+            if not isinstance(coords, list) or not all(isinstance(coord, list) and len(coord) >= 2
+                                                       for coord in coords):
+                raise InvalidPoints(_("Invalid coordinates"))
+            
+            return [coord[0] for coord in coords], [coord[1] for coord in coords]
+        
+        x_coords, y_coords = data.get("x"), data.get("y")
+        
+        if (x_coords is not None and not isinstance(x_coords, list)) or \
+                (y_coords is not None and not isinstance(y_coords, list)):
+            raise InvalidPoints(_("x and y must be arrays of coordinates"))
+        
+        return x_coords, y_coords
+    
+    def get_raster_files(self, request: Request, layer_id):
+        if self.get_query_param(request, "time"):
+            return [self.get_single_raster_file(request, layer_id)]
+        return list(self.get_multiple_raster_files(request, layer_id).order_by("time"))
+    
+    def get_pixel_values(self, request, layer_id):
+        """
+        Builds the response for both GET and POST requests. Only GET responses are cached.
+        """
+        try:
+            x_coords, y_coords = self.get_points(request)
+            raster_files = self.get_raster_files(request, layer_id)
+        except (QueryParamRequired, InvalidPoints) as e:
+            return JsonResponse(e.serialize, status=400)
+        except RasterFileNotFound as e:
+            return JsonResponse(e.serialize, status=404)
+        
+        file_paths = [field_file_to_local_path(raster_file.file) for raster_file in raster_files]
+        grids = [raster_file.grid for raster_file in raster_files]
+        file_values = iter_pixel_values(file_paths, x_coords, y_coords, grids=grids)
+        
+        data = [{"date": raster_file.time, "values": values} for raster_file, values in zip(raster_files, file_values)]
+        
+        return Response({"points": list(zip(x_coords, y_coords)), "data": data})
+    
+    def get(self, request, layer_id):
+        return self.get_pixel_values(request, layer_id)
+    
+    def post(self, request, layer_id):
+        return self.get_pixel_values(request, layer_id)
+
+
+@method_decorator(revalidate_cache, name='get')
+@method_decorator(namespaced_cache_page(raster_layer_cache_namespaces), name='get')
 class RasterDataPixelTimeseriesView(RasterDataMixin, APIView):
     renderer_classes = [JSONRenderer]
     
+    def get_timeseries(self, layer_id, raster_files, x_coord, y_coord):
+        """
+        Looks up the stored and datacube values, and starts reading the remaining values from the raster files.
+        Returns an iterator of a (time, value) tuple per raster file, in order.
+        
+        The lookups are done before the iterator is returned, so that they fail before a response is started.
+        """
+        if not raster_files:
+            return iter([])
+        
+        # values extracted for this point by earlier requests, or appended at ingest
+        latest_raster_file = max(raster_files, key=lambda raster_file: raster_file.time)
+        entry = get_pixel_timeseries_entry(layer_id, latest_raster_file.grid, x_coord, y_coord)
+        stored_values = entry.values if entry else {}
+        
+        values = {raster_file.time: stored_values[raster_file.time_str] for raster_file in raster_files
+                  if raster_file.time_str in stored_values}
+        missing_raster_files = [raster_file for raster_file in raster_files if raster_file.time not in values]
+        
+        if missing_raster_files and raster_files[0].layer.storage_mode == "datacube":
+            times = [raster_file.time for raster_file in missing_raster_files]
+            values.update(read_datacube_pixel_timeseries(layer_id, times, x_coord, y_coord))
+        
+        # read the timesteps that are not stored or in the datacube from the raster files, concurrently
+        file_raster_files = [raster_file for raster_file in missing_raster_files if raster_file.time not in values]
+        file_paths = [field_file_to_local_path(raster_file.file) for raster_file in file_raster_files]
+        grids = [raster_file.grid for raster_file in file_raster_files]
+        file_values = iter_pixel_timeseries(file_paths, x_coord, y_coord, grids=grids)
+        
+        return self.iter_timeseries(entry, raster_files, values, file_values)
+    
+    def iter_timeseries(self, entry, raster_files, values, file_values):
+        """
+        Yields a (time, value) tuple per raster file, in order, taking the values that were not looked up
+        from file_values as they are read. Values that were read are stored for the point once all have been yielded.
+        
+        The entry is a pixel of the latest raster file grid, so only values of raster files on that grid are stored.
+        Other points in the same pixel may fall in different pixels of other grids.
+        """
+        stored_values = entry.values if entry else {}
+        new_values = {}
+        
+        for raster_file in raster_files:
+            if raster_file.time in values:
+                value = values[raster_file.time]
+            else:
+                # file values come in the order of raster_files
+                value = next(file_values)
+            
+            if entry and raster_file.time_str not in stored_values and get_grid_key(raster_file.grid) == entry.grid:
+                new_values[raster_file.time_str] = value
+            
+            yield raster_file.time, value
+        
+        if entry:
+            save_pixel_timeseries_values(entry, new_values)
+    
     def get(self, request, layer_id):
         try:
             raster_files = self.get_multiple_raster_files(request, layer_id)
             x_coord, y_coord = self.get_coords(request)
-        except QueryParamRequired as e:
+            export_format = self.get_export_format(request)
+        except (QueryParamRequired, UnsupportedExportFormat) as e:
             return JsonResponse(e.serialize, status=400)
         except RasterFileNotFound as e:
-            return JsonResponse({"message": e}, status=404)
+            return JsonResponse(e.serialize, status=404)
         
-        timeseries_data = []
+        raster_files = list(raster_files.select_related("layer").order_by("time"))
+        timeseries = self.get_timeseries(layer_id, raster_files, x_coord, y_coord)
         
-        for raster_file in raster_files:
-            pixel_data = get_raster_pixel_data(raster_file.file, x_coord, y_coord)
-            timeseries_data.append({"date": raster_file.time, "value": pixel_data})
+        if export_format:
+            rows = ({"date": time, "value": value} for time, value in timeseries)
+            return export_response(rows, TIMESERIES_EXPORT_COLUMNS, export_format,
+                                   f"{layer_id}-pixel-timeseries")
+        
+        timeseries_data = [{"date": time, "value": value} for time, value in timeseries]
         
         return Response(timeseries_data)
 
 
 @method_decorator(revalidate_cache, name='get')
-@method_decorator(cache_page, name='get')
+@method_decorator(namespaced_cache_page(raster_layer_cache_namespaces), name='get')
 class RasterDataGeostoreView(RasterDataMixin, APIView):
     renderer_classes = [JSONRenderer]
     
@@ -674,44 +1113,145 @@ class RasterDataGeostoreView(RasterDataMixin, APIView):
             value_type = self.get_query_param(request, "value_type")
             geostore = self.get_geostore(request)
             raster_file = self.get_single_raster_file(request, layer_id)
-            data = get_geostore_data(raster_file.file, geostore, value_type)
         except QueryParamRequired as e:
             return JsonResponse(e.serialize, status=400)
         except (RasterFileNotFound, GeostoreNotFound) as e:
             return JsonResponse({"message": e}, status=404)
+        
+        data_source = AdminBoundarySettings.for_request(request).data_source
+        admin_stats = get_raster_files_admin_stats([raster_file], geostore, data_source).get(raster_file.time)
+        
+        if admin_stats:
+            data = admin_stats.as_dict(value_type)
+        else:
+            data = get_geostore_data(raster_file.file, geostore, value_type)
+        
         return Response(data)
 
 
 @method_decorator(revalidate_cache, name='get')
-@method_decorator(cache_page, name='get')
+@method_decorator(namespaced_cache_page(raster_layer_cache_namespaces), name='get')
 class RasterDataGeostoreTimeseriesView(RasterDataMixin, APIView):
     renderer_classes = [JSONRenderer]
     
-    def get(self, request, layer_id):
-        try:
-            value_type = self.get_query_param(request, "value_type")
-            raster_files = self.get_multiple_raster_files(request, layer_id)
-            geostore = self.get_geostore(request)
-        except QueryParamRequired as e:
-            return JsonResponse(e.serialize, status=400)
-        except (RasterFileNotFound, GeostoreNotFound) as e:
-            return JsonResponse({"message": e}, status=404)
+    def get_timeseries(self, request, layer_id, raster_files, geostore, value_type):
+        """
+        Looks up the precomputed and datacube stats, and starts computing the remaining stats from the raster files.
+        Returns an iterator of a (time, stats) tuple per raster file, in order.
+        
+        The lookups are done before the iterator is returned, so that they fail before a response is started.
+        """
+        if not raster_files:
+            return iter([])
+        
+        geom = wkb.loads(geostore.geom.hex)
+        
+        # precomputed stats, when the geostore is an admin boundary unit
+        data_source = AdminBoundarySettings.for_request(request).data_source
+        stats = {time: admin_stats.as_dict(value_type) for time, admin_stats in
+                 get_raster_files_admin_stats(raster_files, geostore, data_source).items()}
         
-        timeseries_data = []
+        missing_raster_files = [raster_file for raster_file in raster_files if raster_file.time not in stats]
         
+        if missing_raster_files and raster_files[0].layer.storage_mode == "datacube":
+            times = [raster_file.time for raster_file in missing_raster_files]
+            for time, values in read_datacube_geometry_timeseries(layer_id, times, geom).items():
+                stats[time] = get_values_stats(values, value_type) if values.size else {}
+        
+        # compute the remaining timesteps from the raster files, on the zonal stats process pool
+        file_raster_files = [raster_file for raster_file in missing_raster_files if raster_file.time not in stats]
+        file_paths = [field_file_to_local_path(raster_file.file) for raster_file in file_raster_files]
+        file_stats = iter_zonal_stats(file_paths, geom, value_type)
+        
+        return self.iter_timeseries(raster_files, stats, file_stats, value_type)
+    
+    def iter_timeseries(self, raster_files, stats, file_stats, value_type):
+        """
+        Yields a (time, stats) tuple per raster file, in order, taking the stats that were not looked up
+        from file_stats as they are computed
+        """
         for raster_file in raster_files:
-            data = get_geostore_data(raster_file.file, geostore, value_type)
+            # file stats come in the order of raster_files
+            data = stats[raster_file.time] if raster_file.time in stats else next(file_stats)
             
             if value_type and data.get(value_type):
                 data = data[value_type]
             else:
                 data = data.get("mean")
             
-            timeseries_data.append({"date": raster_file.time, "value": data})
+            yield raster_file.time, data
+    
+    def get(self, request, layer_id):
+        try:
+            value_type = self.get_query_param(request, "value_type")
+            raster_files = self.get_multiple_raster_files(request, layer_id)
+            geostore = self.get_geostore(request)
+            export_format = self.get_export_format(request)
+        except (QueryParamRequired, UnsupportedExportFormat) as e:
+            return JsonResponse(e.serialize, status=400)
+        except (RasterFileNotFound, GeostoreNotFound) as e:
+            return JsonResponse(e.serialize, status=404)
+        
+        raster_files = list(raster_files.select_related("layer").order_by("time"))
+        timeseries = self.get_timeseries(request, layer_id, raster_files, geostore, value_type)
+        
+        if export_format:
+            rows = ({"date": time, "value": value} for time, value in timeseries)
+            return export_response(rows, TIMESERIES_EXPORT_COLUMNS, export_format,
+                                   f"{layer_id}-{geostore.pk.hex}-timeseries")
+        
+        timeseries_data = [{"date": time, "value": value} for time, value in timeseries]
         
         return Response(timeseries_data)
 
 
+@method_decorator(revalidate_cache, name='get')
+@method_decorator(namespaced_cache_page(raster_layer_cache_namespaces), name='get')
+class RasterAdminStatsTileView(RasterDataMixin, APIView):
+    """
+    Vector tiles of the admin boundaries of a level, with the precomputed stats of a raster file
+    as feature properties, for choropleth display
+    """
+    
+    def get(self, request, layer_id, z, x, y):
+        try:
+            raster_file = self.get_single_raster_file(request, layer_id)
+        except QueryParamRequired as e:
+            return JsonResponse(e.serialize, status=400)
+        except RasterFileNotFound as e:
+            return JsonResponse(e.serialize, status=404)
+        
+        try:
+            level = int(self.get_query_param(request, "level", 0))
+        except ValueError:
+            return JsonResponse({"message": _("level must be an integer")}, status=400)
+        
+        sql = f"""WITH
+                    bounds AS (
+                      SELECT ST_TileEnvelope(%s, %s, %s) AS geom
+                    ),
+                    mvtgeom AS (
+                      SELECT ST_AsMVTGeom(ST_Transform(b.geom, 3857), bounds.geom) AS geom,
+                        s.gid, s.level, b.name_0, b.name_1, b.name_2, s.count, s.mean, s.min, s.max, s.sum
+                      FROM {AdminBoundary._meta.db_table} b
+                      JOIN {RasterAdminBoundaryStats._meta.db_table} s ON s.boundary_id = b.id, bounds
+                      WHERE s.raster_file_id = %s AND s.level = %s
+                        AND ST_Intersects(b.geom, ST_Transform(bounds.geom, 4326))
+                    )
+                    SELECT ST_AsMVT(mvtgeom, 'default') FROM mvtgeom;
+                    """
+        
+        with connection.cursor() as cursor:
+            try:
+                cursor.execute(sql, (z, x, y, raster_file.pk, level))
+                tile = cursor.fetchone()[0]
+                if not tile:
+                    return HttpResponse("Tile not found", status=404)
+                return HttpResponse(tile, content_type="application/x-protobuf")
+            except Exception as e:
+                return HttpResponse(f"Error while fetching tile: {e}", status=500)
+
+
 def raster_file_as_tile_json(request, layer_id):
     layer = get_object_or_404(RasterFileLayer, pk=layer_id)
     tile_json = layer.get_tile_json(request)
@@ -1,10 +1,13 @@
 from django.http import HttpResponse, JsonResponse
 from django.urls import reverse
+from django.views.decorators.http import condition
 from wagtail.api.v2.utils import get_full_url
-from wagtailcache.cache import cache_page
 
+from geomanager.decorators import namespaced_cache_page
 from geomanager.errors import MissingTileError
 from geomanager.models import MBTSource
+from geomanager.utils import make_etag
+from geomanager.utils.cache_namespace import mbt_source_cache_namespace
 from geomanager.utils.tile_gl import center_from_bounds, open_mbtiles
 
 DEFAULT_ZOOM = 13
@@ -13,7 +16,23 @@ DEFAULT_MAXZOOM = 15
 WORLD_BOUNDS = [-180, -85.05112877980659, 180, 85.0511287798066]
 
 
-@cache_page
+def mbt_source_cache_namespaces(request, source_slug, **kwargs):
+    return [mbt_source_cache_namespace(source_slug)]
+
+
+def mbt_source_last_modified(request, source_slug, **kwargs):
+    return MBTSource.objects.filter(slug=source_slug).values_list("modified", flat=True).first()
+
+
+def mbt_source_etag(request, source_slug, **kwargs):
+    modified = mbt_source_last_modified(request, source_slug)
+    if not modified:
+        return None
+    return make_etag(source_slug, modified.timestamp())
+
+
+@condition(etag_func=mbt_source_etag, last_modified_func=mbt_source_last_modified)
+@namespaced_cache_page(mbt_source_cache_namespaces)
 def tile_gl(request, source_slug, z, x, y):
     source = MBTSource.objects.get(slug=source_slug)
     with (open_mbtiles(source.file.path)) as mbtiles:
@@ -34,7 +53,7 @@ def tile_gl(request, source_slug, z, x, y):
             )
 
 
-@cache_page
+@namespaced_cache_page(mbt_source_cache_namespaces)
 def tile_json_gl(request, source_slug):
     source = MBTSource.objects.get(slug=source_slug)
     with open_mbtiles(source.file.path) as mbtiles:
@@ -87,7 +106,7 @@ def tile_json_gl(request, source_slug):
         return JsonResponse(spec)
 
 
-@cache_page
+@namespaced_cache_page(mbt_source_cache_namespaces)
 def style_json_gl(request, source_slug):
     source = MBTSource.objects.get(slug=source_slug)
     tilejson_url = get_full_url(request, reverse("tile_json_gl", args=[source.slug]))
@@ -12,15 +12,15 @@ from django.urls import reverse
 from django.utils.decorators import method_decorator
 from django.utils.translation import gettext as _
 from django.views import View
+from django.views.decorators.http import condition
 from wagtail.admin import messages
 from wagtail.admin.auth import user_passes_test, user_has_any_page_permission, permission_denied
 from wagtail.api.v2.utils import get_full_url
 from wagtail.models import Site
 from wagtail.snippets.permissions import get_permission_name
 from wagtail_modeladmin.helpers import AdminURLHelper
-from wagtailcache.cache import cache_page, clear_cache
 
-from geomanager.decorators import revalidate_cache
+from geomanager.decorators import revalidate_cache, namespaced_cache_page
 from geomanager.forms import VectorLayerFileForm, VectorTableForm
 from geomanager.models import (
     Dataset,
@@ -34,7 +34,9 @@ from geomanager.models import (
 )
 from geomanager.serializers.vector_file import VectorFileLayerSerializer
 from geomanager.settings import geomanager_settings
-from geomanager.utils import UUIDEncoder
+from geomanager.utils import UUIDEncoder, make_etag
+from geomanager.utils.cache_namespace import table_cache_namespace
+from geomanager.utils.tile_cache import tile_cache, make_tile_cache_key
 from geomanager.utils.vector_utils import ogr_db_import
 
 ALLOWED_VECTOR_EXTENSIONS = ["zip", "geojson", "csv"]
@@ -310,9 +312,8 @@ def preview_vector_layers(request, dataset_id, layer_id=None):
 
             if columns and data_table:
                 data_table.properties = columns
+                # saving the table invalidates its cached tiles
                 data_table.save()
-                # clear wagtail cache
-                clear_cache()
             messages.success(request, _("Data fields updated successfully"))
             # redirect
             return redirect(reverse("geomanager_preview_vector_layer", args=(dataset_id, layer_id)))
@@ -326,8 +327,32 @@ def preview_vector_layers(request, dataset_id, layer_id=None):
     return render(request, template_name=template_name, context=context)
 
 
+def pg_table_cache_namespaces(request, table_name, **kwargs):
+    return [table_cache_namespace(table_name)]
+
+
+def vector_tile_etag(request, **kwargs):
+    table_name = request.GET.get("table_name")
+    if not table_name:
+        return None
+
+    modified = PgVectorTable.objects.filter(table_name=table_name).values_list("modified", flat=True).first()
+    if not modified:
+        return None
+
+    return make_etag(table_name, modified.timestamp(), request.GET.get("geostore_id"))
+
+
+def vector_tile_last_modified(request, **kwargs):
+    table_name = request.GET.get("table_name")
+    if not table_name:
+        return None
+
+    return PgVectorTable.objects.filter(table_name=table_name).values_list("modified", flat=True).first()
+
+
 @method_decorator(revalidate_cache, name='get')
-@method_decorator(cache_page, name='get')
+@method_decorator(condition(etag_func=vector_tile_etag, last_modified_func=vector_tile_last_modified), name='get')
 class VectorTileView(View):
     def get(self, request, z, x, y):
         table_name = request.GET.get("table_name")
@@ -344,6 +369,12 @@ class VectorTileView(View):
         except ObjectDoesNotExist:
             return HttpResponse(f"Table matching 'table_name': {table_name} not found", status=404)
 
+        cache_key = make_tile_cache_key("vector", vector_table.pk, vector_table.modified.timestamp(), z, x, y, "pbf",
+                                        geostore_id=geostore_id)
+        tile = tile_cache.get(cache_key)
+        if tile is not None:
+            return HttpResponse(tile, content_type="application/x-protobuf")
+
         if geostore_id:
             try:
                 geostore = Geostore.objects.get(pk=geostore_id)
@@ -391,13 +422,15 @@ class VectorTileView(View):
                 tile = cursor.fetchone()[0]
                 if not tile:
                     return HttpResponse("Tile not found", status=404)
+                tile = bytes(tile)
+                tile_cache.set(cache_key, tile)
                 return HttpResponse(tile, content_type="application/x-protobuf")
             except Exception as e:
                 return HttpResponse(f"Error while fetching tile: {e}", status=500)
 
 
 @method_decorator(revalidate_cache, name='get')
-@method_decorator(cache_page, name='get')
+@method_decorator(namespaced_cache_page(pg_table_cache_namespaces), name='get')
 class GeoJSONPgTableView(View):
     def get(self, request, table_name):
         try:
@@ -19,6 +19,7 @@ from geomanager.models import Geostore
 from geomanager.models.vector_file import PgVectorTable
 from geomanager.serializers.geostore import GeostoreSerializer
 from geomanager.serializers.vector_file import AdminBoundarySerializer
+from geomanager.utils.admin_stats import get_admin_boundary_filter
 
 
 class VectorTableFileDetailViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
@@ -107,25 +108,12 @@ class GeostoreViewSet(viewsets.ViewSet):
             "id2": None,
         }
 
-        boundary_filter = {
-            "gid_0": gid_0,
-            "level": 0
-        }
+        if gid_1:
+            geostore_filter.update({"id1": gid_1})
+        if gid_2:
+            geostore_filter.update({"id2": gid_2})
 
-        if data_source != "gadm41":
-            if gid_1:
-                geostore_filter.update({"id1": gid_1})
-                boundary_filter.update({"gid_1": gid_1, "level": 1})
-            if gid_2:
-                geostore_filter.update({"id2": gid_2})
-                boundary_filter.update({"gid_2": gid_2, "level": 2})
-        else:
-            if gid_1:
-                geostore_filter.update({"id1": gid_1})
-                boundary_filter.update({"gid_1": f"{gid_0}.{gid_1}_1", "level": 1})
-            if gid_2:
-                geostore_filter.update({"id2": gid_2})
-                boundary_filter.update({"gid_2": f"{gid_0}.{gid_1}.{gid_2}_1", "level": 2})
+        boundary_filter = get_admin_boundary_filter(data_source, gid_0, gid_1, gid_2)
 
         geostore = Geostore.objects.filter(**geostore_filter)
         should_save = False
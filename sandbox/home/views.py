@@ -10,14 +10,17 @@ from django.utils.translation import gettext as _
 from django.views import View
 from wagtail.api.v2.utils import get_full_url
 
+from geomanager.decorators import namespaced_cache_page
+from geomanager.utils.cache_namespace import bump_cache_namespaces
 from geomanager.utils.vector_utils import ogr_db_import
 from wagtail.admin import messages
 from wagtail.admin.auth import user_passes_test, user_has_any_page_permission
-from wagtailcache.cache import clear_cache, cache_page
 
 from .forms import StationsUploadForm, StationColumnsForm
 from .models import StationsSettings
 
+STATIONS_CACHE_NAMESPACE = "stations"
+
 
 @user_passes_test(user_has_any_page_permission)
 def load_stations(request):
@@ -80,8 +83,8 @@ def load_stations(request):
 
             messages.success(request, _("Stations data loaded successfully"))
 
-            # clear wagtail cache
-            clear_cache()
+            # invalidate cached stations tiles
+            bump_cache_namespaces(STATIONS_CACHE_NAMESPACE)
 
             return redirect(reverse("preview_stations"))
         else:
@@ -128,8 +131,8 @@ def preview_stations(request):
                 stations_settings.columns = columns
                 stations_settings.name_column = name_column
                 stations_settings.save()
-                # clear wagtail cache
-                clear_cache()
+                # invalidate cached stations tiles
+                bump_cache_namespaces(STATIONS_CACHE_NAMESPACE)
             messages.success(request, _("Stations columns updated successfully"))
 
             # redirect
@@ -144,7 +147,11 @@ def preview_stations(request):
     return render(request, template, context=context)
 
 
-@method_decorator(cache_page, name='get')
+def stations_cache_namespaces(request, *args, **kwargs):
+    return [STATIONS_CACHE_NAMESPACE]
+
+
+@method_decorator(namespaced_cache_page(stations_cache_namespaces), name='get')
 class StationsTileView(View):
     def get(self, request, z, x, y):
         station_settings = StationsSettings.for_request(request)